@@ -0,0 +1 @@
+"""Benchmarks and local fakes for the Todoist MCP server"""
@@ -0,0 +1,128 @@
+"""
+Workload analytics on task columns versus a loop over the task list
+
+Fills a fake Todoist workspace with dated, prioritized and estimated
+tasks, then answers "what is each project's load over the next N days"
+three ways:
+
+- `loop`: read the task list and aggregate it in a Python loop per task,
+  as a tool without `analytics.py` would
+- `columns`: `get_workload` with a different window each call, so every
+  call aggregates the deadline-sorted columns afresh
+- `memo`: `get_workload` repeating the same question, answered from the
+  memo until the tasks change
+
+Reports the one-off column build time and per-call latency (p50, p95),
+and checks that the loop and the columns agree.
+
+    python -m benchmarks.bench_analytics --tasks 50000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List
+
+from src import analytics
+from src.config import CacheSettings, Settings, SnapshotSettings, SyncSettings
+from src.task_store import due_deadline
+from src.todoist_client import TodoistClient
+
+from .fake_todoist import FakeTodoist, serve
+
+
+def percentile(samples: List[float], q: float) -> float:
+    return statistics.quantiles(samples, n=100)[int(q) - 1] if len(samples) > 1 else samples[0]
+
+
+def fill(fake: FakeTodoist, rng: random.Random) -> None:
+    """Spread due dates over the past month and next quarter, and estimate some tasks"""
+    for task in fake.tasks.values():
+        if rng.random() < 0.7:
+            day = date.today() + timedelta(days=rng.randint(-30, 90))
+            task["due"] = {"string": day.strftime("%b %d"), "date": day.isoformat(), "is_recurring": False}
+        else:
+            task["due"] = None
+        if rng.random() < 0.4:
+            task["duration"] = {"amount": rng.choice([15, 30, 45, 60, 90]), "unit": "minute"}
+
+
+def loop_workload(tasks: List[Dict[str, Any]], now: float, end: float) -> Dict[Any, Dict[str, int]]:
+    groups: Dict[Any, Dict[str, int]] = {}
+    for task in tasks:
+        group = groups.setdefault(task["project_id"], {"active": 0, "high_priority": 0, "overdue": 0,
+                                                       "due_in_window": 0, "minutes": 0})
+        group["active"] += 1
+        if task["priority"] >= analytics.HIGH_PRIORITY:
+            group["high_priority"] += 1
+        deadline = due_deadline(task.get("due"))
+        if deadline is None:
+            continue
+        if deadline < now:
+            group["overdue"] += 1
+        elif deadline < end:
+            group["due_in_window"] += 1
+            duration = task.get("duration")
+            group["minutes"] += duration["amount"] if duration else 0
+    return groups
+
+
+async def timed(call: Callable[[int], Any], count: int) -> List[float]:
+    samples = []
+    for index in range(count):
+        start = time.perf_counter()
+        await call(index)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def main(tasks: int, count: int) -> None:
+    fake = FakeTodoist(projects=30, tasks=tasks)
+    fill(fake, random.Random(0))
+    with serve(fake.app) as base_url:
+        settings = Settings(api_base_url=base_url, cache=CacheSettings(enabled=False),
+                            sync=SyncSettings(refresh_interval=3600), snapshot=SnapshotSettings(enabled=False))
+        async with TodoistClient("bench-token", settings) as client:
+            await client.get_projects()
+            start = time.perf_counter()
+            columns = await client.get_task_columns()
+            print(f"{len(columns)} tasks, columns built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+            async def loop(index: int) -> None:
+                now = time.time()
+                end = analytics.day_start(date.today() + timedelta(days=1 + index % 60))
+                loop_workload(await client.get_tasks(), now, end)
+
+            async def fresh(index: int) -> None:
+                await client.get_workload(days=1 + index % 60, offset_days=index // 60)
+
+            async def memo(index: int) -> None:
+                await client.get_workload(days=7)
+
+            print(f"{'approach':<10} {'p50 ms':>8} {'p95 ms':>8}")
+            for name, call in (("loop", loop), ("columns", fresh), ("memo", memo)):
+                samples = await timed(call, count)
+                print(f"{name:<10} {statistics.median(samples):8.3f} {percentile(samples, 95):8.3f}")
+
+            now = time.time()
+            expected = loop_workload(await client.get_tasks(), now,
+                                     analytics.day_start(date.today() + timedelta(days=7)))
+            result = await client.get_workload(days=7)
+            agree = all(
+                expected[group["id"]] == {"active": group["active"], "high_priority": group["high_priority"],
+                                          "overdue": group["overdue"], "due_in_window": group["due_in_window"],
+                                          "minutes": group["estimated_minutes_in_window"]}
+                for group in result["groups"]
+            )
+            print(f"loop and columns agree: {agree}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--count", type=int, default=200, help="calls per approach")
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.count))
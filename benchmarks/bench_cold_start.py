@@ -0,0 +1,69 @@
+"""
+Cold start with and without the on-disk snapshot
+
+Simulates a freshly spawned server process (a new client with an empty
+replica) and measures the time until its first full task read returns,
+plus the bytes downloaded for it:
+
+- no snapshot: a full sync of the whole workspace
+- stale snapshot: load from disk, then wait for an incremental sync
+- fresh snapshot: served from disk, incremental sync runs in the background
+
+    python -m benchmarks.bench_cold_start --tasks 20000 --latency 0.1
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+from src.config import CacheSettings, Settings, SnapshotSettings, SyncSettings
+from src.todoist_client import TodoistClient
+
+from .fake_todoist import FakeTodoist, serve
+
+
+async def cold_start(base_url: str, fake: FakeTodoist, snapshot: SnapshotSettings, name: str) -> None:
+    settings = Settings(
+        api_base_url=base_url,
+        cache=CacheSettings(enabled=False),
+        sync=SyncSettings(refresh_interval=60),
+        snapshot=snapshot,
+    )
+    received = 0
+    async with TodoistClient("bench-token", settings) as client:
+        async def count(response):
+            nonlocal received
+            await response.aread()
+            received += len(response.content)
+        client._transport().event_hooks["response"].append(count)
+
+        start = time.perf_counter()
+        tasks = await client.get_tasks()
+        elapsed = time.perf_counter() - start
+        first_read = received
+
+        # Let a background catch-up finish so the next run starts from it
+        if client.sync._background is not None:
+            await client.sync._background
+
+    print(f"{name:<15} {elapsed * 1000:9.1f} ms   {first_read / 1024:10.1f} KiB   {len(tasks)} tasks")
+    fake._new_task(content="Changed between runs", project_id=next(iter(fake.projects)))
+
+
+async def main(tasks: int, latency: float) -> None:
+    fake = FakeTodoist(projects=50, tasks=tasks, latency=latency)
+    with serve(fake.app) as base_url, tempfile.TemporaryDirectory() as directory:
+        await cold_start(base_url, fake, SnapshotSettings(enabled=False), "no snapshot")
+        # Populate the snapshot
+        await cold_start(base_url, fake, SnapshotSettings(directory=directory), "first run")
+        await cold_start(base_url, fake, SnapshotSettings(directory=directory, max_age=0), "stale snapshot")
+        await cold_start(base_url, fake, SnapshotSettings(directory=directory), "fresh snapshot")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--latency", type=float, default=0.1, help="simulated upstream latency in seconds")
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.latency))
@@ -0,0 +1,107 @@
+"""
+Due-date normalization: per-call parsing versus cached deadlines
+
+Builds the task store from a fake Todoist workspace's tasks the way the
+read-through cache does on every read, and times the deadlines it needs:
+
+- `parse`: every due parsed from its ISO strings on every build, as
+  before `due_dates.py`
+- `lru`: fresh task models (a new response), with parsed dates shared
+  through the LRU cache
+- `stored`: the same models again (a cached response), with each
+  deadline read back from its `Due`
+
+Also times `due_string` phrases, parsed afresh and from the cache, and
+reports store build time for fresh and cached models.
+
+    python -m benchmarks.bench_due_dates --tasks 50000
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Any, Callable, List, Mapping, Optional
+
+from src import due_dates
+from src.models import Task
+from src.task_store import TaskStore
+
+from .fake_todoist import FakeTodoist
+
+PHRASES = ["today", "tomorrow", "tomorrow at 5pm", "next friday", "in 3 days", "every monday",
+           "Oct 27", "27 oct 2027", "next week", "at 9:30am", "in 2 months", "mon"]
+
+
+def old_deadline(due: Optional[Mapping[str, Any]]) -> Optional[float]:
+    """The deadline parsed on every call"""
+    if not due:
+        return None
+    value = due.get("datetime")
+    if value:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    value = due.get("date")
+    if value:
+        return datetime.combine(date.fromisoformat(value[:10]), dt_time.max).timestamp()
+    return None
+
+
+def fill(fake: FakeTodoist, rng: random.Random) -> None:
+    """Due dates over a quarter, a third of them with a time"""
+    for task in fake.tasks.values():
+        if rng.random() < 0.8:
+            day = date.today() + timedelta(days=rng.randint(-30, 60))
+            due = {"string": day.strftime("%b %d"), "date": day.isoformat(), "is_recurring": False}
+            if rng.random() < 0.3:
+                due["datetime"] = f"{day.isoformat()}T{rng.randint(8, 18):02d}:{rng.choice(['00', '30'])}:00Z"
+            task["due"] = due
+        else:
+            task["due"] = None
+
+
+def timed(run: Callable[[], Any], rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main(tasks: int, rounds: int) -> None:
+    fake = FakeTodoist(projects=20, tasks=tasks)
+    fill(fake, random.Random(0))
+    payload = list(fake.tasks.values())
+    models = [Task.from_dict(task) for task in payload]
+    dues = [task.due for task in models]
+    print(f"{tasks} tasks, {len({(d.datetime, d.date) for d in dues if d})} distinct due dates")
+
+    def fresh_dues() -> List[Any]:
+        # What a new response gives: new models, nothing stored on them yet
+        return [Task.from_dict(task).due for task in payload]
+
+    print(f"{'deadlines':<18} {'ms':>8}")
+    print(f"{'parse':<18} {timed(lambda: [old_deadline(due) for due in dues], rounds):8.2f}")
+    batches = [fresh_dues() for _ in range(rounds)]
+    print(f"{'lru':<18} {timed(lambda: [due_dates.due_deadline(due) for due in batches.pop()], rounds):8.2f}")
+    print(f"{'stored':<18} {timed(lambda: [due_dates.due_deadline(due) for due in dues], rounds):8.2f}")
+
+    phrases = [random.Random(index).choice(PHRASES) for index in range(tasks // 10)]
+    today = date.today()
+    print(f"{'phrases (' + str(len(phrases)) + ')':<18} {'ms':>8}")
+    print(f"{'parse':<18} {timed(lambda: [due_dates.parse_due_string.__wrapped__(p, today) for p in phrases], rounds):8.2f}")
+    print(f"{'lru':<18} {timed(lambda: [due_dates.parse_due_string(p, today) for p in phrases], rounds):8.2f}")
+
+    print(f"{'store build':<18} {'ms':>8}")
+    batches = [[Task.from_dict(task) for task in payload] for _ in range(rounds)]
+    print(f"{'fresh models':<18} {timed(lambda: TaskStore(batches.pop()), rounds):8.2f}")
+    print(f"{'cached models':<18} {timed(lambda: TaskStore(models), rounds):8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    main(args.tasks, args.rounds)
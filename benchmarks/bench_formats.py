@@ -0,0 +1,66 @@
+"""
+Payload size of the task list in each output format
+
+Renders the same task list (from a fake Todoist workspace) in every format
+`get_tasks` supports and reports, for each one:
+
+- the size of the serialized payload, and of its gzip and brotli encodings
+  (brotli only when the `brotli` package is installed)
+- a rough token count (bytes / 4)
+- the time to read, render and serialize it (from the local replica)
+
+plus the Markdown rendering of the `todoist://tasks` resource for
+comparison.
+
+    python -m benchmarks.bench_formats --tasks 2000
+"""
+
+import argparse
+import asyncio
+import gzip
+import time
+
+from src import formats
+from src.config import CacheSettings, Settings, SnapshotSettings
+from src.resources.todoist_resources import _task_lines
+from src.todoist_client import TodoistClient
+
+from .fake_todoist import FakeTodoist, serve
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+
+def report(name: str, text: str, elapsed: float) -> None:
+    body = text.encode()
+    compressed = len(gzip.compress(body, compresslevel=6))
+    br = f"{len(brotli.compress(body, quality=4)):10d}" if brotli is not None else f"{'-':>10}"
+    print(f"{name:<10} {len(body):10d} {compressed:10d} {br} {len(body) // 4:9d} {elapsed:9.2f}")
+
+
+async def main(tasks: int, projects: int) -> None:
+    fake = FakeTodoist(projects=projects, tasks=tasks)
+    with serve(fake.app) as base_url:
+        settings = Settings(api_base_url=base_url, cache=CacheSettings(enabled=False),
+                            snapshot=SnapshotSettings(enabled=False))
+        async with TodoistClient("bench-token", settings) as client:
+            store = await client.get_task_store()
+            print(f"{len(store)} tasks in {projects} projects")
+            print(f"{'format':<10} {'bytes':>10} {'gzip':>10} {'br':>10} {'~tokens':>9} {'render ms':>9}")
+            start = time.perf_counter()
+            text = "\n".join(_task_lines(store))
+            report("markdown", text, (time.perf_counter() - start) * 1000)
+            for format in formats.FORMATS:
+                start = time.perf_counter()
+                text = formats.as_text(await client.get_tasks(format=format))
+                report(format, text, (time.perf_counter() - start) * 1000)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--projects", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.projects))
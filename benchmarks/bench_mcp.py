@@ -0,0 +1,358 @@
+"""
+Load test of the MCP server over stdio and streamable HTTP
+
+Starts the fake Todoist server in its own process, then the MCP server
+pointed at it (`python -m src` for stdio, `python -m src.http_server` for
+HTTP), and drives the real tools, resources and prompts through an MCP
+`ClientSession`. For each operation it reports p50/p95/p99 latency and
+throughput at the chosen concurrency, and for each transport the server's
+resident and peak memory at the end of the run (Linux only).
+
+A run can be saved as a baseline and later runs are compared against it.
+An operation whose p95 grew by more than `--tolerance` (or a server whose
+peak memory did) is reported as a regression, and the run exits with
+status 1:
+
+    python -m benchmarks.bench_mcp --tasks 5000 --save-baseline
+    python -m benchmarks.bench_mcp --tasks 5000
+
+Baselines are machine-specific. They are keyed by transport, account
+size, upstream latency, concurrency and `--env` settings, so only like
+runs are compared. Server settings are passed with
+`--env TODOIST_SYNC_ENABLED=false`.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+from pydantic import AnyUrl
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baselines", "bench_mcp.json")
+
+# Reads first: writes grow the account for everything measured after them
+OPERATIONS: List[Tuple[str, str, Dict[str, Any]]] = [
+    ("tool", "get_tasks", {}),
+    ("tool", "get_tasks", {"fields": "id,content,due", "limit": 50}),
+    ("tool", "get_tasks", {"priority": 4}),
+    ("tool", "get_tasks", {"format": "table"}),
+    ("tool", "get_projects", {}),
+    ("resource", "todoist://tasks", {}),
+    ("resource", "todoist://tasks/lines", {}),
+    ("resource", "todoist://projects", {}),
+    ("prompt", "daily_planning", {}),
+    ("prompt", "weekly_review", {}),
+    ("prompt", "project_review", {}),
+    ("prompt", "project_planning", {"project_name": "Project 1"}),
+    ("tool", "create_task", {"content": "Load test task"}),
+]
+WARMUP = 3
+# p95 changes smaller than this are noise whatever the ratio
+MIN_REGRESSION_MS = 1.0
+
+
+def operation_label(kind: str, name: str, args: Dict[str, Any]) -> str:
+    return f"{name}({','.join(args)})" if args else name
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted samples"""
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, max(math.ceil(q / 100 * len(ordered)) - 1, 0))]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def memory(pid: Optional[int]) -> Dict[str, Optional[float]]:
+    """Resident and peak resident memory of a process in MB, from /proc"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            fields = dict(line.split(":", 1) for line in status if ":" in line)
+    except (OSError, TypeError):
+        return {"rss_mb": None, "peak_rss_mb": None}
+    return {
+        "rss_mb": round(int(fields["VmRSS"].split()[0]) / 1024, 1),
+        "peak_rss_mb": round(int(fields["VmHWM"].split()[0]) / 1024, 1),
+    }
+
+
+def stdio_server_pid() -> Optional[int]:
+    """The `python -m src` process the stdio client spawned"""
+    try:
+        entries = [entry for entry in os.listdir("/proc") if entry.isdigit()]
+    except OSError:
+        return None
+    for entry in entries:
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                ppid = int(stat.read().rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{entry}/cmdline", "rb") as cmdline:
+                argv = cmdline.read().split(b"\0")
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == os.getpid() and argv[1:3] == [b"-m", b"src"]:
+            return int(entry)
+    return None
+
+
+@contextmanager
+def fake_server(args: argparse.Namespace) -> Iterator[str]:
+    """Run `benchmarks.fake_todoist` in its own process, yielding its base URL"""
+    command = [
+        sys.executable, "-m", "benchmarks.fake_todoist",
+        "--projects", str(args.projects), "--tasks", str(args.tasks), "--latency", str(args.latency),
+    ]
+    if args.rate_limit:
+        command += ["--rate-limit", args.rate_limit]
+    proc = subprocess.Popen(command, cwd=REPO_ROOT, stdout=subprocess.PIPE, text=True)
+    try:
+        yield proc.stdout.readline().strip()
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def server_env(base_url: str, state_dir: str, overrides: Dict[str, str]) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "TODOIST_API_TOKEN": "bench-token",
+        "TODOIST_API_BASE_URL": base_url,
+        # Keep snapshots, outbox and shared state out of the user's cache directory
+        "TODOIST_SNAPSHOT_DIR": state_dir,
+        "TODOIST_OUTBOX_DIR": state_dir,
+        "TODOIST_STATE_PATH": os.path.join(state_dir, "state.sqlite3"),
+        "TODOIST_METRICS_LOG_INTERVAL": "0",
+        "PYTHONWARNINGS": "ignore",
+    })
+    env.update(overrides)
+    return env
+
+
+@asynccontextmanager
+async def stdio_session(env: Dict[str, str]) -> AsyncIterator[Tuple[ClientSession, Optional[int]]]:
+    params = StdioServerParameters(command=sys.executable, args=["-m", "src"], env=env, cwd=REPO_ROOT)
+    with open(os.devnull, "w") as errlog:
+        async with stdio_client(params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                yield session, stdio_server_pid()
+
+
+@asynccontextmanager
+async def http_session(env: Dict[str, str]) -> AsyncIterator[Tuple[ClientSession, Optional[int]]]:
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "src.http_server", "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        async with httpx.AsyncClient() as http:
+            while True:
+                try:
+                    if (await http.get(f"{base_url}/metrics")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("HTTP server did not start")
+                await asyncio.sleep(0.1)
+        async with streamablehttp_client(f"{base_url}/mcp") as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                yield session, proc.pid
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+async def call(session: ClientSession, kind: str, name: str, args: Dict[str, Any]) -> None:
+    if kind == "tool":
+        result = await session.call_tool(name, args)
+        if result.isError:
+            raise RuntimeError(result.content[0].text if result.content else "tool error")
+    elif kind == "resource":
+        await session.read_resource(AnyUrl(name))
+    else:
+        await session.get_prompt(name, args)
+
+
+async def measure(session: ClientSession, kind: str, name: str, args: Dict[str, Any],
+                  requests: int, concurrency: int) -> Dict[str, Any]:
+    for _ in range(WARMUP):
+        await call(session, kind, name, args)
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                await call(session, kind, name, args)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "throughput": round(requests / elapsed, 1),
+    }
+
+
+async def run_transport(transport: str, base_url: str, args: argparse.Namespace) -> Dict[str, Any]:
+    open_session = stdio_session if transport == "stdio" else http_session
+    with tempfile.TemporaryDirectory() as state_dir:
+        env = server_env(base_url, state_dir, dict(args.env))
+        async with open_session(env) as (session, pid):
+            operations = {}
+            for kind, name, op_args in OPERATIONS:
+                label = operation_label(kind, name, op_args)
+                if args.operations and not any(part in label for part in args.operations):
+                    continue
+                operations[label] = await measure(session, kind, name, op_args, args.requests, args.concurrency)
+            return {"operations": operations, "memory": memory(pid)}
+
+
+def baseline_key(transport: str, args: argparse.Namespace) -> str:
+    settings = " ".join(f"{name}={value}" for name, value in sorted(args.env))
+    key = (f"{transport} tasks={args.tasks} projects={args.projects} latency={args.latency} "
+           f"concurrency={args.concurrency} rate_limit={args.rate_limit or 'off'}")
+    return f"{key} {settings}".strip()
+
+
+def print_result(transport: str, result: Dict[str, Any]) -> None:
+    print(f"\n{transport}")
+    print(f"{'operation':<34} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'errors':>7}")
+    for label, stats in result["operations"].items():
+        print(f"{label:<34} {stats['p50_ms']:9.2f} {stats['p95_ms']:9.2f} {stats['p99_ms']:9.2f} "
+              f"{stats['throughput']:9.1f} {stats['errors']:7d}")
+    rss = result["memory"]
+    if rss["rss_mb"] is not None:
+        print(f"server memory: {rss['rss_mb']:.1f} MB resident, {rss['peak_rss_mb']:.1f} MB peak")
+
+
+def compare(transport: str, result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+            with_memory: bool) -> List[str]:
+    """Print changes against a baseline and return the regressions"""
+    regressions = []
+    print(f"\n{transport} vs baseline from {baseline['recorded_at']}")
+    print(f"{'operation':<34} {'base p95':>9} {'p95':>9} {'change':>8}")
+    for label, stats in result["operations"].items():
+        before = baseline["operations"].get(label)
+        if before is None:
+            continue
+        change = stats["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        regressed = change > tolerance and stats["p95_ms"] - before["p95_ms"] > MIN_REGRESSION_MS
+        print(f"{label:<34} {before['p95_ms']:9.2f} {stats['p95_ms']:9.2f} {change:+8.0%}"
+              f"{'  REGRESSION' if regressed else ''}")
+        if regressed:
+            regressions.append(f"{transport} {label}: p95 {before['p95_ms']:.2f} -> {stats['p95_ms']:.2f} ms")
+    peak, base_peak = result["memory"]["peak_rss_mb"], baseline["memory"].get("peak_rss_mb")
+    if with_memory and peak is not None and base_peak:
+        change = peak / base_peak - 1
+        print(f"{'server peak memory (MB)':<34} {base_peak:9.1f} {peak:9.1f} {change:+8.0%}")
+        if change > tolerance:
+            regressions.append(f"{transport} peak memory: {base_peak:.1f} -> {peak:.1f} MB")
+    return regressions
+
+
+def load_baselines(path: str) -> Dict[str, Any]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+async def main(args: argparse.Namespace) -> int:
+    transports = ["stdio", "http"] if args.transport == "both" else [args.transport]
+    baselines = load_baselines(args.baseline)
+    regressions: List[str] = []
+
+    print(f"{args.tasks} tasks in {args.projects} projects, {args.latency * 1000:.0f} ms upstream latency, "
+          f"{args.requests} requests per operation at concurrency {args.concurrency}")
+    with fake_server(args) as base_url:
+        for transport in transports:
+            result = await run_transport(transport, base_url, args)
+            print_result(transport, result)
+            key = baseline_key(transport, args)
+            if args.save_baseline:
+                baselines[key] = {
+                    "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    **result,
+                }
+            elif key in baselines:
+                # Peak memory is only comparable when every operation ran
+                regressions += compare(transport, result, baselines[key], args.tolerance, not args.operations)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"- {regression}")
+        return 1
+    return 0
+
+
+def parse_env(value: str) -> Tuple[str, str]:
+    name, _, setting = value.partition("=")
+    if not name or not _:
+        raise argparse.ArgumentTypeError("expected NAME=VALUE")
+    return name, setting
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transport", choices=["stdio", "http", "both"], default="both")
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="upstream latency in seconds")
+    parser.add_argument("--rate-limit", help="fake server limit as requests/seconds, e.g. 450/900")
+    parser.add_argument("--requests", type=int, default=200, help="requests per operation")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--operations", nargs="*", help="only run operations whose label contains one of these")
+    parser.add_argument("--env", type=parse_env, action="append", default=[], metavar="NAME=VALUE",
+                        help="extra server setting, may be repeated")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 growth before a regression")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,172 @@
+"""
+Memory and decode cost of task models versus plain dicts
+
+Builds a synthetic account (50k tasks by default, with labels, due dates,
+descriptions and a handful of collaborators) as a full Sync API response,
+then measures:
+
+- decoding the response body with the standard library and, when it is
+  installed, orjson
+- converting the decoded items into plain REST-shaped dicts (how tasks
+  were held before `models.py`) versus `Task` models
+- memory retained by the resulting task list once the decoded response
+  has been dropped
+
+    python -m benchmarks.bench_models --tasks 50000
+"""
+
+import argparse
+import gc
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List
+
+from src.models import Task
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LABELS = ["work", "home", "errand", "waiting", "deep-work", "email", "call", "someday"]
+DUE_STRINGS = ["today", "tomorrow", "every monday", "every day", "next week", "Oct 27"]
+
+
+def synthetic_account(tasks: int, projects: int = 60, seed: int = 1) -> bytes:
+    """A full sync response for a large account"""
+    rng = random.Random(seed)
+    users = [str(4_000_000 + i) for i in range(5)]
+    project_ids = [str(2_000_000 + i) for i in range(projects)]
+    today = date.today()
+    items = []
+    for i in range(tasks):
+        due = None
+        if rng.random() < 0.6:
+            day = (today + timedelta(days=rng.randint(-30, 60))).isoformat()
+            due = {
+                "date": day if rng.random() < 0.8 else f"{day}T09:00:00",
+                "timezone": None,
+                "string": rng.choice(DUE_STRINGS),
+                "lang": "en",
+                "is_recurring": rng.random() < 0.2,
+            }
+        items.append({
+            "id": str(10_000_000 + i),
+            "v2_id": f"6X{i:010d}",
+            "user_id": users[0],
+            "project_id": rng.choice(project_ids),
+            "section_id": None,
+            "parent_id": None,
+            "content": f"Task {i}: follow up on item {rng.randint(1, 10_000)}",
+            "description": "Notes about this task" if rng.random() < 0.2 else "",
+            "labels": rng.sample(LABELS, rng.randint(0, 2)),
+            "priority": rng.randint(1, 4),
+            "due": due,
+            "duration": None,
+            "child_order": i,
+            "day_order": -1,
+            "collapsed": False,
+            "checked": False,
+            "is_deleted": False,
+            "added_by_uid": rng.choice(users),
+            "assigned_by_uid": None,
+            "responsible_uid": rng.choice(users) if rng.random() < 0.1 else None,
+            "added_at": f"2024-01-01T00:00:{i % 60:02d}.000000Z",
+            "sync_id": None,
+        })
+    return json.dumps({"full_sync": True, "sync_token": "bench", "items": items}).encode()
+
+
+def dict_task(item: Dict[str, Any]) -> Dict[str, Any]:
+    """The plain-dict task shape the replica held before `Task`"""
+    due = item.get("due")
+    if due:
+        due = dict(due)
+        date_value = due.get("date") or ""
+        if "T" in date_value:
+            due["datetime"] = date_value
+            due["date"] = date_value[:10]
+    return {
+        "id": item["id"],
+        "content": item.get("content", ""),
+        "description": item.get("description", ""),
+        "project_id": item.get("project_id"),
+        "section_id": item.get("section_id"),
+        "parent_id": item.get("parent_id"),
+        "labels": item.get("labels", []),
+        "priority": item.get("priority", 1),
+        "due": due,
+        "duration": item.get("duration"),
+        "order": item.get("child_order"),
+        "is_completed": bool(item.get("checked")),
+        "creator_id": item.get("added_by_uid"),
+        "assignee_id": item.get("responsible_uid"),
+        "assigner_id": item.get("assigned_by_uid"),
+        "created_at": item.get("added_at"),
+        "url": f"https://todoist.com/showTask?id={item['id']}",
+    }
+
+
+def timed(fn: Callable[[], Any], rounds: int) -> float:
+    """Median milliseconds per call"""
+    samples = []
+    for _ in range(rounds):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def retained(body: bytes, loads: Callable[[bytes], Any], convert: Callable[[Dict[str, Any]], Any]) -> int:
+    """Bytes still allocated for the converted tasks after the response is dropped"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = loads(body)["items"]
+    tasks: List[Any] = [convert(item) for item in items]
+    del items
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del tasks
+    return size
+
+
+def main(count: int, rounds: int) -> None:
+    body = synthetic_account(count)
+    print(f"{count} tasks, {len(body) / 1e6:.1f} MB response, median of {rounds} rounds")
+
+    decoders = {"json": json.loads}
+    if orjson is not None:
+        decoders["orjson"] = orjson.loads
+    else:
+        print("(orjson not installed; install it to compare)")
+
+    items = json.loads(body)["items"]
+    print(f"\n{'step':<28} {'ms':>10}")
+    for name, loads in decoders.items():
+        print(f"{'decode ' + name:<28} {timed(lambda: loads(body), rounds):10.1f}")
+    print(f"{'convert to dicts':<28} {timed(lambda: [dict_task(i) for i in items], rounds):10.1f}")
+    print(f"{'convert to Task':<28} {timed(lambda: [Task.from_item(i) for i in items], rounds):10.1f}")
+    snapshot = [dict_task(i) for i in items]
+    print(f"{'Task from snapshot dicts':<28} {timed(lambda: [Task.from_dict(t) for t in snapshot], rounds):10.1f}")
+    del items, snapshot
+
+    print(f"\n{'representation':<28} {'retained MB':>12} {'bytes/task':>12}")
+    for name, loads in decoders.items():
+        for label, convert in (("dicts", dict_task), ("Task", Task.from_item)):
+            size = retained(body, loads, convert)
+            print(f"{label + ' (' + name + ')':<28} {size / 1e6:12.1f} {size / count:12.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    main(args.tasks, args.rounds)
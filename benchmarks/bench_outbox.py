@@ -0,0 +1,88 @@
+"""
+Write latency with and without the outbox
+
+Makes a burst of single writes (create a task, then complete a task)
+against a fake Todoist with network latency and reports, for each mode:
+
+- per-write latency as the caller sees it (p50 and p95)
+- time until every write has reached Todoist
+- upstream requests the writes cost
+
+Modes:
+
+- `direct`: each write is a REST call the caller waits for
+- `outbox`: writes are queued on disk, applied locally and flushed in
+  batches in the background
+- `outbox-outage`: as `outbox`, but Todoist answers the first few flushes
+  with 503 (reports whether every write still landed exactly once)
+
+    python -m benchmarks.bench_outbox --writes 50 --latency 0.1
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from typing import List
+
+from src.config import CacheSettings, OutboxSettings, Settings, SnapshotSettings, SyncSettings
+from src.todoist_client import TodoistClient
+
+from .fake_todoist import FakeTodoist, serve
+
+
+def percentile(samples: List[float], q: float) -> float:
+    return statistics.quantiles(samples, n=100)[int(q) - 1] if len(samples) > 1 else samples[0]
+
+
+async def run(name: str, fake: FakeTodoist, base_url: str, writes: int, outbox: bool, outage: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        settings = Settings(
+            api_base_url=base_url,
+            cache=CacheSettings(enabled=False),
+            sync=SyncSettings(refresh_interval=3600),
+            snapshot=SnapshotSettings(enabled=False),
+            outbox=OutboxSettings(enabled=outbox, directory=directory, retry_delay=0.2),
+        )
+        async with TodoistClient("bench-token", settings) as client:
+            await client.get_tasks()
+            inbox = next(iter(fake.projects))
+            before = fake.request_count
+            if outage:
+                fake.fail_next(outage, status=503)
+
+            samples = []
+            start = time.perf_counter()
+            for i in range(writes):
+                began = time.perf_counter()
+                task = await client.create_task(f"{name} task {i}", project_id=inbox)
+                await client.complete_task(task["id"])
+                samples.append((time.perf_counter() - began) * 1000 / 2)
+            if client.outbox is not None:
+                while not await client.outbox.flush():
+                    await asyncio.sleep(0.1)
+            drained = time.perf_counter() - start
+            upstream = fake.request_count - before
+
+    landed = sum(1 for t in fake.tasks.values() if t["content"].startswith(f"{name} task "))
+    print(f"{name:<14} {percentile(samples, 50):8.2f} {percentile(samples, 95):8.2f} "
+          f"{drained * 1000:10.0f} {upstream:9d} {landed:7d}/{writes}")
+
+
+async def main(writes: int, latency: float) -> None:
+    fake = FakeTodoist(projects=5, tasks=200, latency=latency)
+    with serve(fake.app) as base_url:
+        print(f"{writes} creates + {writes} completes, {latency * 1000:.0f} ms upstream latency")
+        print(f"{'mode':<14} {'p50 ms':>8} {'p95 ms':>8} {'drained ms':>10} {'requests':>9} {'created':>10}")
+        await run("direct", fake, base_url, writes, outbox=False, outage=0)
+        await run("outbox", fake, base_url, writes, outbox=True, outage=0)
+        await run("outbox-outage", fake, base_url, writes, outbox=True, outage=5)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writes", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+    asyncio.run(main(args.writes, args.latency))
@@ -0,0 +1,72 @@
+"""
+Latency of the planning and review prompts on a large workspace
+
+Renders each prompt through FastMCP against a replica of a synthetic
+workspace in three states:
+
+- `cold`: a fresh prompt context, so every aggregate and line is built
+- `warm`: nothing changed since the last call (memoized)
+- `changed`: one task was edited since the last call
+
+    python -m benchmarks.bench_prompts --tasks 20000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from mcp.server.fastmcp import FastMCP
+
+from src.config import CacheSettings, Settings, SnapshotSettings, SyncSettings
+from src.prompts.project_prompts import register_project_prompts
+from src.prompts.task_prompts import register_task_prompts
+from src.todoist_client import TodoistClient
+
+from .fake_todoist import FakeTodoist, serve
+
+PROMPTS = ["daily_planning", "weekly_review", "project_review"]
+
+
+async def timed(mcp: FastMCP, name: str) -> float:
+    start = time.perf_counter()
+    await mcp.get_prompt(name, {})
+    return (time.perf_counter() - start) * 1000
+
+
+async def main(tasks: int, rounds: int) -> None:
+    fake = FakeTodoist(projects=30, tasks=tasks)
+    with serve(fake.app) as base_url:
+        settings = Settings(
+            api_base_url=base_url,
+            cache=CacheSettings(enabled=False),
+            # Keep the replica fixed so only our own edits change it
+            sync=SyncSettings(refresh_interval=3600),
+            snapshot=SnapshotSettings(enabled=False),
+        )
+        async with TodoistClient("bench-token", settings) as client:
+            mcp = FastMCP("bench")
+            register_task_prompts(mcp, lambda: client)
+            register_project_prompts(mcp, lambda: client)
+            await client.get_task_store()
+            some_task = client.sync.tasks.values()[0]
+
+            print(f"{'prompt':<16} {'cold':>10} {'warm':>10} {'changed':>10}   (ms, median of {rounds})")
+            for name in PROMPTS:
+                cold, warm, changed = [], [], []
+                for i in range(rounds):
+                    client._prompt_context = None
+                    cold.append(await timed(mcp, name))
+                    warm.append(await timed(mcp, name))
+                    client.sync.upsert_task({**some_task, "content": f"Edited {i}"})
+                    changed.append(await timed(mcp, name))
+                print(f"{name:<16} {statistics.median(cold):10.2f} {statistics.median(warm):10.2f} "
+                      f"{statistics.median(changed):10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.rounds))
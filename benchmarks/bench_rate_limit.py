@@ -0,0 +1,93 @@
+"""
+Request scheduler under rate limiting
+
+Runs against a fake server that enforces its own per-user limit and
+answers 429 with `Retry-After`. Fires a burst of background and
+interactive reads at once and compares:
+
+- naive: no client-side budget and no retries (the old behaviour)
+- scheduled: token bucket matched to the server limit, priority lanes
+  and Retry-After-aware backoff
+
+Retries, lane ordering and 429 pauses are checked by
+`tests/test_rate_limit.py`.
+
+    python -m benchmarks.bench_rate_limit --calls 200 --limit 50
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import List
+
+from src.config import CacheSettings, RateLimitSettings, Settings, SyncSettings
+from src.scheduler import Priority, request_priority
+from src.todoist_client import TodoistClient
+
+from .fake_todoist import FakeTodoist, serve
+
+
+def make_client(base_url: str, rate_limit: RateLimitSettings) -> TodoistClient:
+    return TodoistClient("bench-token", Settings(
+        api_base_url=base_url,
+        cache=CacheSettings(enabled=False),
+        sync=SyncSettings(enabled=False),
+        rate_limit=rate_limit,
+    ))
+
+
+async def burst(client: TodoistClient, calls: int) -> dict:
+    latencies = {Priority.INTERACTIVE: [], Priority.BACKGROUND: []}
+    failures = 0
+
+    async def call(index: int, priority: Priority) -> None:
+        nonlocal failures
+        start = time.perf_counter()
+        with request_priority(priority):
+            try:
+                # Distinct parameters, so identical reads aren't coalesced into one request
+                await client.get_tasks(project_id=str(index))
+            except Exception:
+                failures += 1
+                return
+        latencies[priority].append(time.perf_counter() - start)
+
+    # Background refreshes are queued first; interactive calls arrive just after
+    lanes: List[Priority] = [Priority.BACKGROUND] * (calls * 3 // 4) + [Priority.INTERACTIVE] * (calls // 4)
+    start = time.perf_counter()
+    await asyncio.gather(*(call(index, priority) for index, priority in enumerate(lanes)))
+    return {"elapsed": time.perf_counter() - start, "failures": failures, "latencies": latencies}
+
+
+def report(name: str, result: dict) -> None:
+    def mean(values: List[float]) -> str:
+        return f"{sum(values) / len(values) * 1000:8.1f} ms" if values else "       n/a"
+    latencies = result["latencies"]
+    print(f"{name:<10} failures {result['failures']:4d}   "
+          f"interactive {mean(latencies[Priority.INTERACTIVE])}   "
+          f"background {mean(latencies[Priority.BACKGROUND])}   "
+          f"elapsed {result['elapsed']:.2f}s")
+
+
+async def main(calls: int, limit: int) -> int:
+    fake = FakeTodoist(projects=5, tasks=0, rate_limit=(limit, 1.0))
+    with serve(fake.app) as base_url:
+        async with make_client(base_url, RateLimitSettings(enabled=False, max_retries=0)) as client:
+            report("naive", await burst(client, calls))
+        await asyncio.sleep(1.0)
+
+        scheduled = RateLimitSettings(requests=limit, period=1.0, burst=limit // 5, max_delay=5.0)
+        async with make_client(base_url, scheduled) as client:
+            result = await burst(client, calls)
+            report("scheduled", result)
+            print(f"           retries {client.scheduler.retries}, throttled {client.scheduler.throttled}")
+    return 0 if result["failures"] == 0 else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=50, help="server-side requests per second")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.calls, args.limit)))
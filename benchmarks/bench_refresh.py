@@ -0,0 +1,76 @@
+"""
+Read latency with and without background refresh
+
+Simulates an agent that reads the task and project lists every
+`--think` seconds for `--duration` seconds, against a fake Todoist with
+upstream latency and short refresh intervals / TTLs so data goes stale
+several times during the run. Reports read latency (p50, p95, max), how
+many reads waited on Todoist, and the upstream requests made, for:
+
+- `sync`: the replica, synced when a read finds it stale
+- `sync+refresh`: synced ahead of time in the background, and served
+  while it catches up when a read finds it stale
+- `cache` / `cache+refresh`: the same with the REST read-through cache
+
+    python -m benchmarks.bench_refresh --duration 10 --latency 0.1
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from src.config import CacheSettings, RefreshSettings, Settings, SnapshotSettings, SyncSettings
+from src.todoist_client import TodoistClient
+
+from .fake_todoist import FakeTodoist, serve
+
+
+async def run(name: str, fake: FakeTodoist, base_url: str, sync: bool, refresh: bool,
+              duration: float, think: float, interval: float, latency: float) -> None:
+    settings = Settings(
+        api_base_url=base_url,
+        cache=CacheSettings(enabled=not sync, tasks_ttl=interval, projects_ttl=interval),
+        sync=SyncSettings(enabled=sync, refresh_interval=interval),
+        snapshot=SnapshotSettings(enabled=False),
+        refresh=RefreshSettings(enabled=refresh),
+    )
+    async with TodoistClient("bench-token", settings) as client:
+        await client.gather(client.get_tasks(), client.get_projects())
+        before = fake.request_count
+        samples: List[float] = []
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            await client.gather(client.get_tasks(), client.get_projects())
+            samples.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(think)
+        upstream = fake.request_count - before
+
+    samples.sort()
+    waited = sum(1 for sample in samples if sample >= latency * 1000 / 2)
+    print(f"{name:<14} {statistics.median(samples):8.2f} {samples[int(len(samples) * 0.95) - 1]:8.2f} "
+          f"{samples[-1]:8.2f} {waited:5d}/{len(samples):<5d} {upstream:9d}")
+
+
+async def main(duration: float, think: float, interval: float, latency: float) -> None:
+    fake = FakeTodoist(projects=10, tasks=2000, latency=latency)
+    with serve(fake.app) as base_url:
+        print(f"reads every {think}s for {duration}s, {interval}s refresh interval/TTL, "
+              f"{latency * 1000:.0f} ms upstream latency")
+        print(f"{'mode':<14} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'waited':>11} {'requests':>9}")
+        for sync in (True, False):
+            for refresh in (False, True):
+                name = ("sync" if sync else "cache") + ("+refresh" if refresh else "")
+                await run(name, fake, base_url, sync, refresh, duration, think, interval, latency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--think", type=float, default=0.25, help="seconds between reads")
+    parser.add_argument("--interval", type=float, default=2.0, help="replica refresh interval and cache TTL")
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+    asyncio.run(main(args.duration, args.think, args.interval, args.latency))
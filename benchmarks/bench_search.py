@@ -0,0 +1,103 @@
+"""
+Task search through the index versus dumping the task list
+
+Fills a fake Todoist workspace with tasks made of random words, then
+compares, for the same queries:
+
+- `search_tasks`: ranked IDs and snippets from the search index (one build
+  when first used, then kept up to date as tasks change)
+- `get_tasks` + scan: what an agent does without search, reading every task
+  and matching words itself
+
+Reports index build time, per-query latency (p50, p95) and the size of what
+each approach hands back to the model.
+
+    python -m benchmarks.bench_search --tasks 20000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import List
+
+from src.config import CacheSettings, Settings, SnapshotSettings, SyncSettings
+from src.todoist_client import TodoistClient
+
+from .fake_todoist import FakeTodoist, serve
+
+SYLLABLES = ["ka", "lo", "mi", "ter", "pan", "dro", "vel", "sun", "ghi", "cor",
+             "bit", "ne", "ra", "sto", "ple", "qua", "fen", "dus", "win", "ox"]
+
+
+def percentile(samples: List[float], q: float) -> float:
+    return statistics.quantiles(samples, n=100)[int(q) - 1] if len(samples) > 1 else samples[0]
+
+
+def fill(fake: FakeTodoist, rng: random.Random) -> List[str]:
+    """Give every task random-word content and some a description; returns the vocabulary"""
+    vocabulary = sorted({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))) for _ in range(30000)})
+    rng.shuffle(vocabulary)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    for index, task in enumerate(fake.tasks.values()):
+        task["content"] = " ".join(rng.choices(vocabulary, weights, k=6))
+        task["description"] = " ".join(rng.choices(vocabulary, weights, k=20)) if index % 3 == 0 else ""
+    return vocabulary
+
+
+def queries(vocabulary: List[str], rng: random.Random, count: int) -> List[str]:
+    common = vocabulary[:5000]
+    kinds = [
+        lambda: rng.choice(common),
+        lambda: rng.choice(common)[:4],
+        lambda: rng.choice(common)[:-1] + "z",
+        lambda: f"{rng.choice(common)} {rng.choice(common)}",
+    ]
+    return [kinds[i % len(kinds)]() for i in range(count)]
+
+
+async def main(tasks: int, count: int) -> None:
+    rng = random.Random(0)
+    fake = FakeTodoist(projects=30, tasks=tasks)
+    vocabulary = fill(fake, rng)
+    with serve(fake.app) as base_url:
+        settings = Settings(api_base_url=base_url, cache=CacheSettings(enabled=False),
+                            sync=SyncSettings(refresh_interval=3600), snapshot=SnapshotSettings(enabled=False))
+        async with TodoistClient("bench-token", settings) as client:
+            await client.get_tasks()
+            start = time.perf_counter()
+            await client.search_tasks("warmup")
+            print(f"{len(client.search_index)} tasks, index built in {(time.perf_counter() - start) * 1000:.0f} ms, "
+                  f"{len(client.search_index.terms)} terms")
+
+            print(f"{'approach':<18} {'p50 ms':>8} {'p95 ms':>8} {'bytes':>10}")
+            search_samples, search_bytes = [], []
+            scan_samples, scan_bytes = [], []
+            for query in queries(vocabulary, rng, count):
+                start = time.perf_counter()
+                result = await client.search_tasks(query)
+                search_samples.append((time.perf_counter() - start) * 1000)
+                search_bytes.append(len(json.dumps(result)))
+
+                start = time.perf_counter()
+                listed = await client.get_tasks()
+                words = query.split()
+                [task["id"] for task in listed
+                 if any(word in task["content"] or word in task["description"] for word in words)]
+                scan_samples.append((time.perf_counter() - start) * 1000)
+                scan_bytes.append(len(json.dumps(listed)))
+
+            for name, samples, sizes in (("search_tasks", search_samples, search_bytes),
+                                         ("get_tasks + scan", scan_samples, scan_bytes)):
+                print(f"{name:<18} {percentile(samples, 50):8.3f} {percentile(samples, 95):8.3f} "
+                      f"{statistics.mean(sizes):10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.queries))
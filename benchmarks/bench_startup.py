@@ -0,0 +1,110 @@
+"""
+Server startup time
+
+Spawns the stdio server the way an editor does and measures the time until
+it answers `initialize`, then until the first `tools/list` (which builds the
+deferred tool schemas). Also reports the slowest top-level imports from
+`python -X importtime`.
+
+No network access is needed: the Todoist client is never asked to make a
+request.
+
+    python -m benchmarks.bench_startup --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+REQUESTS = [
+    {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {
+        "protocolVersion": "2025-03-26",
+        "capabilities": {},
+        "clientInfo": {"name": "bench_startup", "version": "0"},
+    }},
+    {"jsonrpc": "2.0", "method": "notifications/initialized"},
+    {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+]
+
+
+def server_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("TODOIST_API_TOKEN", "bench-token")
+    env["PYTHONWARNINGS"] = "ignore"
+    return env
+
+
+def time_handshake() -> Tuple[float, float, int]:
+    """Seconds to the initialize response and to the tools/list response"""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "src"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        env=server_env(),
+    )
+    try:
+        proc.stdin.write((json.dumps(REQUESTS[0]) + "\n").encode())
+        proc.stdin.flush()
+        json.loads(proc.stdout.readline())
+        initialized = time.perf_counter() - start
+
+        for request in REQUESTS[1:]:
+            proc.stdin.write((json.dumps(request) + "\n").encode())
+        proc.stdin.flush()
+        tools = json.loads(proc.stdout.readline())["result"]["tools"]
+        listed = time.perf_counter() - start
+    finally:
+        proc.kill()
+        proc.wait()
+    return initialized, listed, len(tools)
+
+
+def slowest_imports(limit: int) -> List[Tuple[int, str]]:
+    """Modules imported directly by `src.server`, by cumulative time in microseconds"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.server"],
+        capture_output=True, text=True, env=server_env(),
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # importtime indents each nesting level by two spaces
+        if name.startswith("   ") and not name.startswith("    "):
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:limit]
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main(runs: int) -> None:
+    print("slowest imports made by src.server:")
+    for cumulative, name in slowest_imports(8):
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    initialized, listed = [], []
+    for _ in range(runs):
+        init_time, list_time, tool_count = time_handshake()
+        initialized.append(init_time)
+        listed.append(list_time)
+
+    print(f"\n{runs} cold starts ({tool_count} tools)")
+    for name, samples in (("initialize", initialized), ("tools/list", listed)):
+        print(f"  {name:<11} p50 {statistics.median(samples) * 1000:7.1f} ms"
+              f"   p90 {percentile(samples, 0.9) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    main(args.runs)
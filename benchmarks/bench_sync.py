@@ -0,0 +1,59 @@
+"""
+Full REST reads versus the incremental sync replica
+
+Reads the whole task list repeatedly while a trickle of writes happens,
+once with the sync engine disabled (full `/tasks` downloads) and once with
+it enabled (incremental `sync_token` deltas).
+
+    python -m benchmarks.bench_sync --tasks 5000 --reads 50
+"""
+
+import argparse
+import asyncio
+import time
+
+from src.config import CacheSettings, Settings, SnapshotSettings, SyncSettings
+from src.todoist_client import TodoistClient
+
+from .fake_todoist import FakeTodoist, serve
+
+
+async def run(base_url: str, fake: FakeTodoist, sync: bool, reads: int) -> None:
+    settings = Settings(
+        api_base_url=base_url,
+        cache=CacheSettings(enabled=False),
+        sync=SyncSettings(enabled=sync, refresh_interval=0),
+        snapshot=SnapshotSettings(enabled=False),
+    )
+    received = 0
+    async with TodoistClient("bench-token", settings) as client:
+        # Count response bytes on the wire
+        async def count(response):
+            nonlocal received
+            await response.aread()
+            received += len(response.content)
+        client._transport().event_hooks["response"].append(count)
+
+        start = time.perf_counter()
+        for i in range(reads):
+            await client.get_tasks()
+            fake._new_task(content=f"New task {i}", project_id=next(iter(fake.projects)))
+        elapsed = time.perf_counter() - start
+
+    name = "sync" if sync else "rest"
+    print(f"{name:<5} {elapsed / reads * 1000:8.2f} ms/read   {received / reads / 1024:10.1f} KiB/read")
+
+
+async def main(tasks: int, reads: int) -> None:
+    fake = FakeTodoist(projects=20, tasks=tasks)
+    with serve(fake.app) as base_url:
+        await run(base_url, fake, sync=False, reads=reads)
+        await run(base_url, fake, sync=True, reads=reads)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--reads", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.reads))
@@ -0,0 +1,81 @@
+"""
+Per-call latency and throughput of the pooled transport
+
+Compares the previous behaviour (a fresh `httpx.AsyncClient`, and therefore
+a fresh connection, for every call) with the shared pooled client, against
+the local fake server.
+
+    python -m benchmarks.bench_transport --calls 500 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+import httpx
+
+from src.config import CacheSettings, Settings, SyncSettings
+from src.todoist_client import TodoistClient
+
+from .fake_todoist import FakeTodoist, serve
+
+
+async def legacy_get_projects(client: TodoistClient) -> None:
+    """What every client method used to do: one AsyncClient per call"""
+    async with httpx.AsyncClient() as http:
+        response = await http.get(f"{client.base_url}/projects", headers=client.headers)
+        response.raise_for_status()
+        response.json()
+
+
+async def pooled_get_projects(client: TodoistClient) -> None:
+    await client.get_projects()
+
+
+async def run(call: Callable[[TodoistClient], Awaitable[None]], client: TodoistClient,
+              calls: int, concurrency: int) -> List[float]:
+    latencies: List[float] = []
+    queue = iter(range(calls))
+
+    async def worker() -> None:
+        for _ in queue:
+            start = time.perf_counter()
+            await call(client)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def report(name: str, latencies: List[float], elapsed: float) -> None:
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<8} mean {statistics.mean(latencies) * 1000:7.2f} ms   "
+          f"p95 {p95 * 1000:7.2f} ms   {len(latencies) / elapsed:8.1f} calls/s")
+
+
+async def main(calls: int, concurrency: int) -> None:
+    fake = FakeTodoist(projects=20, tasks=0)
+    with serve(fake.app) as base_url:
+        # Measure the transport itself, not the cache or sync replica
+        settings = Settings(
+            api_base_url=base_url,
+            cache=CacheSettings(enabled=False),
+            sync=SyncSettings(enabled=False),
+        )
+        async with TodoistClient("bench-token", settings) as client:
+            for name, call in (("legacy", legacy_get_projects), ("pooled", pooled_get_projects)):
+                await run(call, client, min(calls, 20), concurrency)  # warm up
+                start = time.perf_counter()
+                latencies = await run(call, client, calls, concurrency)
+                report(name, latencies, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.concurrency))
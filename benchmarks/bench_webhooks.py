@@ -0,0 +1,82 @@
+"""
+Freshness and upstream cost of polling versus webhook-driven updates
+
+Interleaves writes (made directly in the fake workspace, as if from another
+device) with reads of the task list, and reports how many upstream requests
+each read cost and how many reads missed the latest write:
+
+- `poll-0`: the replica syncs before every read (always fresh)
+- `poll-10s`: the default refresh interval (cheap, but reads go stale)
+- `webhook`: writes arrive as signed webhook events through the receiver
+  (its time per read includes delivering the event)
+
+    python -m benchmarks.bench_webhooks --tasks 2000 --reads 100
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+from src.config import CacheSettings, Settings, SnapshotSettings, SyncSettings
+from src.todoist_client import TodoistClient
+from src.webhooks import WebhookReceiver
+
+from .fake_todoist import FakeTodoist, serve
+from .webhook_replay import replay
+
+SECRET = "bench-secret"
+
+
+async def run(name: str, fake: FakeTodoist, base_url: str, refresh_interval: float,
+              webhooks: bool, reads: int) -> None:
+    settings = Settings(
+        api_base_url=base_url,
+        cache=CacheSettings(enabled=False),
+        sync=SyncSettings(refresh_interval=refresh_interval, push_refresh_interval=300),
+        snapshot=SnapshotSettings(enabled=False),
+    )
+    async with TodoistClient("bench-token", settings) as client:
+        receiver = WebhookReceiver(SECRET, lambda: [client])
+        app = Starlette(routes=[Route("/webhooks/todoist", receiver.endpoint, methods=["POST"])])
+        # Warm the replica so every mode starts from the same state
+        await client.get_tasks()
+        inbox = next(iter(fake.projects))
+
+        with serve(app) as hook_url:
+            async with httpx.AsyncClient() as http:
+                before = fake.request_count
+                stale = 0
+                start = time.perf_counter()
+                for i in range(reads):
+                    delivered = len(fake.events)
+                    task = fake._new_task(content=f"Remote task {i}", project_id=inbox)
+                    if webhooks:
+                        await replay(http, f"{hook_url}/webhooks/todoist", SECRET, fake.events[delivered:])
+                    tasks = await client.get_tasks(project_id=inbox)
+                    if not any(t["id"] == task["id"] for t in tasks):
+                        stale += 1
+                elapsed = time.perf_counter() - start
+                upstream = fake.request_count - before
+
+    print(f"{name:<9} {elapsed / reads * 1000:8.2f} ms/read   "
+          f"{upstream / reads:5.2f} upstream requests/read   {stale:4d}/{reads} stale reads")
+
+
+async def main(tasks: int, reads: int) -> None:
+    fake = FakeTodoist(projects=10, tasks=tasks)
+    with serve(fake.app) as base_url:
+        await run("poll-0", fake, base_url, 0, webhooks=False, reads=reads)
+        await run("poll-10s", fake, base_url, 10, webhooks=False, reads=reads)
+        await run("webhook", fake, base_url, 10, webhooks=True, reads=reads)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.reads))
@@ -0,0 +1,453 @@
+"""
+Local fake Todoist API server
+
+Serves a synthetic workspace over the same REST and Sync endpoints
+`TodoistClient` uses, so benchmarks can run without touching the real API.
+Point the client at it with `Settings(api_base_url=...)` or
+`TODOIST_API_BASE_URL`.
+
+Faults can be injected with `fail_next()` (queued error responses) or
+`rate_limit=(requests, seconds)` (a sliding-window limiter that answers
+429 with `Retry-After`, like the real API).
+
+Every change made after construction is also recorded in `events` as the
+webhook event Todoist would deliver (`item:added`, `item:completed`, ...),
+ready to be sent to a receiver with `benchmarks.webhook_replay`.
+
+`completed` tasks are generated as completion history over the past eight
+weeks and served, along with tasks closed later, by the Sync API's
+completed-task endpoint.
+
+Gzipped request bodies (`Content-Encoding: gzip`) are accepted, and
+`received_bytes` counts request body bytes as sent.
+
+It can also run on its own, for pointing a server started by hand (or
+`bench_mcp`) at it; the base URL is printed on the first line:
+
+    python -m benchmarks.fake_todoist --tasks 5000 --latency 0.05 --rate-limit 450/900
+"""
+
+import argparse
+import asyncio
+import bisect
+import gzip
+import itertools
+import json
+import random
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+
+class FakeTodoist:
+    """In-memory Todoist workspace exposed as a Starlette app"""
+
+    def __init__(
+        self,
+        projects: int = 5,
+        tasks: int = 100,
+        latency: float = 0.0,
+        seed: int = 0,
+        rate_limit: Optional[Tuple[int, float]] = None,
+        completed: int = 0
+    ):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.request_count = 0
+        self.rejected_count = 0
+        self.received_bytes = 0
+        # The account's user, named in webhook events and the Sync `user` resource
+        self.user_id = "1"
+        self._faults: Deque[Tuple[int, Optional[float]]] = deque()
+        self._recent: Deque[float] = deque()
+        self.version = 0
+        self._changes: List[Tuple[int, str, str]] = []
+        self.events: List[Dict[str, Any]] = []
+        self._recording = False
+        self._ids = itertools.count(1_000_000)
+        # Commands already run, by uuid, so a retried command isn't applied twice
+        self._commands: Dict[str, Tuple[Any, Optional[str], Optional[str]]] = {}
+        rng = random.Random(seed)
+
+        self.projects: Dict[str, Dict[str, Any]] = {}
+        for i in range(projects):
+            project_id = str(next(self._ids))
+            self.projects[project_id] = {
+                "id": project_id,
+                "name": "Inbox" if i == 0 else f"Project {i}",
+                "color": "grey",
+                "is_inbox_project": i == 0,
+            }
+            self._touch("projects", project_id)
+
+        project_ids = list(self.projects)
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        for i in range(tasks):
+            task = self._new_task(
+                content=f"Task {i}",
+                project_id=rng.choice(project_ids),
+                priority=rng.randint(1, 4),
+                labels=rng.sample(["home", "work", "errand", "deep"], rng.randint(0, 2)),
+            )
+            if rng.random() < 0.5:
+                day = date.today() + timedelta(days=rng.randint(-7, 21))
+                task["due"] = {"string": day.strftime("%b %d"), "date": day.isoformat(), "is_recurring": False}
+
+        # Completion history, from its own generator so the tasks above don't
+        # depend on how much history there is
+        history = random.Random(seed + 1)
+        self.completed: List[Dict[str, Any]] = []
+        now = time.time()
+        for i in range(completed):
+            task = {"id": str(next(self._ids)), "content": f"Done {i}", "project_id": history.choice(project_ids)}
+            self._record_completion(task, now - history.uniform(0, 56 * 86400))
+        self._recording = True
+
+        self.app = Starlette(routes=[
+            Route("/rest/v2/tasks", self.list_tasks, methods=["GET"]),
+            Route("/rest/v2/tasks", self.add_task, methods=["POST"]),
+            Route("/rest/v2/tasks/{task_id}/close", self.close_task, methods=["POST"]),
+            Route("/rest/v2/projects", self.list_projects, methods=["GET"]),
+            Route("/rest/v2/projects", self.add_project, methods=["POST"]),
+            Route("/sync/v9/sync", self.sync, methods=["POST"]),
+            Route("/sync/v9/completed/get_all", self.completed_tasks, methods=["GET"]),
+        ], middleware=[Middleware(BaseHTTPMiddleware, dispatch=self._inject_faults)])
+
+    def fail_next(self, count: int = 1, status: int = 429, retry_after: Optional[float] = None) -> None:
+        """Answer the next `count` requests with an error status"""
+        self._faults.extend([(status, retry_after)] * count)
+
+    async def _inject_faults(self, request: Request, call_next: Any) -> Response:
+        if self._faults:
+            status, retry_after = self._faults.popleft()
+            return self._reject(status, retry_after)
+        if self.rate_limit:
+            limit, window = self.rate_limit
+            now = time.monotonic()
+            while self._recent and self._recent[0] <= now - window:
+                self._recent.popleft()
+            if len(self._recent) >= limit:
+                return self._reject(429, self._recent[0] + window - now)
+            self._recent.append(now)
+        return await call_next(request)
+
+    def _reject(self, status: int, retry_after: Optional[float]) -> Response:
+        self.rejected_count += 1
+        headers = {"Retry-After": f"{retry_after:.3f}"} if retry_after is not None else {}
+        return JSONResponse({"error": "Too many requests" if status == 429 else "Server error"},
+                            status_code=status, headers=headers)
+
+    def _touch(self, kind: str, object_id: str, action: str = "updated") -> None:
+        """Record a change so incremental syncs pick it up, and its webhook event"""
+        self.version += 1
+        self._changes.append((self.version, kind, object_id))
+        if not self._recording:
+            return
+        if kind == "items":
+            task = self.tasks[object_id]
+            if task["is_completed"] and action == "updated":
+                action = "completed"
+            name, data = f"item:{action}", self._sync_item(task)
+        else:
+            name, data = f"project:{action}", self._sync_project(self.projects[object_id])
+        self.events.append({
+            "event_name": name,
+            "user_id": self.user_id,
+            "event_data": data,
+            "initiator": {"id": "1"},
+            "version": "9",
+        })
+
+    def _new_task(self, content: str, project_id: str, priority: int = 1,
+                  labels: Optional[List[str]] = None) -> Dict[str, Any]:
+        task_id = str(next(self._ids))
+        task = {
+            "id": task_id,
+            "content": content,
+            "description": "",
+            "project_id": project_id,
+            "section_id": None,
+            "parent_id": None,
+            "labels": labels or [],
+            "priority": priority,
+            "due": None,
+            "is_completed": False,
+        }
+        self.tasks[task_id] = task
+        self._touch("items", task_id, "added")
+        return task
+
+    def _record_completion(self, task: Dict[str, Any], at: Optional[float] = None) -> None:
+        completed_at = datetime.fromtimestamp(time.time() if at is None else at, timezone.utc)
+        self.completed.append({
+            "id": str(next(self._ids)),
+            "task_id": task["id"],
+            "content": task["content"],
+            "project_id": task["project_id"],
+            "completed_at": completed_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        })
+
+    async def _json(self, request: Request) -> Any:
+        """Decode a JSON request body, gzipped or not"""
+        body = await request.body()
+        self.received_bytes += len(body)
+        if request.headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+        return json.loads(body)
+
+    async def _simulate(self) -> None:
+        self.request_count += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _matches_filter(self, task: Dict[str, Any], query: str) -> bool:
+        """A small subset of Todoist filters: `@label`, `p1`-`p4` and `#Project`, joined by `&`"""
+        for term in (t.strip() for t in query.split("&")):
+            if term.startswith("@"):
+                if term[1:] not in task["labels"]:
+                    return False
+            elif len(term) == 2 and term[0] == "p" and term[1] in "1234":
+                # Filter p1 is the API's priority 4
+                if task["priority"] != 5 - int(term[1]):
+                    return False
+            elif term.startswith("#"):
+                if self.projects[task["project_id"]]["name"].lower() != term[1:].lower():
+                    return False
+        return True
+
+    async def list_tasks(self, request: Request) -> Response:
+        await self._simulate()
+        project_id = request.query_params.get("project_id")
+        query = request.query_params.get("filter")
+        tasks = [t for t in self.tasks.values()
+                 if not t["is_completed"] and (not project_id or t["project_id"] == project_id)
+                 and (not query or self._matches_filter(t, query))]
+        return JSONResponse(tasks)
+
+    async def add_task(self, request: Request) -> Response:
+        await self._simulate()
+        body = await self._json(request)
+        inbox = next(iter(self.projects))
+        task = self._new_task(
+            content=body["content"],
+            project_id=body.get("project_id", inbox),
+            priority=body.get("priority", 1),
+            labels=body.get("labels"),
+        )
+        if body.get("due_string"):
+            task["due"] = {"string": body["due_string"], "date": None, "is_recurring": False}
+            self._touch("items", task["id"])
+        return JSONResponse(task)
+
+    async def close_task(self, request: Request) -> Response:
+        await self._simulate()
+        task = self.tasks.get(request.path_params["task_id"])
+        if task is None:
+            return JSONResponse({"error": "Task not found"}, status_code=404)
+        task["is_completed"] = True
+        self._record_completion(task)
+        self._touch("items", task["id"])
+        return Response(status_code=204)
+
+    async def list_projects(self, request: Request) -> Response:
+        await self._simulate()
+        return JSONResponse(list(self.projects.values()))
+
+    async def add_project(self, request: Request) -> Response:
+        await self._simulate()
+        body = await self._json(request)
+        project_id = str(next(self._ids))
+        project = {"id": project_id, "name": body["name"],
+                   "color": body.get("color", "grey"), "is_inbox_project": False}
+        self.projects[project_id] = project
+        self._touch("projects", project_id, "added")
+        return JSONResponse(project)
+
+    @staticmethod
+    def _sync_item(task: Dict[str, Any]) -> Dict[str, Any]:
+        item = {k: v for k, v in task.items() if k != "is_completed"}
+        item["checked"] = task["is_completed"]
+        item["is_deleted"] = False
+        return item
+
+    @staticmethod
+    def _sync_project(project: Dict[str, Any]) -> Dict[str, Any]:
+        synced = {k: v for k, v in project.items() if k != "is_inbox_project"}
+        synced["inbox_project"] = project["is_inbox_project"]
+        synced["is_deleted"] = False
+        synced["is_archived"] = False
+        return synced
+
+    def _run_command(self, command: Dict[str, Any], temp_id_mapping: Dict[str, str]) -> Any:
+        if command.get("uuid") in self._commands:
+            status, temp_id, object_id = self._commands[command["uuid"]]
+            if temp_id:
+                temp_id_mapping[temp_id] = object_id
+            return status
+        status = self._apply_command(command, temp_id_mapping)
+        temp_id = command.get("temp_id")
+        self._commands[command.get("uuid")] = (status, temp_id, temp_id_mapping.get(temp_id))
+        return status
+
+    def _apply_command(self, command: Dict[str, Any], temp_id_mapping: Dict[str, str]) -> Any:
+        args = {k: temp_id_mapping.get(v, v) if k.endswith("id") else v
+                for k, v in command.get("args", {}).items()}
+        kind = command.get("type")
+        if kind == "project_add":
+            if not args.get("name"):
+                return {"error_code": 20, "error": "Argument name is missing"}
+            project_id = str(next(self._ids))
+            self.projects[project_id] = {"id": project_id, "name": args["name"],
+                                         "color": args.get("color", "grey"), "is_inbox_project": False}
+            self._touch("projects", project_id, "added")
+            if command.get("temp_id"):
+                temp_id_mapping[command["temp_id"]] = project_id
+            return "ok"
+        if kind == "item_add":
+            if not args.get("content"):
+                return {"error_code": 20, "error": "Argument content is missing"}
+            task = self._new_task(
+                content=args["content"],
+                project_id=args.get("project_id") or next(iter(self.projects)),
+                priority=args.get("priority", 1),
+                labels=args.get("labels"),
+            )
+            task["parent_id"] = args.get("parent_id")
+            task["description"] = args.get("description", "")
+            if args.get("due"):
+                task["due"] = {"string": args["due"]["string"], "date": None, "is_recurring": False}
+            if command.get("temp_id"):
+                temp_id_mapping[command["temp_id"]] = task["id"]
+            return "ok"
+        task = self.tasks.get(args.get("id"))
+        if task is None:
+            return {"error_code": 22, "error": "Item not found"}
+        if kind == "item_close":
+            task["is_completed"] = True
+            self._record_completion(task)
+        elif kind == "item_update":
+            task.update({k: v for k, v in args.items() if k in task and k != "id"})
+        elif kind == "item_move":
+            task.update({k: v for k, v in args.items() if k != "id"})
+        else:
+            return {"error_code": 1, "error": f"Unknown command {kind}"}
+        self._touch("items", task["id"])
+        return "ok"
+
+    async def sync(self, request: Request) -> Response:
+        await self._simulate()
+        body = await self._json(request)
+        if "commands" in body:
+            temp_id_mapping: Dict[str, str] = {}
+            sync_status = {command["uuid"]: self._run_command(command, temp_id_mapping)
+                           for command in body["commands"]}
+            if "sync_token" not in body:
+                return JSONResponse({"sync_status": sync_status, "temp_id_mapping": temp_id_mapping})
+        token = body.get("sync_token", "*")
+        if token == "*":
+            items = [self._sync_item(t) for t in self.tasks.values() if not t["is_completed"]]
+            projects = [self._sync_project(p) for p in self.projects.values()]
+        else:
+            start = bisect.bisect_right(self._changes, (int(token), "", ""))
+            changed = {(kind, object_id) for _, kind, object_id in self._changes[start:]}
+            items = [self._sync_item(self.tasks[i]) for kind, i in changed if kind == "items"]
+            projects = [self._sync_project(self.projects[i]) for kind, i in changed if kind == "projects"]
+        response = {"sync_status": sync_status, "temp_id_mapping": temp_id_mapping} if "commands" in body else {}
+        resources = {
+            "items": items,
+            "projects": projects,
+            "labels": [],
+            "sections": [],
+            "user": {"id": self.user_id, "full_name": "Fake User"},
+        }
+        types = body.get("resource_types")
+        return JSONResponse({
+            **response,
+            "sync_token": str(self.version),
+            "full_sync": token == "*",
+            **{kind: value for kind, value in resources.items() if types is None or kind in types},
+        })
+
+    async def completed_tasks(self, request: Request) -> Response:
+        """Completed tasks between `since` and `until`, newest first, paged by `limit` and `offset`"""
+        await self._simulate()
+        params = request.query_params
+        # Timestamps are the same UTC format throughout, so they compare as strings
+        since, until = params.get("since") or "", params.get("until") or "9999"
+        limit = min(int(params.get("limit", 30)), 200)
+        offset = int(params.get("offset", 0))
+        items = sorted((item for item in self.completed if since <= item["completed_at"] < until),
+                       key=lambda item: item["completed_at"], reverse=True)
+        return JSONResponse({"items": items[offset:offset + limit], "projects": {}})
+
+
+@contextmanager
+def serve(app: Any, host: str = "127.0.0.1", lifespan: str = "off") -> Iterator[str]:
+    """Run an ASGI app with uvicorn in a background thread, yielding its base URL"""
+    sock = socket.socket()
+    # Accepted connections inherit this; avoids Nagle/delayed-ACK stalls
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.bind((host, 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", lifespan=lifespan))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+        sock.close()
+
+
+def parse_rate_limit(value: Optional[str]) -> Optional[Tuple[int, float]]:
+    """`"450/900"` as 450 requests per 900 seconds"""
+    if not value:
+        return None
+    requests, seconds = value.split("/")
+    return int(requests), float(seconds)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Local fake Todoist API server")
+    parser.add_argument("--projects", type=int, default=5)
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--rate-limit", help="requests/seconds before answering 429, e.g. 450/900")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--completed", type=int, default=0, help="completed tasks in the history")
+    args = parser.parse_args(argv)
+
+    fake = FakeTodoist(
+        projects=args.projects,
+        tasks=args.tasks,
+        latency=args.latency,
+        seed=args.seed,
+        rate_limit=parse_rate_limit(args.rate_limit),
+        completed=args.completed,
+    )
+    with serve(fake.app, host=args.host) as base_url:
+        print(base_url, flush=True)
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
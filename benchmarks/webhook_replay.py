@@ -0,0 +1,61 @@
+"""
+Replay Todoist webhook events against a local receiver
+
+Signs each event the way Todoist does and POSTs it to the receiver, for
+testing the webhook route without registering a public URL. Events come
+from a JSON-lines file (one Todoist webhook payload per line) or from a
+`FakeTodoist`'s recorded `events`.
+
+    python -m benchmarks.webhook_replay http://127.0.0.1:8000/webhooks/todoist \\
+        --secret "$TODOIST_WEBHOOK_SECRET" events.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import uuid
+from typing import Any, Dict, Iterable, List
+
+import httpx
+
+from src.webhooks import DELIVERY_HEADER, SIGNATURE_HEADER, sign
+
+
+async def replay(
+    client: httpx.AsyncClient,
+    url: str,
+    secret: str,
+    events: Iterable[Dict[str, Any]],
+    delay: float = 0.0
+) -> List[httpx.Response]:
+    """POST each event in order, signed with `secret`; returns the responses"""
+    responses = []
+    for event in events:
+        body = json.dumps(event).encode()
+        responses.append(await client.post(url, content=body, headers={
+            "Content-Type": "application/json",
+            SIGNATURE_HEADER: sign(secret, body),
+            DELIVERY_HEADER: str(uuid.uuid4()),
+            "User-Agent": "Todoist-Webhooks",
+        }))
+        if delay:
+            await asyncio.sleep(delay)
+    return responses
+
+
+async def main(url: str, secret: str, path: str, delay: float) -> None:
+    with open(path) as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    async with httpx.AsyncClient() as client:
+        for event, response in zip(events, await replay(client, url, secret, events, delay)):
+            print(f"{event.get('event_name', '?'):<20} {response.status_code} {response.text}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("url")
+    parser.add_argument("events", help="JSON-lines file of webhook payloads")
+    parser.add_argument("--secret", required=True)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds between events")
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.secret, args.events, args.delay))
@@ -0,0 +1,256 @@
+"""
+Workload, due-date and completion analytics
+
+Questions like "how overloaded am I next week" need a handful of numbers,
+not the task list. `TaskColumns` holds the active tasks as parallel arrays
+(deadline, priority, project, estimated minutes, plus a flattened label
+column) sorted by deadline, built once per task store version. The
+aggregations below then work on slices of those arrays:
+
+- a due window or the overdue prefix is a `bisect` over the sorted
+  deadline column, not a scan
+- per-group counts are `Counter`s over array slices (or over `zip`ped
+  columns), which count in C rather than in a Python loop per task
+
+Results are memoized on the columns for the same arguments and minute, so
+repeated questions between task changes cost a dictionary lookup.
+Completion velocity comes from Todoist's completed-task history (see
+`TodoistClient.get_completed_tasks`).
+"""
+
+import bisect
+import math
+from array import array
+from collections import Counter
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple
+
+from .task_store import TaskStore
+
+DAY = 86400.0
+# Estimated minutes for a task whose duration is given in days
+MINUTES_PER_DAY = 8 * 60
+HIGH_PRIORITY = 3
+# Longest window, in days or weeks, the analytics tools accept
+MAX_DAYS = 366
+MAX_WEEKS = 52
+# Memoized results kept per version of the columns
+MEMO_SIZE = 64
+# Overdue age buckets: (name, days overdue from, to)
+OVERDUE_AGES = (("today", 0, 1), ("1_day", 1, 2), ("2_7_days", 2, 8), ("8_30_days", 8, 31),
+                ("over_30_days", 31, None))
+
+
+def day_start(day: date) -> float:
+    """Timestamp of local midnight starting `day`"""
+    return datetime.combine(day, dt_time.min).astimezone().timestamp()
+
+
+def _minutes(duration: Optional[Mapping[str, Any]]) -> float:
+    if not duration:
+        return 0.0
+    amount = duration.get("amount") or 0
+    return float(amount * MINUTES_PER_DAY if duration.get("unit") == "day" else amount)
+
+
+class TaskColumns:
+    """Active tasks as deadline-sorted parallel arrays (undated tasks last)"""
+
+    def __init__(self, store: TaskStore):
+        self.store = store
+        self.version = store.version
+        dated = store.due_between()
+        undated = [task for task in store if store.deadline(task.id) is None]
+        rows = dated + undated
+
+        self.deadline = array("d", [store.deadline(task.id) for task in dated])
+        self.deadline.extend([math.inf] * len(undated))
+        self.dated = len(dated)
+        self.priority = array("b", [task.priority or 1 for task in rows])
+        self.minutes = array("d", [_minutes(task.duration) for task in rows])
+        project_codes: Dict[Optional[str], int] = {}
+        self.project = array("l", [project_codes.setdefault(task.project_id, len(project_codes))
+                                   for task in rows])
+        self.project_ids: List[Optional[str]] = list(project_codes)
+
+        # One entry per (task, label), in row order so row ranges map to entry ranges
+        label_codes: Dict[str, int] = {}
+        self.label_row = array("l")
+        self.label = array("l")
+        for row, task in enumerate(rows):
+            for label in task.labels or ():
+                self.label_row.append(row)
+                self.label.append(label_codes.setdefault(label, len(label_codes)))
+        self.label_priority = array("b", [self.priority[row] for row in self.label_row])
+        self.label_minutes = array("d", [self.minutes[row] for row in self.label_row])
+        self.labels: List[str] = list(label_codes)
+        self._memo: Dict[Hashable, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.priority)
+
+    def current(self, store: TaskStore) -> bool:
+        """Whether these columns still describe `store`"""
+        store.refresh_relative_dues()
+        return store is self.store and store.version == self.version
+
+    def span(self, start: float, end: float) -> Tuple[int, int]:
+        """Row range of tasks due in `[start, end)`"""
+        return bisect.bisect_left(self.deadline, start), bisect.bisect_left(self.deadline, end)
+
+    def label_span(self, lo: int, hi: int) -> Tuple[int, int]:
+        """Label entry range of rows `[lo, hi)`"""
+        return bisect.bisect_left(self.label_row, lo), bisect.bisect_left(self.label_row, hi)
+
+    def memo(self, key: Hashable, render: Callable[[], Any]) -> Any:
+        """`render()`, reused for the same key while these columns are current"""
+        if key not in self._memo:
+            if len(self._memo) >= MEMO_SIZE:
+                self._memo.clear()
+            self._memo[key] = render()
+        return self._memo[key]
+
+
+def _high(priorities: Counter) -> int:
+    return sum(count for priority, count in priorities.items() if priority >= HIGH_PRIORITY)
+
+
+def _by_priority(values: Iterable[int]) -> Dict[str, int]:
+    counts = Counter(values)
+    return {str(priority): counts.get(priority, 0) for priority in (4, 3, 2, 1)}
+
+
+def workload(columns: TaskColumns, now: float, start: float, end: float, group_by: str,
+             names: Mapping[Optional[str], Optional[str]]) -> Dict[str, Any]:
+    """Active, high-priority, overdue and due-in-window counts per project or label"""
+    overdue_end = bisect.bisect_left(columns.deadline, now)
+    lo, hi = columns.span(max(start, now), end)
+    if group_by == "label":
+        codes, priorities, minutes = columns.label, columns.label_priority, columns.label_minutes
+        keys = columns.labels
+        overdue_end = columns.label_span(overdue_end, overdue_end)[0]
+        lo, hi = columns.label_span(lo, hi)
+    else:
+        codes, priorities, minutes = columns.project, columns.priority, columns.minutes
+        keys = columns.project_ids
+
+    active = Counter(codes)
+    by_priority = Counter(zip(codes, priorities))
+    overdue = Counter(codes[:overdue_end])
+    due = Counter(codes[lo:hi])
+    window_minutes: Dict[int, float] = {}
+    for code, value in zip(codes[lo:hi], minutes[lo:hi]):
+        if value:
+            window_minutes[code] = window_minutes.get(code, 0.0) + value
+
+    groups = []
+    for code, count in active.items():
+        groups.append({
+            "id": keys[code],
+            "name": names.get(keys[code]) if group_by == "project" else keys[code],
+            "active": count,
+            "high_priority": sum(by_priority.get((code, priority), 0) for priority in (3, 4)),
+            "overdue": overdue.get(code, 0),
+            "due_in_window": due.get(code, 0),
+            "estimated_minutes_in_window": round(window_minutes.get(code, 0.0)),
+        })
+    groups.sort(key=lambda group: (group["overdue"] + group["due_in_window"], group["active"]), reverse=True)
+    return {"totals": totals(columns, now, start, end), "groups": groups}
+
+
+def totals(columns: TaskColumns, now: float, start: float, end: float) -> Dict[str, Any]:
+    """Workspace-wide counts for `workload`"""
+    overdue_end = bisect.bisect_left(columns.deadline, now)
+    lo, hi = columns.span(max(start, now), end)
+    return {
+        "active": len(columns),
+        "high_priority": _high(Counter(columns.priority)),
+        "overdue": overdue_end,
+        "due_in_window": hi - lo,
+        "no_due_date": len(columns) - columns.dated,
+        "estimated_minutes_in_window": round(sum(columns.minutes[lo:hi])),
+        "priorities": _by_priority(columns.priority),
+    }
+
+
+def due_forecast(columns: TaskColumns, now: float, today: date, days: int) -> Dict[str, Any]:
+    """Overdue tasks by age, and tasks due on each of the next `days` days"""
+    overdue_end = bisect.bisect_left(columns.deadline, now)
+
+    def due_before(days_ago: int) -> int:
+        """Rows due before the start of the day `days_ago` days ago"""
+        return bisect.bisect_left(columns.deadline, day_start(today - timedelta(days=days_ago)))
+
+    ages = {}
+    for name, older, newer in OVERDUE_AGES:
+        # Overdue by at least `older` days but fewer than `newer`
+        lo = 0 if newer is None else due_before(newer - 1)
+        hi = overdue_end if older == 0 else min(due_before(older - 1), overdue_end)
+        ages[name] = max(hi - lo, 0)
+
+    forecast = []
+    for offset in range(days):
+        day = today + timedelta(days=offset)
+        lo, hi = columns.span(max(day_start(day), now), day_start(day + timedelta(days=1)))
+        forecast.append({
+            "date": day.isoformat(),
+            "due": hi - lo,
+            "high_priority": _high(Counter(columns.priority[lo:hi])),
+            "estimated_minutes": round(sum(columns.minutes[lo:hi])),
+        })
+    window_end = bisect.bisect_left(columns.deadline, day_start(today + timedelta(days=days)))
+    return {
+        "overdue": {"total": overdue_end, "by_age": ages,
+                    "priorities": _by_priority(columns.priority[:overdue_end])},
+        "days": forecast,
+        "upcoming_priorities": _by_priority(columns.priority[overdue_end:window_end]),
+        "later": columns.dated - window_end,
+        "no_due_date": len(columns) - columns.dated,
+    }
+
+
+def _completed_at(item: Mapping[str, Any]) -> Optional[float]:
+    value = item.get("completed_at")
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def velocity(completed: List[Mapping[str, Any]], columns: TaskColumns, now: float, weeks: int,
+             names: Mapping[Optional[str], Optional[str]]) -> Dict[str, Any]:
+    """Completions per rolling week, and how long the coming week's tasks would take at that pace"""
+    stamps = array("d", sorted(filter(None, map(_completed_at, completed))))
+    periods = []
+    for index in range(weeks, 0, -1):
+        start, end = now - index * 7 * DAY, now - (index - 1) * 7 * DAY
+        count = bisect.bisect_left(stamps, end) - bisect.bisect_left(stamps, start)
+        periods.append({
+            "start": datetime.fromtimestamp(start).date().isoformat(),
+            "end": datetime.fromtimestamp(end).date().isoformat(),
+            "completed": count,
+        })
+    total = sum(period["completed"] for period in periods)
+    per_day = total / (weeks * 7)
+    earlier = [period["completed"] for period in periods[:-1]]
+    baseline = sum(earlier) / len(earlier) if earlier else 0
+    since = now - weeks * 7 * DAY
+    by_project = Counter(item.get("project_id") for item in completed
+                         if (_completed_at(item) or 0) >= since)
+
+    overdue = bisect.bisect_left(columns.deadline, now)
+    lo, hi = columns.span(now, now + 7 * DAY)
+    backlog = overdue + hi - lo
+    return {
+        "weeks": periods,
+        "completed": total,
+        "per_day": round(per_day, 2),
+        "per_week": round(per_day * 7, 1),
+        "trend": round(periods[-1]["completed"] / baseline, 2) if baseline else None,
+        "by_project": [{"id": project_id, "name": names.get(project_id), "completed": count}
+                       for project_id, count in by_project.most_common()],
+        "overdue_or_due_next_7_days": backlog,
+        "days_to_clear_next_7_days": round(backlog / per_day, 1) if per_day else None,
+    }
@@ -0,0 +1,105 @@
+"""
+Read-through response cache for the Todoist client
+
+Entries are keyed by `(endpoint, scope)` tuples, e.g. `("tasks", None)` for
+all tasks or `("tasks", "2203306141")` for a single project, and expire
+after a per-endpoint TTL. The cache is bounded and evicts the least recently
+used entry once full.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+CacheKey = Tuple[str, Optional[Hashable]]
+
+MISSING = object()
+
+
+class TTLCache:
+    """LRU cache with per-entry expiry and hit/miss counters"""
+
+    def __init__(self, max_entries: int = 256, clock: Callable[[], float] = time.monotonic):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> Any:
+        """Return the cached value for `key`, or `MISSING`"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._clock():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return MISSING
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def peek(self, key: CacheKey) -> Any:
+        """Like `get` but without touching LRU order or counters"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._clock():
+            return MISSING
+        return entry[1]
+
+    def set(self, key: CacheKey, value: Any, ttl: float) -> None:
+        """Store `value` under `key` for `ttl` seconds"""
+        if ttl <= 0:
+            return
+        self._entries[key] = (self._clock() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def ttl_remaining(self, key: CacheKey) -> Optional[float]:
+        """Seconds until a live entry expires, or None if there isn't one"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        remaining = entry[0] - self._clock()
+        return remaining if remaining > 0 else None
+
+    def replace(self, key: CacheKey, value: Any) -> None:
+        """Update a live entry in place, keeping its expiry"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries[key] = (entry[0], value)
+
+    def invalidate(self, key: CacheKey) -> None:
+        self._entries.pop(key, None)
+
+    def invalidate_endpoint(self, endpoint: str) -> None:
+        """Drop every entry for an endpoint, whatever its scope"""
+        for key in [k for k in self._entries if k[0] == endpoint]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def entries(self, endpoint: str) -> Iterator[Tuple[CacheKey, Any]]:
+        """Iterate over live entries for an endpoint"""
+        now = self._clock()
+        for key, (expires_at, value) in list(self._entries.items()):
+            if key[0] == endpoint and expires_at > now:
+                yield key, value
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,124 @@
+"""
+Per-tenant client pool
+
+In multi-tenant mode every Todoist token gets its own `TodoistClient`, and
+with it its own connection pool, cache, sync replica and rate-limit budget,
+so one user's traffic can't exhaust another's quota or read their data.
+
+Clients are created on first use and evicted least-recently-used when the
+pool is over capacity or a tenant has been idle for `idle_timeout` seconds.
+A client that is serving a request is never evicted.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+from . import metrics
+
+
+class _Entry:
+    __slots__ = ("client", "active", "last_used")
+
+    def __init__(self, client: Any, now: float):
+        self.client = client
+        self.active = 0
+        self.last_used = now
+
+
+def tenant_key(api_token: str) -> str:
+    """Pool key for a token, so raw tokens aren't kept as dict keys"""
+    return hashlib.sha256(api_token.encode()).hexdigest()
+
+
+class ClientPool:
+    """LRU pool of per-tenant clients"""
+
+    def __init__(
+        self,
+        factory: Callable[[str], Any],
+        max_clients: int = 256,
+        idle_timeout: float = 900.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.factory = factory
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.created = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @asynccontextmanager
+    async def acquire(self, api_token: str) -> AsyncIterator[Any]:
+        """Borrow the tenant's client for the duration of one request"""
+        key = tenant_key(api_token)
+        entry = self._entries.get(key)
+        created = entry is None
+        if created:
+            entry = self._entries[key] = _Entry(self.factory(api_token), self._clock())
+            self.created += 1
+            metrics.TENANT_CLIENTS.inc(("created",))
+        self._entries.move_to_end(key)
+        # Mark it busy before the first await so a concurrent eviction skips it
+        entry.active += 1
+        try:
+            if created:
+                await entry.client.open()
+            yield entry.client
+        finally:
+            entry.active -= 1
+            entry.last_used = self._clock()
+            await self.evict()
+
+    async def evict(self) -> None:
+        """Close clients over capacity or idle too long, oldest first"""
+        now = self._clock()
+        over = len(self._entries) - self.max_clients
+        victims = []
+        for key, entry in list(self._entries.items()):
+            idle = now - entry.last_used >= self.idle_timeout
+            if over <= 0 and not idle:
+                # Everything after this entry was used more recently
+                break
+            if entry.active:
+                continue
+            # Unlink everything before awaiting, so concurrent evictions don't overlap
+            victims.append(self._entries.pop(key))
+            over -= 1
+        for entry in victims:
+            self.evicted += 1
+            metrics.TENANT_CLIENTS.inc(("evicted",))
+            await entry.client.aclose()
+
+    def clients(self) -> List[Any]:
+        """Every pooled client, least recently used first"""
+        return [entry.client for entry in self._entries.values()]
+
+    async def discard(self, api_token: str) -> None:
+        """Drop a tenant's client, e.g. after its token failed verification"""
+        key = tenant_key(api_token)
+        entry = self._entries.get(key)
+        if entry is not None and not entry.active:
+            del self._entries[key]
+            await entry.client.aclose()
+
+    async def aclose(self) -> None:
+        """Close every client"""
+        entries, self._entries = list(self._entries.values()), OrderedDict()
+        for entry in entries:
+            await entry.client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self._entries),
+            "active": sum(1 for entry in self._entries.values() if entry.active),
+            "max_clients": self.max_clients,
+            "created": self.created,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,158 @@
+"""
+Response compression for the HTTP app
+
+`CompressionMiddleware` compresses responses with the best encoding the
+client accepts: brotli (`br`, when the `brotli` package is installed) or
+gzip. Bodies sent in one piece are left alone below `minimum_size`, where
+the encoding overhead outweighs the saving.
+
+Streamed bodies, including the `text/event-stream` responses streamable
+HTTP answers tool calls with, are compressed as they go, with a flush after
+every chunk so each event still reaches the client as soon as it is sent
+(Starlette's `GZipMiddleware` skips event streams instead).
+"""
+
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        )
+
+
+class _Brotli:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self._compressor.process(data)
+        return output + (self._compressor.finish() if final else self._compressor.flush())
+
+
+def available_encodings() -> List[str]:
+    """Encodings this process can produce, most preferred first"""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def choose_encoding(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """Pick the encoding for an `Accept-Encoding` header: highest q, then our preference"""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    wildcard = weights.get("*", 0.0)
+    best: Optional[Tuple[float, int]] = None
+    chosen = None
+    for rank, encoding in enumerate(encodings):
+        q = weights.get(encoding, wildcard)
+        if q > 0 and (best is None or (q, -rank) > best):
+            best, chosen = (q, -rank), encoding
+    return chosen
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with brotli or gzip"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6,
+                 brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _Responder(self, encoding, send).send)
+
+
+class _Responder:
+    """Compresses one response as its messages pass through"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self._start: Optional[Message] = None
+        self._compressor = None
+        self._passthrough = False
+
+    def _encoder(self):
+        if self.encoding == "br":
+            return _Brotli(self.middleware.brotli_quality)
+        return _Gzip(self.middleware.gzip_level)
+
+    def _encode_headers(self) -> None:
+        headers = MutableHeaders(raw=self._start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if "content-length" in headers:
+            del headers["content-length"]
+        self._start["headers"] = headers.raw
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            headers = Headers(raw=message["headers"])
+            self._passthrough = "content-encoding" in headers
+            if self._passthrough:
+                await self._send(message)
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._compressor is None:
+            if not more_body and len(body) < self.middleware.minimum_size:
+                # Small and complete: not worth encoding
+                self._passthrough = True
+                await self._send(self._start)
+                await self._send(message)
+                return
+            self._compressor = self._encoder()
+            self._encode_headers()
+            if not more_body:
+                body = self._compressor.compress(body, final=True)
+                MutableHeaders(raw=self._start["headers"])["Content-Length"] = str(len(body))
+                await self._send(self._start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(self._start)
+
+        await self._send({
+            "type": "http.response.body",
+            "body": self._compressor.compress(body, final=not more_body),
+            "more_body": more_body,
+        })
@@ -0,0 +1,390 @@
+"""
+Runtime configuration for the Todoist MCP server
+
+All settings are read from environment variables (or a `.env` file) so the
+server can be tuned without code changes.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+def env_str(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Read a string setting, treating empty values as unset"""
+    value = os.getenv(name)
+    return value if value else default
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float setting"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {value!r}")
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting (1/0, true/false, yes/no, on/off)"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass
+class TransportSettings:
+    """Connection pool and timeout settings for the shared HTTP transport"""
+
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+    connect_timeout: float = 5.0
+    read_timeout: float = 15.0
+    write_timeout: float = 10.0
+    pool_timeout: float = 5.0
+    # gzip request bodies at least this large (Content-Encoding: gzip)
+    compress_requests: bool = False
+    compress_min_size: int = 4096
+
+    @classmethod
+    def from_env(cls) -> "TransportSettings":
+        return cls(
+            max_connections=env_int("TODOIST_HTTP_MAX_CONNECTIONS", cls.max_connections),
+            max_keepalive_connections=env_int("TODOIST_HTTP_MAX_KEEPALIVE", cls.max_keepalive_connections),
+            keepalive_expiry=env_float("TODOIST_HTTP_KEEPALIVE_EXPIRY", cls.keepalive_expiry),
+            http2=env_bool("TODOIST_HTTP2", cls.http2),
+            connect_timeout=env_float("TODOIST_HTTP_CONNECT_TIMEOUT", cls.connect_timeout),
+            read_timeout=env_float("TODOIST_HTTP_READ_TIMEOUT", cls.read_timeout),
+            write_timeout=env_float("TODOIST_HTTP_WRITE_TIMEOUT", cls.write_timeout),
+            pool_timeout=env_float("TODOIST_HTTP_POOL_TIMEOUT", cls.pool_timeout),
+            compress_requests=env_bool("TODOIST_HTTP_COMPRESS_REQUESTS", cls.compress_requests),
+            compress_min_size=env_int("TODOIST_HTTP_COMPRESS_MIN_SIZE", cls.compress_min_size),
+        )
+
+
+@dataclass
+class CacheSettings:
+    """Read-through cache settings (TTLs are in seconds, 0 disables an endpoint)"""
+
+    enabled: bool = True
+    max_entries: int = 256
+    tasks_ttl: float = 30.0
+    projects_ttl: float = 300.0
+
+    @classmethod
+    def from_env(cls) -> "CacheSettings":
+        return cls(
+            enabled=env_bool("TODOIST_CACHE_ENABLED", cls.enabled),
+            max_entries=env_int("TODOIST_CACHE_MAX_ENTRIES", cls.max_entries),
+            tasks_ttl=env_float("TODOIST_CACHE_TASKS_TTL", cls.tasks_ttl),
+            projects_ttl=env_float("TODOIST_CACHE_PROJECTS_TTL", cls.projects_ttl),
+        )
+
+
+@dataclass
+class SyncSettings:
+    """Incremental Sync API replica settings
+
+    Once webhook events are arriving, the replica is kept current by them
+    and only re-synced every `push_refresh_interval` seconds as a safety net.
+    """
+
+    enabled: bool = True
+    refresh_interval: float = 10.0
+    push_refresh_interval: float = 300.0
+
+    @classmethod
+    def from_env(cls) -> "SyncSettings":
+        return cls(
+            enabled=env_bool("TODOIST_SYNC_ENABLED", cls.enabled),
+            refresh_interval=env_float("TODOIST_SYNC_REFRESH_INTERVAL", cls.refresh_interval),
+            push_refresh_interval=env_float("TODOIST_SYNC_PUSH_REFRESH_INTERVAL", cls.push_refresh_interval),
+        )
+
+
+@dataclass
+class RefreshSettings:
+    """Background refresh of hot data (see `refresher.py`)
+
+    While the server is in use, data that reads keep asking for is
+    refreshed once it is `ahead` of the way through its TTL (or the
+    replica's refresh interval), so reads find it fresh. A replica that has
+    gone stale by less than `stale_grace` seconds is served as-is while it
+    syncs in the background. Refreshing stops after `idle_timeout` seconds
+    without a read, and is skipped while fewer than `min_budget` of the
+    rate-limit bucket's tokens are left.
+    """
+
+    enabled: bool = True
+    ahead: float = 0.8
+    stale_grace: float = 60.0
+    idle_timeout: float = 120.0
+    min_budget: float = 0.2
+
+    @classmethod
+    def from_env(cls) -> "RefreshSettings":
+        return cls(
+            enabled=env_bool("TODOIST_REFRESH_ENABLED", cls.enabled),
+            ahead=env_float("TODOIST_REFRESH_AHEAD", cls.ahead),
+            stale_grace=env_float("TODOIST_REFRESH_STALE_GRACE", cls.stale_grace),
+            idle_timeout=env_float("TODOIST_REFRESH_IDLE_TIMEOUT", cls.idle_timeout),
+            min_budget=env_float("TODOIST_REFRESH_MIN_BUDGET", cls.min_budget),
+        )
+
+
+@dataclass
+class SnapshotSettings:
+    """On-disk snapshot of the sync replica
+
+    A snapshot younger than `max_age` seconds is served immediately on cold
+    start while an incremental sync runs in the background; an older one is
+    caught up with an incremental sync before it is used.
+    """
+
+    enabled: bool = True
+    directory: str = "~/.cache/todoist-mcp-server"
+    max_age: float = 3600.0
+
+    @classmethod
+    def from_env(cls) -> "SnapshotSettings":
+        return cls(
+            enabled=env_bool("TODOIST_SNAPSHOT_ENABLED", cls.enabled),
+            directory=env_str("TODOIST_SNAPSHOT_DIR", cls.directory),
+            max_age=env_float("TODOIST_SNAPSHOT_MAX_AGE", cls.max_age),
+        )
+
+
+@dataclass
+class OutboxSettings:
+    """Durable write outbox (see `outbox.py`)
+
+    When enabled, `create_task`, `complete_task` and `create_project` are
+    recorded on disk, applied to the local view and acknowledged at once,
+    then sent to Todoist in batches by a background worker. Writes arriving
+    within `flush_interval` seconds of each other share a request. A batch
+    that fails is retried with exponential backoff from `retry_delay` up to
+    `max_retry_delay`, and is given up on after `max_attempts`.
+
+    Off by default: until a write is flushed, the objects it creates carry
+    temporary IDs.
+    """
+
+    enabled: bool = False
+    directory: str = "~/.cache/todoist-mcp-server"
+    flush_interval: float = 0.05
+    max_attempts: int = 8
+    retry_delay: float = 1.0
+    max_retry_delay: float = 60.0
+
+    @classmethod
+    def from_env(cls) -> "OutboxSettings":
+        return cls(
+            enabled=env_bool("TODOIST_OUTBOX_ENABLED", cls.enabled),
+            directory=env_str("TODOIST_OUTBOX_DIR", cls.directory),
+            flush_interval=env_float("TODOIST_OUTBOX_FLUSH_INTERVAL", cls.flush_interval),
+            max_attempts=env_int("TODOIST_OUTBOX_MAX_ATTEMPTS", cls.max_attempts),
+            retry_delay=env_float("TODOIST_OUTBOX_RETRY_DELAY", cls.retry_delay),
+            max_retry_delay=env_float("TODOIST_OUTBOX_MAX_RETRY_DELAY", cls.max_retry_delay),
+        )
+
+
+@dataclass
+class MetricsSettings:
+    """Hot-path instrumentation (see `metrics.py`)
+
+    `log_interval` is how often a JSON summary is logged to stderr in stdio
+    mode, where there is no `/metrics` route; 0 disables it.
+    """
+
+    enabled: bool = True
+    log_interval: float = 60.0
+
+    @classmethod
+    def from_env(cls) -> "MetricsSettings":
+        return cls(
+            enabled=env_bool("TODOIST_METRICS_ENABLED", cls.enabled),
+            log_interval=env_float("TODOIST_METRICS_LOG_INTERVAL", cls.log_interval),
+        )
+
+
+@dataclass
+class TenantSettings:
+    """Multi-tenant mode: one client per Todoist token, resolved per request"""
+
+    multi_tenant: bool = False
+    max_clients: int = 256
+    idle_timeout: float = 900.0
+
+    @classmethod
+    def from_env(cls) -> "TenantSettings":
+        return cls(
+            multi_tenant=env_bool("TODOIST_MULTI_TENANT", cls.multi_tenant),
+            max_clients=env_int("TODOIST_TENANT_MAX_CLIENTS", cls.max_clients),
+            idle_timeout=env_float("TODOIST_TENANT_IDLE_TIMEOUT", cls.idle_timeout),
+        )
+
+
+@dataclass
+class WebhookSettings:
+    """Todoist webhook receiver on the HTTP app (see `webhooks.py`)
+
+    The receiver is mounted only when `secret` (the Todoist app's client
+    secret, used to sign deliveries) is set.
+    """
+
+    secret: Optional[str] = None
+    path: str = "/webhooks/todoist"
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.secret)
+
+    @classmethod
+    def from_env(cls) -> "WebhookSettings":
+        return cls(
+            secret=env_str("TODOIST_WEBHOOK_SECRET", cls.secret),
+            path=env_str("TODOIST_WEBHOOK_PATH", cls.path),
+        )
+
+
+@dataclass
+class StateSettings:
+    """Where cache and rate-limit state live (see `state_backend.py`)
+
+    `memory` keeps them per process; `sqlite` shares them between HTTP
+    worker processes through the database at `path`.
+    """
+
+    backend: str = "memory"
+    path: str = "~/.cache/todoist-mcp-server/state.sqlite3"
+
+    @classmethod
+    def from_env(cls) -> "StateSettings":
+        return cls(
+            backend=env_str("TODOIST_STATE_BACKEND", cls.backend).strip().lower(),
+            path=env_str("TODOIST_STATE_PATH", cls.path),
+        )
+
+
+@dataclass
+class ServerSettings:
+    """Bind address and worker processes for the HTTP entry point"""
+
+    host: str = "127.0.0.1"
+    port: int = 8000
+    workers: int = 1
+    log_level: str = "info"
+
+    @classmethod
+    def from_env(cls) -> "ServerSettings":
+        return cls(
+            host=env_str("TODOIST_SERVER_HOST", cls.host),
+            port=env_int("TODOIST_SERVER_PORT", cls.port),
+            workers=env_int("TODOIST_SERVER_WORKERS", cls.workers),
+            log_level=env_str("TODOIST_SERVER_LOG_LEVEL", cls.log_level),
+        )
+
+
+@dataclass
+class CompressionSettings:
+    """Response compression on the HTTP app (see `compression.py`)"""
+
+    enabled: bool = True
+    minimum_size: int = 1024
+    gzip_level: int = 6
+    brotli_quality: int = 4
+
+    @classmethod
+    def from_env(cls) -> "CompressionSettings":
+        return cls(
+            enabled=env_bool("TODOIST_COMPRESSION_ENABLED", cls.enabled),
+            minimum_size=env_int("TODOIST_COMPRESSION_MIN_SIZE", cls.minimum_size),
+            gzip_level=env_int("TODOIST_COMPRESSION_GZIP_LEVEL", cls.gzip_level),
+            brotli_quality=env_int("TODOIST_COMPRESSION_BROTLI_QUALITY", cls.brotli_quality),
+        )
+
+
+@dataclass
+class RateLimitSettings:
+    """Client-side request budget and retry policy
+
+    The defaults follow Todoist's documented limit of 1000 requests per user
+    per 15 minutes, with a burst allowance so short spikes aren't delayed.
+    """
+
+    enabled: bool = True
+    requests: int = 1000
+    period: float = 900.0
+    burst: int = 100
+    max_retries: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 60.0
+
+    @classmethod
+    def from_env(cls) -> "RateLimitSettings":
+        return cls(
+            enabled=env_bool("TODOIST_RATE_LIMIT_ENABLED", cls.enabled),
+            requests=env_int("TODOIST_RATE_LIMIT_REQUESTS", cls.requests),
+            period=env_float("TODOIST_RATE_LIMIT_PERIOD", cls.period),
+            burst=env_int("TODOIST_RATE_LIMIT_BURST", cls.burst),
+            max_retries=env_int("TODOIST_MAX_RETRIES", cls.max_retries),
+            base_delay=env_float("TODOIST_RETRY_BASE_DELAY", cls.base_delay),
+            max_delay=env_float("TODOIST_RETRY_MAX_DELAY", cls.max_delay),
+        )
+
+
+@dataclass
+class Settings:
+    """Top-level server settings"""
+
+    api_base_url: str = "https://api.todoist.com"
+    fanout_limit: int = 8
+    resource_page_size: int = 200
+    transport: TransportSettings = field(default_factory=TransportSettings)
+    cache: CacheSettings = field(default_factory=CacheSettings)
+    sync: SyncSettings = field(default_factory=SyncSettings)
+    snapshot: SnapshotSettings = field(default_factory=SnapshotSettings)
+    rate_limit: RateLimitSettings = field(default_factory=RateLimitSettings)
+    state: StateSettings = field(default_factory=StateSettings)
+    outbox: OutboxSettings = field(default_factory=OutboxSettings)
+    refresh: RefreshSettings = field(default_factory=RefreshSettings)
+
+    @property
+    def rest_base_url(self) -> str:
+        return f"{self.api_base_url.rstrip('/')}/rest/v2"
+
+    @property
+    def sync_base_url(self) -> str:
+        return f"{self.api_base_url.rstrip('/')}/sync/v9"
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            api_base_url=env_str("TODOIST_API_BASE_URL", cls.api_base_url),
+            fanout_limit=env_int("TODOIST_FANOUT_LIMIT", cls.fanout_limit),
+            resource_page_size=env_int("TODOIST_RESOURCE_PAGE_SIZE", cls.resource_page_size),
+            transport=TransportSettings.from_env(),
+            cache=CacheSettings.from_env(),
+            sync=SyncSettings.from_env(),
+            snapshot=SnapshotSettings.from_env(),
+            rate_limit=RateLimitSettings.from_env(),
+            state=StateSettings.from_env(),
+            outbox=OutboxSettings.from_env(),
+            refresh=RefreshSettings.from_env(),
+        )
@@ -0,0 +1,236 @@
+"""
+Due-date normalization
+
+Everything that compares due dates (overdue detection, due windows and
+sorting, see `task_store.py`) works on one number per task: its deadline,
+as a POSIX timestamp. `due_deadline` derives it from a Todoist `due`
+object:
+
+- a `datetime` is that exact moment (UTC when suffixed with `Z`, local
+  time otherwise)
+- a date-only `date` counts as due by the end of that day, so "overdue"
+  means the deadline is in the past for both kinds
+- a due with only a `string`, like a task queued in the outbox before
+  Todoist has resolved its `due_string`, is read from the string with
+  `parse_due_string`, which understands common English phrases ("today",
+  "tomorrow at 5pm", "tomorrow 9", "next fri", "in 3 days", "every 2
+  weeks", "Oct 27", "2024-05-01")
+
+A phrase's deadline depends on the day it is read on: "tomorrow" moves
+forward at midnight. Such dues are `is_relative`, and the task store
+resolves them again when the day changes.
+
+A deadline is worked out once per due object and stored on the `Due`
+model (see `models.py`), so building a task store again from the same
+tasks, as the cache does on every read, does no parsing. Across objects,
+parsed dates and phrases are kept in LRU caches: an account has far fewer
+distinct due dates than tasks. Patterns are compiled once, at import.
+"""
+
+import calendar
+import functools
+import re
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from .models import Due
+
+DATE_CACHE_SIZE = 4096
+PHRASE_CACHE_SIZE = 1024
+
+_SPACES = re.compile(r"\s+")
+# A trailing time: "at 5pm", "@ 17:30", "9:15am", or a bare hour (see parse_due_string)
+_TIME = re.compile(r"(?:^|\s)(?:(?P<at>at|@)\s*)?(?P<hour>\d{1,2})(?::(?P<minute>\d{2}))?\s*(?P<meridiem>am|pm)?$")
+_IN = re.compile(r"in (\d+) (day|week|month|year)s?")
+# Recurring every N units, or every other unit; the first occurrence is today
+_EVERY = re.compile(r"every (?:\d+|other) (?:day|week|month|year)s?")
+_ISO_DATE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+_MONTH_DAY = re.compile(r"([a-z]+)\.? (\d{1,2})(?:st|nd|rd|th)?(?:,? (\d{4}))?")
+_DAY_MONTH = re.compile(r"(\d{1,2})(?:st|nd|rd|th)? ([a-z]+)\.?(?:,? (\d{4}))?")
+_WEEKDAY = re.compile(r"(?:(this|next|every) )?([a-z]+)")
+
+# Days from today for fixed phrases (recurring ones start today)
+_KEYWORDS = {
+    "today": 0, "tod": 0, "tonight": 0, "tomorrow": 1, "tmr": 1, "tom": 1, "yesterday": -1,
+    "daily": 0, "every day": 0, "everyday": 0, "every week": 0, "weekly": 0,
+    "every month": 0, "monthly": 0, "every year": 0, "yearly": 0,
+}
+
+
+def _prefixes(names: Tuple[str, ...]) -> Dict[str, int]:
+    """Each name and its abbreviations (three letters or more), by position"""
+    return {name[:length]: index for index, name in enumerate(names) for length in range(3, len(name) + 1)}
+
+
+_MONTHS = _prefixes(("january", "february", "march", "april", "may", "june", "july",
+                     "august", "september", "october", "november", "december"))
+_WEEKDAYS = _prefixes(("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"))
+
+
+def _add_months(day: date, months: int) -> date:
+    year, month = divmod(day.month - 1 + months, 12)
+    year, month = day.year + year, month + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def _calendar_day(month_name: str, day: str, year: Optional[str], today: date) -> Optional[date]:
+    """A named month and day; without a year, the next one on or after today"""
+    month = _MONTHS.get(month_name)
+    if month is None:
+        return None
+    try:
+        resolved = date(int(year) if year else today.year, month + 1, int(day))
+        if not year and resolved < today:
+            resolved = date(today.year + 1, month + 1, int(day))
+    except ValueError:
+        return None
+    return resolved
+
+
+def _day(text: str, today: date) -> Optional[date]:
+    offset = _KEYWORDS.get(text)
+    if offset is not None:
+        return today + timedelta(days=offset)
+    if text == "next week":
+        return today + timedelta(days=7 - today.weekday())
+    if text == "next month":
+        return _add_months(today.replace(day=1), 1)
+    if text == "next year":
+        return date(today.year + 1, 1, 1)
+    if text in ("every weekday", "weekdays"):
+        return today if today.weekday() < 5 else today + timedelta(days=7 - today.weekday())
+    if _EVERY.fullmatch(text):
+        return today
+
+    match = _IN.fullmatch(text)
+    if match:
+        amount, unit = int(match[1]), match[2]
+        if unit == "day":
+            return today + timedelta(days=amount)
+        if unit == "week":
+            return today + timedelta(weeks=amount)
+        return _add_months(today, amount if unit == "month" else amount * 12)
+    match = _ISO_DATE.fullmatch(text)
+    if match:
+        try:
+            return date(int(match[1]), int(match[2]), int(match[3]))
+        except ValueError:
+            return None
+    match = _MONTH_DAY.fullmatch(text)
+    if match:
+        return _calendar_day(match[1], match[2], match[3], today)
+    match = _DAY_MONTH.fullmatch(text)
+    if match:
+        return _calendar_day(match[2], match[1], match[3], today)
+    match = _WEEKDAY.fullmatch(text)
+    if match and match[2] in _WEEKDAYS:
+        ahead = (_WEEKDAYS[match[2]] - today.weekday()) % 7
+        # "next friday" on a Friday is a week away; "friday" is today
+        if match[1] == "next" and ahead == 0:
+            ahead = 7
+        return today + timedelta(days=ahead)
+    return None
+
+
+def _clock(match: "re.Match[str]") -> Optional[dt_time]:
+    hour, minute = int(match["hour"]), int(match["minute"] or 0)
+    meridiem = match["meridiem"]
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    if hour > 23 or minute > 59:
+        return None
+    return dt_time(hour, minute)
+
+
+@functools.lru_cache(maxsize=PHRASE_CACHE_SIZE)
+def parse_due_string(text: str, today: date) -> Optional[Tuple[date, Optional[dt_time]]]:
+    """Resolve a due phrase relative to `today`: its date, and its time if it gives one
+
+    A bare trailing number is an hour on the 24-hour clock only after a
+    phrase that is a day by itself ("tomorrow 9"); otherwise it is a day
+    of the month ("Oct 27"). Returns None for phrases it doesn't understand
+    (Todoist's grammar is much larger, e.g. "every 3rd friday" or "in 2
+    hours"; those are left to Todoist).
+    """
+    text = _SPACES.sub(" ", text.strip().lower())
+    at = None
+    match = _TIME.search(text)
+    if match:
+        rest = text[:match.start()].strip()
+        if match["at"] or match["minute"] or match["meridiem"] or (rest and _day(rest, today) is not None):
+            at = _clock(match)
+            if at is None:
+                return None
+            text = rest
+            if not text:
+                return today, at
+    day = _day(text, today)
+    return (day, at) if day is not None else None
+
+
+def _phrase_deadline(text: str, today: date) -> Optional[float]:
+    parsed = parse_due_string(text, today)
+    if parsed is None:
+        return None
+    day, at = parsed
+    return datetime.combine(day, at if at is not None else dt_time.max).timestamp()
+
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def _iso_deadline(value: Optional[str], day: Optional[str]) -> Optional[float]:
+    """Deadline of a `due`'s `datetime`, or failing that its `date`"""
+    try:
+        if value:
+            # Naive datetimes are local time, which is what .timestamp() assumes
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        if "T" in day:
+            return _iso_deadline(day, None)
+        return datetime.combine(date.fromisoformat(day[:10]), dt_time.max).timestamp()
+    except ValueError:
+        return None
+
+
+def is_relative(due: Optional[Mapping[str, Any]]) -> bool:
+    """Whether a `due` has only a phrase, so its deadline changes with the day"""
+    if not due:
+        return False
+    if due.__class__ is Due:
+        return not (due.datetime or due.date) and bool(due.string)
+    return not (due.get("datetime") or due.get("date")) and bool(due.get("string"))
+
+
+def due_deadline(due: Optional[Mapping[str, Any]]) -> Optional[float]:
+    """Normalize a Todoist `due` object to a POSIX timestamp deadline
+
+    Stored on `Due` models, so each is worked out once; a deadline read
+    from a relative phrase is worked out again when the day changes.
+    """
+    model = due.__class__ is Due
+    if model:
+        stored = due._deadline
+        if stored is not None and (stored[0] is None or stored[0] == date.today()):
+            return stored[1]
+        value, day, text = due.datetime, due.date, due.string
+    elif not due:
+        return None
+    else:
+        value, day, text = due.get("datetime"), due.get("date"), due.get("string")
+    today = None
+    if value or day:
+        deadline = _iso_deadline(value, day)
+    elif text:
+        today = date.today()
+        deadline = _phrase_deadline(text, today)
+    else:
+        deadline = None
+    if model:
+        due._deadline = (today, deadline)
+    return deadline
+
+
+def normalize_due(due: Optional[Mapping[str, Any]]) -> Optional[datetime]:
+    """A `due` object's deadline as a timezone-aware local datetime"""
+    deadline = due_deadline(due)
+    return datetime.fromtimestamp(deadline).astimezone() if deadline is not None else None
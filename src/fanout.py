@@ -0,0 +1,55 @@
+"""
+Bounded-concurrency fan-out for independent API calls
+
+Prompts and resources often need several independent reads (tasks and
+projects, say). `gather_bounded` runs them concurrently under a semaphore
+so wall-clock time is that of the slowest call, returns a partial result
+when some of them fail, and cancels everything still running if the caller
+is cancelled.
+"""
+
+import asyncio
+from typing import Any, Awaitable, List, NamedTuple, Optional
+
+
+class Outcome(NamedTuple):
+    """Result of one fanned-out call: either a value or the error it raised"""
+
+    value: Any
+    error: Optional[Exception]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def unwrap(self) -> Any:
+        """Return the value, re-raising the call's error if it failed"""
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def value_or(self, default: Any) -> Any:
+        return self.value if self.error is None else default
+
+
+async def gather_bounded(*calls: Awaitable[Any], limit: int = 8) -> List[Outcome]:
+    """Await `calls` concurrently, at most `limit` at a time, in input order"""
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(call: Awaitable[Any]) -> Outcome:
+        async with semaphore:
+            try:
+                return Outcome(await call, None)
+            except Exception as e:
+                return Outcome(None, e)
+
+    tasks = [asyncio.ensure_future(run(call)) for call in calls]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        # Cancellation (or an interpreter-level error) takes the whole group down
+        for task in tasks:
+            task.cancel()
+        raise
@@ -0,0 +1,129 @@
+"""
+Compact output formats for task and project lists
+
+Full Todoist objects repeat every key for every task, and most of those
+values are empty or of no use to a model reading the list. Bytes, MCP
+framing and tokens all grow with that, so tools and resources can return
+the same lists in a more compact `format`:
+
+- `json`: the full objects, unchanged (the default)
+- `table`: `{"columns": [...], "rows": [[...], ...]}`, each key named once
+- `lines`: a header line, then one tab-separated line per object
+- `grouped` (tasks only): like `table`, with the rows grouped under their
+  project's id and name
+
+Without `fields`, the compact formats keep `TASK_COLUMNS` or
+`PROJECT_COLUMNS`. A task's `due` is flattened to its datetime or date;
+ask for the `due_string` column to get Todoist's human-readable version.
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from .models import to_plain
+
+FORMATS = ("json", "table", "lines", "grouped")
+TASK_COLUMNS = ("id", "content", "project_id", "priority", "due", "labels")
+PROJECT_COLUMNS = ("id", "name", "parent_id", "is_favorite")
+
+
+def check_format(format: Optional[str], grouped: bool = True) -> str:
+    """Validate a `format` argument, returning it (or the default)"""
+    format = (format or "json").strip().lower()
+    allowed = FORMATS if grouped else tuple(name for name in FORMATS if name != "grouped")
+    if format not in allowed:
+        raise ValueError(f"Unknown format {format!r}; use one of {', '.join(allowed)}")
+    return format
+
+
+def _due(item: Mapping[str, Any]) -> Any:
+    due = item.get("due")
+    return (due.get("datetime") or due.get("date")) if due else None
+
+
+def _due_string(item: Mapping[str, Any]) -> Any:
+    due = item.get("due")
+    return due.get("string") if due else None
+
+
+def _getter(name: str) -> Callable[[Mapping[str, Any]], Any]:
+    """Cell value of column `name` for one object"""
+    if name == "due":
+        return _due
+    if name == "due_string":
+        return _due_string
+
+    def get(item: Mapping[str, Any]) -> Any:
+        value = item.get(name)
+        return value if value is None or isinstance(value, (str, int, float)) else to_plain(value)
+
+    return get
+
+
+def rows(items: Iterable[Mapping[str, Any]], columns: Sequence[str]) -> List[List[Any]]:
+    getters = [_getter(name) for name in columns]
+    return [[get(item) for get in getters] for item in items]
+
+
+def _text(value: Any) -> str:
+    if value is None or value is False:
+        return ""
+    if value is True:
+        return "yes"
+    if isinstance(value, str):
+        # Keep each object on one line and each field in its column
+        return " ".join(value.split()) if "\t" in value or "\n" in value or "\r" in value else value
+    if isinstance(value, list):
+        return ",".join(str(v) for v in value)
+    return str(value)
+
+
+def lines(items: Iterable[Mapping[str, Any]], columns: Sequence[str]) -> str:
+    getters = [_getter(name) for name in columns]
+    output = ["\t".join(columns)]
+    output.extend("\t".join([_text(get(item)) for get in getters]) for item in items)
+    return "\n".join(output)
+
+
+def render_tasks(tasks: Iterable[Mapping[str, Any]], format: str, fields: Optional[List[str]] = None,
+                 projects: Iterable[Mapping[str, Any]] = ()) -> Any:
+    """Render tasks in a compact format (not `json`; see `task_query.project`)
+
+    `projects` supplies names and order for `grouped`.
+    """
+    columns = fields or TASK_COLUMNS
+    if format == "table":
+        return {"columns": list(columns), "rows": rows(tasks, columns)}
+    if format == "lines":
+        return lines(tasks, columns)
+
+    projects = list(projects)
+    groups: Dict[Optional[str], List[List[Any]]] = {project["id"]: [] for project in projects}
+    names = {project["id"]: project.get("name") for project in projects}
+    row_columns = [name for name in columns if name != "project_id"]
+    getters = [_getter(name) for name in row_columns]
+    for task in tasks:
+        groups.setdefault(task.get("project_id"), []).append([get(task) for get in getters])
+    return {
+        "columns": row_columns,
+        "projects": [
+            {"id": project_id, "name": names.get(project_id), "rows": group}
+            for project_id, group in groups.items() if group
+        ],
+    }
+
+
+def render_projects(projects: Iterable[Mapping[str, Any]], format: str,
+                    fields: Optional[List[str]] = None) -> Any:
+    """Render projects in a compact format (`table` or `lines`)"""
+    columns = fields or PROJECT_COLUMNS
+    if format == "table":
+        return {"columns": list(columns), "rows": rows(projects, columns)}
+    return lines(projects, columns)
+
+
+def as_text(result: Any) -> str:
+    """Resource body for a rendered result"""
+    if isinstance(result, str):
+        return result
+    return json.dumps(result, separators=(",", ":"), ensure_ascii=False, default=to_plain)
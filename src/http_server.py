@@ -1,25 +1,100 @@
 """
 HTTP-based Todoist MCP Server
+
+Besides the MCP endpoint, the app serves Prometheus metrics on `/metrics`
+and, when `TODOIST_WEBHOOK_SECRET` is set, receives Todoist webhooks (see
+`webhooks.py`). Responses are compressed with brotli or gzip when the
+client accepts it (see `compression.py`).
+
+`python -m src.http_server --workers N` runs N worker processes behind a
+session-affine router (see `worker_router.py`). In single-tenant mode that
+needs the sync replica turned off: every worker would otherwise sync its
+own copy of the one account, multiplying API usage by N.
 """
 
+import argparse
+from contextlib import asynccontextmanager
+
 import uvicorn
 from mcp.server.fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import Route
 
 # Import your existing server setup
-from .server import mcp
+from .compression import CompressionMiddleware
+from .config import CompressionSettings, ServerSettings, SyncSettings, WebhookSettings
+from .metrics import REGISTRY
+from .server import client_lifespan, client_pool, live_clients, mcp
+from .webhooks import WebhookReceiver
+
+APP = f"{__package__}.http_server:app"
+
 
-def run_http_server():
+def run_http_server(argv=None):
     """Run the MCP server over HTTP"""
-    # Run FastMCP with HTTP transport
-    uvicorn.run(
-        "todoist_mcp_server.http_server:app",
-        host="127.0.0.1",
-        port=8000,
-        log_level="info"
-    )
+    settings = ServerSettings.from_env()
+    parser = argparse.ArgumentParser(description="Todoist MCP server over streamable HTTP")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--workers", type=int, default=settings.workers)
+    parser.add_argument("--log-level", default=settings.log_level)
+    args = parser.parse_args(argv)
+    settings = ServerSettings(args.host, args.port, args.workers, args.log_level)
+
+    if settings.workers <= 1:
+        # Run FastMCP with HTTP transport
+        uvicorn.run(APP, host=settings.host, port=settings.port, log_level=settings.log_level)
+        return
+    if client_pool is None and SyncSettings.from_env().enabled:
+        # Sessions are spread over the workers, and each would keep a replica of the same account
+        parser.error("several workers in single-tenant mode would each sync their own replica; "
+                     "set TODOIST_SYNC_ENABLED=false (with TODOIST_STATE_BACKEND=sqlite to share "
+                     "the cache), enable TODOIST_MULTI_TENANT or use one worker")
+
+    from .worker_router import run_workers
+    # Every worker holds its own replica, so each needs every webhook
+    broadcast = [webhook_settings.path] if webhook_settings.enabled else []
+    run_workers(settings, APP, broadcast)
 
 # Get the HTTP app from FastMCP
-app = mcp.streamable_http_app
+app = mcp.streamable_http_app()
+
+# Keep the pooled Todoist transport open for the lifetime of the app rather
+# than for each MCP session
+_session_manager_lifespan = app.router.lifespan_context
+
+
+@asynccontextmanager
+async def _app_lifespan(starlette_app):
+    async with client_lifespan(mcp):
+        async with _session_manager_lifespan(starlette_app):
+            yield
+
+
+app.router.lifespan_context = _app_lifespan
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+app.router.routes.append(Route("/metrics", metrics_endpoint, methods=["GET"]))
+
+webhook_settings = WebhookSettings.from_env()
+if webhook_settings.enabled:
+    receiver = WebhookReceiver(webhook_settings.secret, live_clients, known_only=client_pool is not None)
+    app.router.routes.append(Route(webhook_settings.path, receiver.endpoint, methods=["POST"]))
+
+compression_settings = CompressionSettings.from_env()
+if compression_settings.enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=compression_settings.minimum_size,
+        gzip_level=compression_settings.gzip_level,
+        brotli_quality=compression_settings.brotli_quality,
+    )
 
 if __name__ == "__main__":
-    run_http_server()
\ No newline at end of file
+    run_http_server()
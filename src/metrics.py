@@ -0,0 +1,395 @@
+"""
+In-process metrics for the hot paths
+
+A small Prometheus-style registry of counters and histograms, recorded by
+the MCP handler wrappers in `server.py` and by every upstream request in
+`TodoistClient`. It answers "where did the time go" for a tool call: the
+whole MCP request (including FastMCP argument validation and result
+conversion), our handler, each upstream HTTP attempt, and JSON decoding.
+Response sizes are read from the content FastMCP has already serialized,
+and names a client sends that aren't registered are labelled `unknown`,
+so they can't add series without bound.
+
+The registry is exported in the Prometheus text format on `/metrics` by the
+HTTP server, and logged as periodic JSON summaries in stdio mode.
+"""
+
+import asyncio
+import bisect
+import functools
+import json
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+
+class Histogram:
+    """Bucketed distribution of observed values"""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Family:
+    """A named metric with one series per combination of label values"""
+
+    def __init__(self, registry: "Registry", kind: str, name: str, help: str,
+                 labels: Sequence[str], buckets: Sequence[float] = ()):
+        self.registry = registry
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series: Dict[LabelValues, Any] = {}
+
+    def labels(self, *values: str) -> Any:
+        series = self.series.get(values)
+        if series is None:
+            series = Histogram(self.buckets) if self.kind == "histogram" else Counter()
+            self.series[values] = series
+        return series
+
+    def observe(self, labels: LabelValues, value: float) -> None:
+        if self.registry.enabled:
+            self.labels(*labels).observe(value)
+            self.registry.updates += 1
+
+    def inc(self, labels: LabelValues, amount: float = 1.0) -> None:
+        if self.registry.enabled and amount:
+            self.labels(*labels).inc(amount)
+            self.registry.updates += 1
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Registry:
+    """Collection of metric families"""
+
+    def __init__(self):
+        self.enabled = True
+        self.updates = 0
+        self._families: Dict[str, Family] = {}
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Family:
+        return self._register(Family(self, "counter", name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Family:
+        return self._register(Family(self, "histogram", name, help, labels, buckets))
+
+    def _register(self, family: Family) -> Family:
+        self._families[family.name] = family
+        return family
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        for family in self._families.values():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for values, series in sorted(family.series.items()):
+                if family.kind == "counter":
+                    labels = _format_labels(family.label_names, values)
+                    lines.append(f"{family.name}{labels} {_format_number(series.value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(family.buckets + (float("inf"),), series.counts):
+                    cumulative += count
+                    labels = _format_labels(family.label_names, values, f'le="{_format_number(bound)}"')
+                    lines.append(f"{family.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(family.label_names, values)
+                lines.append(f"{family.name}_sum{labels} {_format_number(series.sum)}")
+                lines.append(f"{family.name}_count{labels} {series.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact JSON-friendly view: totals plus p50/p95 estimates per series"""
+        result: Dict[str, Any] = {}
+        for family in self._families.values():
+            entries = []
+            for values, series in sorted(family.series.items()):
+                entry: Dict[str, Any] = dict(zip(family.label_names, values))
+                if family.kind == "counter":
+                    entry["value"] = series.value
+                else:
+                    entry.update(
+                        count=series.count,
+                        sum=round(series.sum, 6),
+                        p50=series.quantile(0.5),
+                        p95=series.quantile(0.95),
+                    )
+                entries.append(entry)
+            if entries:
+                result[family.name] = entries
+        return result
+
+    def clear(self) -> None:
+        for family in self._families.values():
+            family.series.clear()
+        self.updates = 0
+
+
+REGISTRY = Registry()
+
+MCP_REQUEST_SECONDS = REGISTRY.histogram(
+    "mcp_request_seconds",
+    "MCP request latency including FastMCP validation and result conversion",
+    ("kind", "name"),
+)
+MCP_HANDLER_SECONDS = REGISTRY.histogram(
+    "mcp_handler_seconds",
+    "Latency of the registered tool, resource or prompt function",
+    ("kind", "name"),
+)
+MCP_RESPONSE_BYTES = REGISTRY.histogram(
+    "mcp_response_bytes",
+    "Size of the text returned by a tool, resource or prompt",
+    ("kind", "name"),
+    SIZE_BUCKETS,
+)
+MCP_ERRORS = REGISTRY.counter(
+    "mcp_errors_total",
+    "Tool, resource and prompt calls that raised",
+    ("kind", "name"),
+)
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    "todoist_http_request_seconds",
+    "Latency of each HTTP attempt against the Todoist API",
+    ("method", "endpoint", "status"),
+)
+UPSTREAM_CALL_SECONDS = REGISTRY.histogram(
+    "todoist_http_call_seconds",
+    "Latency of a Todoist API call including queueing and retries",
+    ("method", "endpoint"),
+)
+UPSTREAM_BYTES = REGISTRY.histogram(
+    "todoist_http_response_bytes",
+    "Size of Todoist API response bodies",
+    ("method", "endpoint"),
+    SIZE_BUCKETS,
+)
+UPSTREAM_RETRIES = REGISTRY.counter(
+    "todoist_http_retries_total",
+    "Retried Todoist API attempts",
+    ("method", "endpoint"),
+)
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "todoist_http_errors_total",
+    "Todoist API calls that failed after retries",
+    ("method", "endpoint"),
+)
+JSON_DECODE_SECONDS = REGISTRY.histogram(
+    "todoist_json_decode_seconds",
+    "Time spent decoding Todoist API response bodies",
+    ("endpoint",),
+)
+TENANT_CLIENTS = REGISTRY.counter(
+    "todoist_tenant_clients_total",
+    "Per-tenant clients created and evicted in multi-tenant mode",
+    ("event",),
+)
+WEBHOOK_EVENTS = REGISTRY.counter(
+    "todoist_webhook_events_total",
+    "Webhook deliveries by event name and outcome",
+    ("event", "outcome"),
+)
+BACKGROUND_REFRESHES = REGISTRY.counter(
+    "todoist_background_refreshes_total",
+    "Background refreshes and prefetches of hot data, by dataset and outcome",
+    ("dataset", "kind"),
+)
+OUTBOX_COMMANDS = REGISTRY.counter(
+    "todoist_outbox_commands_total",
+    "Outbox commands queued, flushed and failed, and batches retried",
+    ("type", "outcome"),
+)
+
+# Path segments that look like object IDs, so they don't explode label cardinality
+_ID_SEGMENT = re.compile(r"/(?=[^/]*\d)[A-Za-z0-9_-]{6,}")
+
+
+def endpoint_label(path: str) -> str:
+    """Normalize a URL path into a low-cardinality endpoint label"""
+    return _ID_SEGMENT.sub("/{id}", path)
+
+
+def _json_loads() -> Callable[[Any], Any]:
+    """`orjson.loads` when orjson is installed, else the standard library's"""
+    try:
+        import orjson
+    except ImportError:
+        return json.loads
+    return orjson.loads
+
+
+json_loads = _json_loads()
+
+
+def decode_json(response: Any) -> Any:
+    """Decode a response body as JSON, timed per endpoint"""
+    start = time.perf_counter()
+    data = json_loads(response.content)
+    JSON_DECODE_SECONDS.observe(
+        (endpoint_label(response.request.url.path),), time.perf_counter() - start
+    )
+    return data
+
+
+def _block_size(block: Any) -> int:
+    for field in ("text", "data", "blob", "content"):
+        value = getattr(block, field, None)
+        if isinstance(value, str):
+            return len(value.encode())
+        if isinstance(value, (bytes, bytearray)):
+            return len(value)
+        if value is not None and field == "content":
+            # A prompt message wraps its content block
+            return _block_size(value)
+    return 0
+
+
+def content_size(result: Any) -> int:
+    """Size in bytes of a result FastMCP has already serialized
+
+    Takes tool content blocks (alone or with structured output), resource
+    contents or a prompt result, and adds up their text and data without
+    serializing anything again.
+    """
+    if isinstance(result, tuple):
+        result = result[0]
+    messages = getattr(result, "messages", None)
+    if messages is not None:
+        result = messages
+    try:
+        return sum(_block_size(block) for block in result)
+    except TypeError:
+        return 0
+
+
+def record_response(kind: str, name: str, result: Any) -> None:
+    """Record the size of a serialized MCP response"""
+    if REGISTRY.enabled:
+        MCP_RESPONSE_BYTES.observe((kind, name), content_size(result))
+
+
+def instrument(kind: str, name: str, fn: Callable) -> Callable:
+    """Wrap a registered async handler to record latency and errors
+
+    `functools.wraps` keeps the signature and annotations intact, so FastMCP
+    derives the same schema from the wrapper as from the original function.
+    """
+    labels = (kind, name)
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception:
+            MCP_ERRORS.inc(labels)
+            raise
+        finally:
+            MCP_HANDLER_SECONDS.observe(labels, time.perf_counter() - start)
+        return result
+
+    return wrapper
+
+
+@asynccontextmanager
+async def timed_request(kind: str, name: str) -> AsyncIterator[None]:
+    """Time one MCP request end to end"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        MCP_REQUEST_SECONDS.observe((kind, name), time.perf_counter() - start)
+
+
+def log_summary(registry: Registry = REGISTRY) -> None:
+    logger.info("metrics %s", json.dumps(registry.summary(), separators=(",", ":")))
+
+
+async def _log_periodically(interval: float, registry: Registry) -> None:
+    logged = 0
+    while True:
+        await asyncio.sleep(interval)
+        # Stay quiet while idle
+        if registry.updates != logged:
+            logged = registry.updates
+            log_summary(registry)
+
+
+@asynccontextmanager
+async def logging_metrics(interval: float, registry: Registry = REGISTRY) -> AsyncIterator[None]:
+    """Structured-log fallback when there's no `/metrics` route to scrape
+
+    Logs a JSON summary every `interval` seconds (if anything changed) and
+    once more on exit. An interval of 0 disables logging.
+    """
+    if interval <= 0 or not registry.enabled:
+        yield
+        return
+    task = asyncio.ensure_future(_log_periodically(interval, registry))
+    try:
+        yield
+    finally:
+        task.cancel()
+        if registry.updates:
+            log_summary(registry)
@@ -0,0 +1,368 @@
+"""
+Compact task and project models
+
+Large accounts keep tens of thousands of tasks in the replica, and as plain
+dicts every task carries its own hash table plus its own copy of strings
+that repeat across the whole account. `Task`, `Due` and `Project` store
+their fields in `__slots__` instead:
+
+- short strings that repeat (project, section, parent and user IDs, label
+  names, due strings, dates and timezones, colors) are interned with
+  `sys.intern`, which frees them once no task or project uses them, so
+  discarded tenants and deleted tasks don't stay pinned in memory
+- the canonical task URL is derived from the ID rather than stored
+- keys a payload doesn't have are remembered in a bitmask, and unknown keys
+  are kept aside untouched, so a model converts back to exactly the dict
+  it came from (field order aside)
+
+Hot paths read fields as attributes (`task.priority`, `None` when the
+payload didn't have the key). The models also implement the read-only
+`Mapping` interface with the REST v2 field names, so code written against
+task dicts (`task['priority']`, `task.get('due')`) works unchanged. They
+are converted back to plain dicts with `to_plain()` wherever they leave the
+process (MCP results, snapshots, the shared cache).
+"""
+
+import sys
+from collections.abc import Mapping
+from operator import attrgetter
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+TASK_URL = "https://todoist.com/showTask?id={}"
+PROJECT_URL = "https://todoist.com/showProject?id={}"
+
+# Stands in for a stored task URL that is the canonical one for its ID
+_DERIVED: Any = type("Derived", (), {"__repr__": lambda self: "<derived>"})()
+
+# Longest string worth interning; longer ones (free-text due strings) rarely repeat
+MAX_INTERNED = 64
+
+
+def _intern(value: Any) -> Any:
+    """One shared copy of a short string, freed once no object uses it; other values as they are"""
+    if value.__class__ is str and len(value) <= MAX_INTERNED:
+        return sys.intern(value)
+    return value
+
+
+def _labels(value: Any) -> Any:
+    """Labels as a tuple of shared strings"""
+    if value is None:
+        return value
+    return tuple([_intern(label) for label in value])
+
+
+class Model(Mapping):
+    """Read-only mapping over slot fields, in the REST v2 shape"""
+
+    __slots__ = ("_absent", "_extra")
+
+    FIELDS: Tuple[str, ...] = ()
+    # Fields whose strings repeat across objects and are worth interning
+    INTERNED: frozenset = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls.FIELDS)
+        cls._bits = {name: 1 << index for index, name in enumerate(cls.FIELDS)}
+        cls._values = staticmethod(attrgetter(*cls.FIELDS))
+
+    @classmethod
+    def _missing(cls, data: Mapping) -> int:
+        """Bitmask of the fields `data` doesn't have"""
+        if cls._field_set.issubset(data):
+            return 0
+        mask = 0
+        for name, bit in cls._bits.items():
+            if name not in data:
+                mask |= bit
+        return mask
+
+    @classmethod
+    def _extras(cls, data: Mapping) -> Optional[Dict[str, Any]]:
+        """Keys of `data` that aren't fields, kept as they are"""
+        if cls._field_set.issuperset(data):
+            return None
+        return {key: value for key, value in data.items() if key not in cls._field_set}
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Model":
+        """Build a model from a REST-shaped dict (or return it if it is one)"""
+        if data.__class__ is cls:
+            return data
+        model = cls.__new__(cls)
+        get = data.get
+        for name in cls.FIELDS:
+            value = get(name)
+            if name in cls.INTERNED:
+                value = _intern(value)
+            setattr(model, name, value)
+        model._absent = cls._missing(data)
+        model._extra = cls._extras(data)
+        return model
+
+    def __getitem__(self, key: str) -> Any:
+        bit = self._bits.get(key)
+        if bit is not None:
+            if not self._absent & bit:
+                return getattr(self, key)
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        bit = self._bits.get(key)
+        if bit is not None:
+            return default if self._absent & bit else getattr(self, key)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __contains__(self, key: object) -> bool:
+        bit = self._bits.get(key)
+        if bit is not None:
+            return not self._absent & bit
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for name, bit in self._bits.items():
+            if not self._absent & bit:
+                yield name
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        count = len(self.FIELDS) - bin(self._absent).count("1")
+        return count + (len(self._extra) if self._extra is not None else 0)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The plain dict this model stands for"""
+        values = self._values(self)
+        if self._absent:
+            data = {
+                name: value for (name, bit), value in zip(self._bits.items(), values)
+                if not self._absent & bit
+            }
+        else:
+            data = dict(zip(self.FIELDS, values))
+        if self._extra is not None:
+            data.update(self._extra)
+        return data
+
+
+class Due(Model):
+    """A task's due date"""
+
+    FIELDS = ("date", "string", "lang", "is_recurring", "datetime", "timezone")
+    # `_deadline` holds the normalized deadline once worked out (see `due_dates.py`)
+    __slots__ = FIELDS + ("_deadline",)
+
+    date: Optional[str]
+    string: Optional[str]
+    lang: Optional[str]
+    is_recurring: Optional[bool]
+    datetime: Optional[str]
+    timezone: Optional[str]
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Due":
+        """Build a due date from a REST-shaped dict (or return it if it is one)"""
+        if data.__class__ is cls:
+            return data
+        return cls._build(data, split=False)
+
+    @classmethod
+    def from_item(cls, data: Dict[str, Any]) -> "Due":
+        """Convert a Sync API due date, splitting a timed `date` into `datetime`"""
+        return cls._build(data, split=True)
+
+    @classmethod
+    def _build(cls, data: Mapping, split: bool) -> "Due":
+        due = cls.__new__(cls)
+        get, intern = data.get, _intern
+        absent = cls._missing(data)
+        value = get("date")
+        if split and value.__class__ is str and "T" in value:
+            due.datetime = value
+            absent &= ~cls._bits["datetime"]
+            value = value[:10]
+        else:
+            due.datetime = get("datetime")
+        due.date = intern(value)
+        value = get("string")
+        due.string = intern(value)
+        value = get("lang")
+        due.lang = intern(value)
+        due.is_recurring = get("is_recurring")
+        value = get("timezone")
+        due.timezone = intern(value)
+        due._absent = absent
+        due._extra = cls._extras(data)
+        due._deadline = None
+        return due
+
+
+class Task(Model):
+    """A task in the REST v2 shape"""
+
+    FIELDS = (
+        "id", "content", "description", "project_id", "section_id", "parent_id", "labels",
+        "priority", "due", "duration", "order", "is_completed", "creator_id", "assignee_id",
+        "assigner_id", "created_at", "url",
+    )
+    __slots__ = tuple(name for name in FIELDS if name != "url") + ("_url",)
+
+    id: str
+    content: Optional[str]
+    description: Optional[str]
+    project_id: Optional[str]
+    section_id: Optional[str]
+    parent_id: Optional[str]
+    labels: Optional[Tuple[str, ...]]
+    priority: Optional[int]
+    due: Optional[Due]
+    duration: Optional[Dict[str, Any]]
+    order: Optional[int]
+    is_completed: Optional[bool]
+    creator_id: Optional[str]
+    assignee_id: Optional[str]
+    assigner_id: Optional[str]
+    created_at: Optional[str]
+
+    @property
+    def url(self) -> Optional[str]:
+        return TASK_URL.format(self.id) if self._url is _DERIVED else self._url
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Task":
+        """Build a task from a REST-shaped dict (or return it if it is one)"""
+        if data.__class__ is cls:
+            return data
+        task = cls.__new__(cls)
+        get, intern = data.get, _intern
+        task.id = get("id")
+        task.content = get("content")
+        task.description = get("description")
+        value = get("project_id")
+        task.project_id = intern(value)
+        value = get("section_id")
+        task.section_id = intern(value)
+        value = get("parent_id")
+        task.parent_id = intern(value)
+        task.labels = _labels(get("labels"))
+        task.priority = get("priority")
+        value = get("due")
+        task.due = Due.from_dict(value) if value and isinstance(value, Mapping) else value
+        task.duration = get("duration")
+        task.order = get("order")
+        task.is_completed = get("is_completed")
+        value = get("creator_id")
+        task.creator_id = intern(value)
+        value = get("assignee_id")
+        task.assignee_id = intern(value)
+        value = get("assigner_id")
+        task.assigner_id = intern(value)
+        task.created_at = get("created_at")
+        value = get("url")
+        task._url = _DERIVED if value == TASK_URL.format(task.id) else value
+        task._absent = cls._missing(data)
+        task._extra = cls._extras(data)
+        return task
+
+    @classmethod
+    def from_item(cls, item: Dict[str, Any]) -> "Task":
+        """Convert a Sync API item into a task"""
+        task = cls.__new__(cls)
+        intern = _intern
+        task.id = item["id"]
+        task.content = item.get("content", "")
+        task.description = item.get("description", "")
+        value = item.get("project_id")
+        task.project_id = intern(value)
+        value = item.get("section_id")
+        task.section_id = intern(value)
+        value = item.get("parent_id")
+        task.parent_id = intern(value)
+        task.labels = _labels(item.get("labels", ()))
+        task.priority = item.get("priority", 1)
+        due = item.get("due")
+        task.due = Due.from_item(due) if due else due
+        task.duration = item.get("duration")
+        task.order = item.get("child_order")
+        task.is_completed = bool(item.get("checked"))
+        value = item.get("added_by_uid")
+        task.creator_id = intern(value)
+        value = item.get("responsible_uid")
+        task.assignee_id = intern(value)
+        value = item.get("assigned_by_uid")
+        task.assigner_id = intern(value)
+        task.created_at = item.get("added_at")
+        task._url = _DERIVED
+        task._absent = 0
+        task._extra = None
+        return task
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = super().to_dict()
+        if self.labels.__class__ is tuple and "labels" in data:
+            data["labels"] = list(self.labels)
+        if self.due.__class__ is Due and "due" in data:
+            data["due"] = self.due.to_dict()
+        return data
+
+
+class Project(Model):
+    """A project in the REST v2 shape"""
+
+    FIELDS = (
+        "id", "name", "color", "parent_id", "order", "is_shared", "is_favorite",
+        "is_inbox_project", "is_team_inbox", "view_style", "url",
+    )
+    __slots__ = FIELDS
+    INTERNED = frozenset(("color", "parent_id", "view_style"))
+
+    id: str
+    name: Optional[str]
+    color: Optional[str]
+    parent_id: Optional[str]
+    order: Optional[int]
+    is_shared: Optional[bool]
+    is_favorite: Optional[bool]
+    is_inbox_project: Optional[bool]
+    is_team_inbox: Optional[bool]
+    view_style: Optional[str]
+    url: Optional[str]
+
+    @classmethod
+    def from_sync(cls, project: Dict[str, Any]) -> "Project":
+        """Convert a Sync API project"""
+        return cls.from_dict({
+            "id": project["id"],
+            "name": project.get("name", ""),
+            "color": project.get("color"),
+            "parent_id": project.get("parent_id"),
+            "order": project.get("child_order"),
+            "is_shared": bool(project.get("shared")),
+            "is_favorite": bool(project.get("is_favorite")),
+            "is_inbox_project": bool(project.get("inbox_project")),
+            "is_team_inbox": bool(project.get("team_inbox")),
+            "view_style": project.get("view_style"),
+            "url": PROJECT_URL.format(project["id"]),
+        })
+
+
+def to_plain(value: Any) -> Any:
+    """Convert models (and the tuples they hold) back to plain JSON values
+
+    Also usable as `json.dumps(..., default=to_plain)`.
+    """
+    if isinstance(value, Model):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return list(value)
+    if isinstance(value, list):
+        return [to_plain(item) for item in value]
+    return value
@@ -0,0 +1,400 @@
+"""
+Durable outbox for writes
+
+With the outbox enabled, `create_task`, `complete_task` and
+`create_project` don't wait for Todoist. Each write becomes a Sync API
+command that is stored in a small SQLite database, applied to the local
+replica and cache, and acknowledged once it is on disk. A background
+worker sends the queued commands in batches, so a burst of writes costs
+one round trip instead of one per write.
+
+Every command keeps the `uuid` it was queued with, and Todoist runs a
+given command uuid at most once, so resending a batch after a timeout, a
+crash or from a second worker can't create a task twice. Objects created
+while queued get a `temp_id` as their ID; once Todoist has run the command
+the temp id is mapped to the real ID, and queued commands and later tool
+calls that still use the temp id are rewritten.
+
+A batch that fails to send is retried with exponential backoff. Commands
+Todoist rejects, and those still failing after `max_attempts`, are marked
+failed, their local change is undone, and they are reported by the
+`outbox_status` tool. Queued commands survive a restart and are sent when
+the client is next opened.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import metrics
+from .config import OutboxSettings
+from .models import Model, Project, Task
+
+logger = logging.getLogger(__name__)
+
+# One Sync API request's worth of commands
+BATCH_SIZE = 100
+
+# Command arguments that may hold a temp id
+ID_ARGS = ("id", "project_id", "section_id", "parent_id")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commands (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    uuid TEXT NOT NULL UNIQUE,
+    command TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    queued_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS temp_ids (
+    temp_id TEXT PRIMARY KEY,
+    id TEXT NOT NULL
+);
+"""
+
+
+def outbox_path(directory: str, api_token: str) -> str:
+    """Per-account outbox file, named by a hash so the token isn't exposed"""
+    digest = hashlib.sha256(api_token.encode()).hexdigest()[:16]
+    return os.path.join(os.path.expanduser(directory), f"outbox-{digest}.sqlite3")
+
+
+def pending_task(command: Dict[str, Any], inbox_id: Optional[str]) -> Task:
+    """How a queued `item_add` looks until Todoist has run it"""
+    args = command["args"]
+    due = args.get("due")
+    return Task.from_dict({
+        "id": command["temp_id"],
+        "content": args["content"],
+        "description": args.get("description", ""),
+        "project_id": args.get("project_id") or inbox_id,
+        "section_id": args.get("section_id"),
+        "parent_id": args.get("parent_id"),
+        "labels": args.get("labels", []),
+        "priority": args.get("priority", 1),
+        "due": {"date": None, "string": due["string"], "lang": None, "is_recurring": False,
+                "datetime": None, "timezone": None} if due else None,
+        "duration": None,
+        "order": None,
+        "is_completed": False,
+        "creator_id": None,
+        "assignee_id": None,
+        "assigner_id": None,
+        "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "url": None,
+    })
+
+
+def pending_project(command: Dict[str, Any]) -> Project:
+    """How a queued `project_add` looks until Todoist has run it"""
+    args = command["args"]
+    return Project.from_dict({
+        "id": command["temp_id"],
+        "name": args["name"],
+        "color": args.get("color", "charcoal"),
+        "parent_id": args.get("parent_id"),
+        "order": None,
+        "is_shared": False,
+        "is_favorite": False,
+        "is_inbox_project": False,
+        "is_team_inbox": False,
+        "view_style": "list",
+        "url": None,
+    })
+
+
+class OutboxStore:
+    """SQLite file holding queued commands and the temp ids they resolved to
+
+    Every write is committed with `synchronous=FULL`, so a command that has
+    been acknowledged is still queued after a crash or power loss. Calls
+    block, so async callers run them in a worker thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def add(self, command: Dict[str, Any], queued_at: float) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO commands (uuid, command, queued_at) VALUES (?, ?, ?)",
+                    (command["uuid"], json.dumps(command), queued_at),
+                )
+
+    def load(self) -> Tuple[List[Tuple[Dict[str, Any], float]], Dict[str, str]]:
+        """Pending commands (oldest first, with when they were queued) and known temp ids"""
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(
+                "SELECT command, queued_at FROM commands WHERE status = 'pending' ORDER BY seq"
+            ).fetchall()
+            mapping = dict(conn.execute("SELECT temp_id, id FROM temp_ids"))
+        return [(json.loads(command), queued_at) for command, queued_at in rows], mapping
+
+    def finish(self, uuids: List[str], errors: Dict[str, str], mapping: Dict[str, str]) -> None:
+        """Drop commands Todoist ran, mark the rejected ones failed and record new IDs"""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO temp_ids VALUES (?, ?)", mapping.items())
+                conn.executemany(
+                    "UPDATE commands SET status = 'failed', error = ? WHERE uuid = ?",
+                    [(error, uuid) for uuid, error in errors.items()],
+                )
+                conn.executemany(
+                    "DELETE FROM commands WHERE uuid = ?",
+                    [(uuid,) for uuid in uuids if uuid not in errors],
+                )
+
+    def attempted(self, uuids: List[str], error: str) -> None:
+        """Count a failed attempt to send these commands"""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "UPDATE commands SET attempts = attempts + 1, error = ? WHERE uuid = ?",
+                    [(error, uuid) for uuid in uuids],
+                )
+
+    def failures(self, limit: int = 20) -> Tuple[int, List[Dict[str, Any]]]:
+        """How many commands failed, and the most recent of them"""
+        with self._lock:
+            conn = self._connect()
+            count = conn.execute("SELECT COUNT(*) FROM commands WHERE status = 'failed'").fetchone()[0]
+            rows = conn.execute(
+                "SELECT command, error, attempts, queued_at FROM commands WHERE status = 'failed' "
+                "ORDER BY seq DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return count, [
+            {**json.loads(command), "error": error, "attempts": attempts, "queued_at": queued_at}
+            for command, error, attempts, queued_at in rows
+        ]
+
+    def clear_failed(self) -> int:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                return conn.execute("DELETE FROM commands WHERE status = 'failed'").rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class Outbox:
+    """Queues a client's writes on disk and sends them to Todoist in the background"""
+
+    def __init__(self, client, store: OutboxStore, settings: OutboxSettings):
+        self.client = client
+        self.store = store
+        self.settings = settings
+        self.temp_ids: Dict[str, str] = {}
+        self.flushed = 0
+        self.last_flush: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+        # Pending commands, oldest first
+        self._queue: List[Dict[str, Any]] = []
+        self._queued_at: Dict[str, float] = {}
+        # What each pending command replaced locally, to put back if it fails
+        self._replaced: Dict[str, Model] = {}
+        self._attempts = 0
+        self._loaded = False
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._worker: Optional[asyncio.Future] = None
+
+    async def start(self) -> None:
+        """Load commands left over from a previous run and start the worker"""
+        if not self._loaded:
+            self._loaded = True
+            queued, self.temp_ids = await asyncio.to_thread(self.store.load)
+            for command, queued_at in queued:
+                self._queue.append(command)
+                self._queued_at[command["uuid"]] = queued_at
+                self._show(command)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run())
+        if self._queue:
+            self._wake.set()
+
+    async def aclose(self) -> None:
+        """Make a last attempt to send the queue, then stop the worker"""
+        if self._queue:
+            try:
+                await asyncio.wait_for(self.flush(), timeout=5.0)
+            except Exception:
+                logger.warning("Outbox not drained on close; %d commands stay queued", len(self._queue))
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        await asyncio.to_thread(self.store.close)
+
+    async def enqueue(self, command: Dict[str, Any]) -> Optional[Model]:
+        """Queue a command durably and apply it locally
+
+        Returns the object as it now looks locally (the new task or project,
+        or the task a close removed).
+        """
+        await self.start()
+        queued_at = time.time()
+        await asyncio.to_thread(self.store.add, command, queued_at)
+        self._queue.append(command)
+        self._queued_at[command["uuid"]] = queued_at
+        metrics.OUTBOX_COMMANDS.inc((command["type"], "queued"))
+        shown = self._show(command)
+        self._wake.set()
+        return shown
+
+    def _show(self, command: Dict[str, Any]) -> Optional[Model]:
+        shown = self.client._show_pending(command)
+        if command["type"] == "item_close" and shown is not None:
+            self._replaced[command["uuid"]] = shown
+        return shown
+
+    def reapply(self) -> None:
+        """Show pending commands again after the replica was reloaded or resynced"""
+        for command in self._queue:
+            self.client._show_pending(command)
+
+    def resolve(self, object_id: str) -> str:
+        """The real ID for a temp id Todoist has already mapped"""
+        return self.temp_ids.get(object_id, object_id)
+
+    def resolved(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        """`command` with every temp id that has been mapped replaced by the real ID"""
+        args = command["args"]
+        if not any(args.get(name) in self.temp_ids for name in ID_ARGS):
+            return command
+        args = dict(args)
+        for name in ID_ARGS:
+            if args.get(name) in self.temp_ids:
+                args[name] = self.temp_ids[args[name]]
+        return {**command, "args": args}
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            # Let writes made in quick succession share a request
+            await asyncio.sleep(self.settings.flush_interval)
+            while True:
+                try:
+                    if await self.flush():
+                        break
+                except Exception:
+                    logger.exception("Outbox flush failed")
+                await asyncio.sleep(self._backoff())
+
+    def _backoff(self) -> float:
+        delay = self.settings.retry_delay * 2 ** max(self._attempts - 1, 0)
+        return min(delay, self.settings.max_retry_delay) * random.uniform(0.5, 1.0)
+
+    async def flush(self) -> bool:
+        """Send everything queued now; False if a batch failed and will be retried"""
+        async with self._lock:
+            while self._queue:
+                if not await self._send(self._queue[:BATCH_SIZE]):
+                    return False
+            return True
+
+    async def _send(self, batch: List[Dict[str, Any]]) -> bool:
+        uuids = [command["uuid"] for command in batch]
+        try:
+            results = await self.client._execute([self.resolved(command) for command in batch])
+        except Exception as e:
+            self._attempts += 1
+            self.last_error = str(e) or type(e).__name__
+            if self._attempts < self.settings.max_attempts:
+                logger.warning("Outbox batch of %d failed (attempt %d): %s",
+                               len(batch), self._attempts, self.last_error)
+                metrics.OUTBOX_COMMANDS.inc(("batch", "retried"))
+                await asyncio.to_thread(self.store.attempted, uuids, self.last_error)
+                return False
+            # Give up on these commands rather than block everything queued after them
+            self._attempts = 0
+            await self._finish(batch, dict.fromkeys(uuids, self.last_error), {})
+            return True
+
+        self._attempts = 0
+        errors: Dict[str, str] = {}
+        mapping: Dict[str, str] = {}
+        for command, result in zip(batch, results):
+            if result["status"] != "ok":
+                errors[command["uuid"]] = result["error"]
+            elif command.get("temp_id") and result.get("id"):
+                mapping[command["temp_id"]] = result["id"]
+        await self._finish(batch, errors, mapping)
+        return True
+
+    async def _finish(self, batch: List[Dict[str, Any]], errors: Dict[str, str], mapping: Dict[str, str]) -> None:
+        await asyncio.to_thread(self.store.finish, [command["uuid"] for command in batch], errors, mapping)
+        self.temp_ids.update(mapping)
+        done = {command["uuid"] for command in batch}
+        self._queue = [command for command in self._queue if command["uuid"] not in done]
+        for command in batch:
+            error = errors.get(command["uuid"])
+            self._queued_at.pop(command["uuid"], None)
+            self.client._settle_pending(command, error, self._replaced.pop(command["uuid"], None))
+            if error is None:
+                self.flushed += 1
+                metrics.OUTBOX_COMMANDS.inc((command["type"], "flushed"))
+            else:
+                metrics.OUTBOX_COMMANDS.inc((command["type"], "failed"))
+                logger.warning("Queued %s failed: %s", command["type"], error)
+        self.last_flush = time.time()
+
+    async def clear_failed(self) -> int:
+        """Forget commands that failed; returns how many were dropped"""
+        return await asyncio.to_thread(self.store.clear_failed)
+
+    async def stats(self) -> Dict[str, Any]:
+        failed, failures = await asyncio.to_thread(self.store.failures)
+        oldest = min(self._queued_at.values(), default=None)
+        return {
+            "enabled": True,
+            "pending": len(self._queue),
+            "oldest_pending_seconds": round(time.time() - oldest, 3) if oldest is not None else None,
+            "retrying": self._attempts > 0,
+            "attempts": self._attempts,
+            "flushed": self.flushed,
+            "failed": failed,
+            "seconds_since_flush": (
+                round(time.time() - self.last_flush, 3) if self.last_flush is not None else None
+            ),
+            "last_error": self.last_error,
+            "failures": failures,
+        }
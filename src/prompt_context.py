@@ -0,0 +1,149 @@
+"""
+Incrementally maintained prompt contexts
+
+The planning and review prompts are requested on every agent turn, but the
+workspace rarely changes between turns. `PromptContext` follows a
+`TaskStore` and keeps what those prompts need up to date as tasks change,
+instead of regrouping every task on each call:
+
+- each project's block of rendered task bullets, rebuilt only for the
+  projects a change touched
+- per-project counts of high-priority tasks
+- overdue counts per project, recomputed only when the store or the set of
+  overdue tasks changes
+
+Whole rendered prompts are memoized with `memo()` until the store changes
+or the caller's key (e.g. project names) does. Output is assembled with
+`PromptBuilder`, which joins parts once instead of concatenating strings
+in loops.
+"""
+
+from itertools import islice
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from .task_store import Task, TaskStore
+
+PRIORITY_INDICATORS = {4: "🔴", 3: "🟡", 2: "🟢"}
+
+
+def priority_indicator(priority: int) -> str:
+    return PRIORITY_INDICATORS.get(priority, "⚪")
+
+
+def task_line(task: Task) -> str:
+    """A task as a Markdown bullet with its priority and due date"""
+    due_info = f" (Due: {task.due.string})" if task.due else ""
+    return f"- {priority_indicator(task.priority)} {task.content}{due_info}\n"
+
+
+class PromptBuilder:
+    """Collects prompt fragments and joins them once"""
+
+    def __init__(self, *parts: str):
+        self._parts: List[str] = list(parts)
+
+    def add(self, *parts: str) -> "PromptBuilder":
+        self._parts.extend(parts)
+        return self
+
+    def line(self, text: str = "") -> "PromptBuilder":
+        self._parts.append(text)
+        self._parts.append("\n")
+        return self
+
+    def build(self) -> str:
+        return "".join(self._parts)
+
+
+class PromptContext:
+    """Prompt aggregates and rendered sections kept current with a `TaskStore`"""
+
+    def __init__(self, store: TaskStore):
+        self.store = store
+        self._blocks: Dict[Optional[str], str] = {}
+        self._dirty: Set[Optional[str]] = set()
+        # Built on first use, then maintained
+        self._high_priority: Optional[Dict[Optional[str], int]] = None
+        self._overdue: Optional[Tuple[Tuple[int, int], Dict[Optional[str], int]]] = None
+        self._memo: Dict[str, Tuple[Hashable, Any]] = {}
+        store.subscribe(self._changed)
+
+    def close(self) -> None:
+        """Stop following the store"""
+        self.store.unsubscribe(self._changed)
+
+    def _count(self, task: Task, delta: int) -> None:
+        if self._high_priority is not None and (task.priority or 1) >= 3:
+            project_id = task.project_id
+            self._high_priority[project_id] = self._high_priority.get(project_id, 0) + delta
+
+    def _changed(self, previous: Optional[Task], current: Optional[Task]) -> None:
+        if previous is None and current is None:
+            self._blocks.clear()
+            self._dirty.clear()
+            self._high_priority = None
+            return
+        if previous is not None:
+            self._dirty.add(previous.project_id)
+            self._count(previous, -1)
+        if current is not None:
+            self._dirty.add(current.project_id)
+            self._count(current, 1)
+
+    def project_block(self, project_id: Optional[str]) -> str:
+        """Bullets for every task in a project, rebuilt only after it changes"""
+        if project_id in self._dirty:
+            self._dirty.discard(project_id)
+            self._blocks.pop(project_id, None)
+        block = self._blocks.get(project_id)
+        if block is None:
+            block = self._blocks[project_id] = "".join(
+                [task_line(task) for task in self.store.iter_by_project(project_id)]
+            )
+        return block
+
+    def project_lines(self, project_id: Optional[str], limit: int) -> List[str]:
+        """Bullets for the first `limit` tasks of a project"""
+        return [task_line(task) for task in islice(self.store.iter_by_project(project_id), limit)]
+
+    def top(self, priority: int, limit: int) -> List[Task]:
+        """The first `limit` tasks of a priority"""
+        return list(islice(self.store.iter_by_priority(priority), limit))
+
+    def high_priority(self, project_id: Optional[str]) -> int:
+        """Tasks of priority 3 or 4 in a project"""
+        if self._high_priority is None:
+            counts: Dict[Optional[str], int] = {}
+            # Only priority 3 and 4 tasks count, and the priority index finds them
+            for priority in (3, 4):
+                for task in self.store.iter_by_priority(priority):
+                    counts[task.project_id] = counts.get(task.project_id, 0) + 1
+            self._high_priority = counts
+        return self._high_priority.get(project_id, 0)
+
+    def overdue_by_project(self, now: Optional[float] = None) -> Dict[Optional[str], int]:
+        """Overdue task counts per project
+
+        Overdue tasks are a prefix of the store's due index, so the counts
+        only change when the store does or that prefix grows.
+        """
+        # Counting first re-indexes relative dues, which can bump the version
+        overdue = self.store.overdue_count(now)
+        stamp = (self.store.version, overdue)
+        if self._overdue is None or self._overdue[0] != stamp:
+            counts: Dict[Optional[str], int] = {}
+            for task in self.store.overdue(now):
+                project_id = task.project_id
+                counts[project_id] = counts.get(project_id, 0) + 1
+            self._overdue = (stamp, counts)
+        return self._overdue[1]
+
+    def memo(self, name: str, key: Hashable, render: Callable[[], Any]) -> Any:
+        """`render()`, reused until the store or `key` changes"""
+        stamp = (self.store.version, key)
+        cached = self._memo.get(name)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        value = render()
+        self._memo[name] = (stamp, value)
+        return value
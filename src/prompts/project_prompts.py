@@ -4,45 +4,64 @@ Project management prompts for Todoist MCP server
 
 from typing import Dict, Any, Optional
 
+from ..models import Task
+from ..prompt_context import PromptBuilder, task_line
 
-def register_project_prompts(mcp, todoist_client):
+
+def register_project_prompts(mcp, get_client):
     """Register project-related prompts with the MCP server"""
     
     @mcp.prompt()
     async def project_planning(project_name: str) -> str:
         """Generate a project planning prompt for a new or existing project"""
         try:
-            projects = await todoist_client.get_projects()
-            existing_project = next((p for p in projects if p['name'].lower() == project_name.lower()), None)
+            todoist_client = get_client()
+            context_result = None
+            if todoist_client.sync is not None:
+                # The replica is local: look the project up and index its tasks
+                # together rather than waiting for the lookup
+                project_result, context_result = await todoist_client.gather(
+                    todoist_client.find_project(project_name),
+                    todoist_client.get_prompt_context()
+                )
+                existing_project = project_result.unwrap()
+            else:
+                existing_project = await todoist_client.find_project(project_name)
             
             if existing_project:
-                # Get tasks for this project
-                tasks = await todoist_client.get_tasks(project_id=existing_project['id'])
+                if context_result is not None:
+                    # Only the first 10 tasks are listed, so don't materialize the rest
+                    context = context_result.unwrap()
+                    task_count = context.store.project_size(existing_project['id'])
+                    task_lines = context.project_lines(existing_project['id'], 10)
+                else:
+                    # Fetch just this project's tasks, not the whole account
+                    tasks = await todoist_client.get_tasks(project_id=existing_project['id'])
+                    task_count = len(tasks)
+                    task_lines = [task_line(Task.from_dict(task)) for task in tasks[:10]]
                 
-                prompt = f"""# Project Planning: {project_name}
+                prompt = PromptBuilder(f"""# Project Planning: {project_name}
 
 ## Current Project Status
 - **Project ID**: {existing_project['id']}
-- **Active Tasks**: {len(tasks)}
+- **Active Tasks**: {task_count}
 
 ### Existing Tasks
-"""
-                for task in tasks[:10]:  # Limit to first 10 tasks
-                    priority_indicator = "🔴" if task['priority'] == 4 else "🟡" if task['priority'] == 3 else "🟢" if task['priority'] == 2 else "⚪"
-                    due_info = f" (Due: {task['due']['string']})" if task.get('due') else ""
-                    prompt += f"- {priority_indicator} {task['content']}{due_info}\n"
+""")
+                prompt.add(*task_lines)
                 
-                if len(tasks) > 10:
-                    prompt += f"... and {len(tasks) - 10} more tasks\n"
+                if task_count > 10:
+                    prompt.line(f"... and {task_count - 10} more tasks")
                 
-                prompt += """
+                prompt.add("""
 ## Project Review Questions
 1. What is the current status of this project?
 2. What are the next key milestones?
 3. Are there any blockers or dependencies?
 4. What tasks can be completed this week?
 5. Should any tasks be reprioritized or rescheduled?
-"""
+""")
+                return prompt.build()
             else:
                 prompt = f"""# New Project Planning: {project_name}
 
@@ -80,39 +99,44 @@ Please help me structure this project with specific, actionable tasks that can b
     async def project_review() -> str:
         """Generate a comprehensive project review prompt"""
         try:
-            projects = await todoist_client.get_projects()
-            all_tasks = await todoist_client.get_tasks()
+            todoist_client = get_client()
+            projects_result, context_result = await todoist_client.gather(
+                todoist_client.get_projects(),
+                todoist_client.get_prompt_context()
+            )
+            projects = projects_result.unwrap()
+            context = context_result.unwrap()
             
-            # Analyze tasks by project
-            project_stats = {}
-            for project in projects:
-                project_tasks = [t for t in all_tasks if t.get('project_id') == project['id']]
-                high_priority_tasks = [t for t in project_tasks if t['priority'] >= 3]
-                overdue_tasks = [t for t in project_tasks if t.get('due') and 'overdue' in str(t.get('due', {}))]
-                
-                project_stats[project['name']] = {
-                    'total_tasks': len(project_tasks),
-                    'high_priority': len(high_priority_tasks),
-                    'overdue': len(overdue_tasks),
-                    'id': project['id']
-                }
+            # Overdue counts per project, recounted only when the overdue set changes
+            overdue_by_project = context.overdue_by_project()
             
-            prompt = """# Project Portfolio Review
+            def render() -> str:
+                # Analyze tasks by project from the maintained counts
+                project_stats = {}
+                for project in projects:
+                    project_stats[project['name']] = {
+                        'total_tasks': context.store.project_size(project['id']),
+                        'high_priority': context.high_priority(project['id']),
+                        'overdue': overdue_by_project.get(project['id'], 0),
+                        'id': project['id']
+                    }
+                
+                prompt = PromptBuilder("""# Project Portfolio Review
 
 ## Overview
-"""
-            
-            for project_name, stats in project_stats.items():
-                status_emoji = "🔴" if stats['overdue'] > 0 else "🟡" if stats['high_priority'] > 0 else "🟢"
-                prompt += f"- {status_emoji} **{project_name}**: {stats['total_tasks']} tasks"
+""")
                 
-                if stats['high_priority'] > 0:
-                    prompt += f" ({stats['high_priority']} high priority)"
-                if stats['overdue'] > 0:
-                    prompt += f" ({stats['overdue']} overdue)"
-                prompt += "\n"
-            
-            prompt += """
+                for project_name, stats in project_stats.items():
+                    status_emoji = "🔴" if stats['overdue'] > 0 else "🟡" if stats['high_priority'] > 0 else "🟢"
+                    prompt.add(f"- {status_emoji} **{project_name}**: {stats['total_tasks']} tasks")
+                    
+                    if stats['high_priority'] > 0:
+                        prompt.add(f" ({stats['high_priority']} high priority)")
+                    if stats['overdue'] > 0:
+                        prompt.add(f" ({stats['overdue']} overdue)")
+                    prompt.add("\n")
+                
+                prompt.add("""
 ## Review Framework
 
 ### Health Check
@@ -135,9 +159,11 @@ Please help me structure this project with specific, actionable tasks that can b
 2. What tasks should be reprioritized across projects?
 3. How can I better balance my project portfolio?
 
-Please help me analyze this project portfolio and suggest improvements to my project management approach."""
+Please help me analyze this project portfolio and suggest improvements to my project management approach.""")
+                return prompt.build()
             
-            return prompt
+            key = (tuple((p['id'], p['name']) for p in projects), context.store.overdue_count())
+            return context.memo("project_review", key, render)
             
         except Exception as e:
             return f"Error generating project review prompt: {str(e)}"
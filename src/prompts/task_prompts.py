@@ -4,51 +4,55 @@ Task-related prompts for Todoist MCP server
 
 from typing import Dict, Any, Optional
 
+from ..prompt_context import PromptBuilder
 
-def register_task_prompts(mcp, todoist_client):
+
+def register_task_prompts(mcp, get_client):
     """Register task-related prompts with the MCP server"""
     
     @mcp.prompt()
     async def daily_planning() -> str:
         """Generate a daily planning prompt with current tasks"""
         try:
-            tasks = await todoist_client.get_tasks()
-            projects = await todoist_client.get_projects()
-            
-            # Get project names for reference
-            project_map = {p['id']: p['name'] for p in projects}
+            todoist_client = get_client()
+            context_result, projects_result = await todoist_client.gather(
+                todoist_client.get_prompt_context(),
+                todoist_client.get_projects()
+            )
+            context = context_result.unwrap()
             
-            # Organize tasks by project
-            tasks_by_project = {}
-            for task in tasks:
-                project_id = task.get('project_id')
-                project_name = project_map.get(project_id, 'Inbox')
-                if project_name not in tasks_by_project:
-                    tasks_by_project[project_name] = []
-                tasks_by_project[project_name].append(task)
+            # Get project names for reference; they are cosmetic, so fall back
+            # to project IDs rather than failing if projects couldn't be fetched
+            project_map = {p['id']: p['name'] for p in projects_result.value_or([])}
+            default_name = 'Inbox' if projects_result.ok else None
             
-            prompt = """# Daily Planning Session
+            def render() -> str:
+                # Organize tasks by project using the project index
+                project_ids_by_name = {}
+                for project_id in context.store.project_ids():
+                    project_name = project_map.get(project_id, default_name or f"Project {project_id}")
+                    project_ids_by_name.setdefault(project_name, []).append(project_id)
+                
+                prompt = PromptBuilder("""# Daily Planning Session
 
 ## Current Tasks Overview
-"""
-            
-            for project_name, project_tasks in tasks_by_project.items():
-                prompt += f"\n### {project_name}\n"
-                for task in project_tasks:
-                    priority_indicator = "🔴" if task['priority'] == 4 else "🟡" if task['priority'] == 3 else "🟢" if task['priority'] == 2 else "⚪"
-                    due_info = f" (Due: {task['due']['string']})" if task.get('due') else ""
-                    prompt += f"- {priority_indicator} {task['content']}{due_info}\n"
-            
-            prompt += """
+""")
+                for project_name, project_ids in project_ids_by_name.items():
+                    prompt.add(f"\n### {project_name}\n")
+                    prompt.add(*(context.project_block(project_id) for project_id in project_ids))
+                
+                prompt.add("""
 ## Planning Questions
 1. What are your top 3 priorities for today?
 2. Which tasks can be completed quickly (< 15 minutes)?
 3. Are there any tasks that should be rescheduled or delegated?
 4. What new tasks need to be added for today?
 
-Please help me prioritize and organize these tasks for maximum productivity."""
+Please help me prioritize and organize these tasks for maximum productivity.""")
+                return prompt.build()
             
-            return prompt
+            # Reused until a task or project name changes
+            return context.memo("daily_planning", (tuple(project_map.items()), default_name), render)
             
         except Exception as e:
             return f"Error generating daily planning prompt: {str(e)}"
@@ -83,14 +87,21 @@ This breakdown will help me create individual tasks in Todoist for better tracki
     async def weekly_review() -> str:
         """Generate a weekly review prompt with task completion analysis"""
         try:
-            tasks = await todoist_client.get_tasks()
-            projects = await todoist_client.get_projects()
+            todoist_client = get_client()
+            context_result, projects_result = await todoist_client.gather(
+                todoist_client.get_prompt_context(),
+                todoist_client.get_projects()
+            )
+            context = context_result.unwrap()
+            store = context.store
+            project_count = len(projects_result.value) if projects_result.ok else "unknown"
             
-            prompt = f"""# Weekly Review
+            def render() -> str:
+                prompt = PromptBuilder(f"""# Weekly Review
 
 ## Current Status
-- **Active Tasks**: {len(tasks)}
-- **Active Projects**: {len(projects)}
+- **Active Tasks**: {len(store)}
+- **Active Projects**: {project_count}
 
 ## Review Questions
 
@@ -110,26 +121,27 @@ This breakdown will help me create individual tasks in Todoist for better tracki
 3. Should any projects be restructured or broken down differently?
 
 ## Current Task Summary
-"""
-            
-            # Group tasks by priority
-            high_priority = [t for t in tasks if t['priority'] == 4]
-            medium_priority = [t for t in tasks if t['priority'] == 3]
-            low_priority = [t for t in tasks if t['priority'] <= 2]
-            
-            if high_priority:
-                prompt += f"\n### High Priority ({len(high_priority)} tasks)\n"
-                for task in high_priority[:5]:  # Limit to first 5
-                    prompt += f"- {task['content']}\n"
-            
-            if medium_priority:
-                prompt += f"\n### Medium Priority ({len(medium_priority)} tasks)\n"
-                for task in medium_priority[:5]:  # Limit to first 5
-                    prompt += f"- {task['content']}\n"
-            
-            prompt += f"\n### Other Tasks: {len(low_priority)} remaining\n"
+""")
+                
+                # Group tasks by priority
+                high_count = store.priority_size(4)
+                medium_count = store.priority_size(3)
+                low_priority_count = len(store) - high_count - medium_count
+                
+                if high_count:
+                    prompt.add(f"\n### High Priority ({high_count} tasks)\n")
+                    for task in context.top(4, 5):  # Limit to first 5
+                        prompt.line(f"- {task['content']}")
+                
+                if medium_count:
+                    prompt.add(f"\n### Medium Priority ({medium_count} tasks)\n")
+                    for task in context.top(3, 5):  # Limit to first 5
+                        prompt.line(f"- {task['content']}")
+                
+                prompt.add(f"\n### Other Tasks: {low_priority_count} remaining\n")
+                return prompt.build()
             
-            return prompt
+            return context.memo("weekly_review", project_count, render)
             
         except Exception as e:
             return f"Error generating weekly review prompt: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""
+Background refresh of hot data
+
+The planning and review prompts read the full task and project lists on
+every call, and an agent that has just looked a project up usually asks
+for its tasks next. `Refresher` keeps that data warm so such reads are
+served locally instead of waiting on Todoist:
+
+- with the sync engine, the replica is synced in the background once it is
+  `ahead` of the way through its refresh interval, and a replica that went
+  stale only recently is served while it catches up (see `sync_engine.py`)
+- without it, cache keys that reads keep asking for are refetched before
+  they expire, and `prefetch()` loads a key (e.g. a project's tasks) that
+  is likely to be read next
+
+Refreshes run in the scheduler's background lane, so interactive calls go
+first. They stop once the server has been idle for `idle_timeout` seconds
+(the next read wakes them), and are skipped while the rate-limit bucket is
+paused or below `min_budget` of its capacity.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from . import metrics
+from .cache import CacheKey
+from .config import RefreshSettings
+from .scheduler import Priority, request_priority
+
+logger = logging.getLogger(__name__)
+
+# Cache keys tracked as hot, least recently read dropped first
+MAX_HOT_KEYS = 32
+# Bounds on how long the worker sleeps between checks
+MIN_CHECK = 0.05
+MAX_CHECK = 30.0
+# How soon to look again after skipping for a low rate-limit budget
+BUDGET_RECHECK = 5.0
+
+
+class Refresher:
+    """Refreshes a client's hot data ahead of expiry while the server is in use"""
+
+    def __init__(self, client, settings: RefreshSettings, clock: Callable[[], float] = time.monotonic):
+        self.client = client
+        self.settings = settings
+        self._clock = clock
+        self.last_active: Optional[float] = None
+        self._hot: "OrderedDict[CacheKey, float]" = OrderedDict()
+        self._loading: Dict[CacheKey, asyncio.Future] = {}
+        self._wake = asyncio.Event()
+        self._worker: Optional[asyncio.Future] = None
+        self.refreshes = 0
+        self.prefetches = 0
+        self.skipped_budget = 0
+        self.failures = 0
+
+    def start(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run())
+
+    async def aclose(self) -> None:
+        tasks = [task for task in (self._worker, *self._loading.values()) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker = None
+        self._loading.clear()
+
+    def _idle(self, now: float) -> bool:
+        return self.last_active is None or now - self.last_active > self.settings.idle_timeout
+
+    def note(self, key: Optional[CacheKey] = None) -> None:
+        """Record an interactive read (of `key`, when it is a cache key)"""
+        now = self._clock()
+        was_idle = self._idle(now)
+        self.last_active = now
+        # With the sync engine, the replica covers every key
+        if key is not None and self.client.sync is None and self.client.cache is not None:
+            self._hot[key] = now
+            self._hot.move_to_end(key)
+            while len(self._hot) > MAX_HOT_KEYS:
+                self._hot.popitem(last=False)
+        self.start()
+        if was_idle:
+            self._wake.set()
+
+    def prefetch(self, key: CacheKey) -> None:
+        """Load `key` into the cache in the background unless it is already there"""
+        if self.client.cache is None or self.client.is_cached(key):
+            return
+        self._load(key, "prefetch")
+
+    def _budget_low(self) -> bool:
+        scheduler = self.client.scheduler
+        tokens, paused_for = scheduler.bucket.state()
+        if paused_for > 0:
+            return True
+        return tokens is not None and tokens < self.settings.min_budget * scheduler.capacity
+
+    def _load(self, key: CacheKey, kind: str) -> None:
+        if key in self._loading:
+            return
+
+        async def load() -> None:
+            try:
+                with request_priority(Priority.BACKGROUND):
+                    await self.client._fetch(key)
+                if kind == "prefetch":
+                    self.prefetches += 1
+                else:
+                    self.refreshes += 1
+                metrics.BACKGROUND_REFRESHES.inc((key[0], kind))
+            except Exception as e:
+                self.failures += 1
+                metrics.BACKGROUND_REFRESHES.inc((key[0], "failed"))
+                logger.warning("Background %s of %s failed: %s", kind, key[0], e)
+            finally:
+                self._loading.pop(key, None)
+
+        self._loading[key] = asyncio.ensure_future(load())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                delay = self._check()
+            except Exception:
+                logger.exception("Background refresh check failed")
+                delay = MAX_CHECK
+            self._wake.clear()
+            if delay is None:
+                # Idle: sleep until the next read
+                await self._wake.wait()
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _check(self) -> Optional[float]:
+        """Start the refreshes that are due; seconds until the next check, None when idle"""
+        now = self._clock()
+        if self._idle(now):
+            return None
+        if self._budget_low():
+            self.skipped_budget += 1
+            metrics.BACKGROUND_REFRESHES.inc(("all", "skipped_budget"))
+            return BUDGET_RECHECK
+        ahead = self.settings.ahead
+
+        sync = self.client.sync
+        if sync is not None:
+            interval = sync.interval
+            if interval <= 0:
+                return MAX_CHECK
+            if sync.age is None:
+                # Not loaded yet; the first read does that
+                return min(max(ahead * interval, MIN_CHECK), MAX_CHECK)
+            due_in = ahead * interval - sync.age
+            if due_in <= 0:
+                sync.refresh_in_background(min_age=ahead * interval)
+                self.refreshes += 1
+                metrics.BACKGROUND_REFRESHES.inc(("replica", "refresh"))
+                due_in = ahead * interval
+            return min(max(due_in, MIN_CHECK), MAX_CHECK)
+
+        next_check = MAX_CHECK
+        for key, used_at in list(self._hot.items()):
+            if now - used_at > self.settings.idle_timeout:
+                del self._hot[key]
+                continue
+            ttl = self.client.ttl(key)
+            if ttl <= 0:
+                del self._hot[key]
+                continue
+            remaining = self.client.cache.ttl_remaining(key)
+            due_in = remaining - (1 - ahead) * ttl if remaining is not None else 0.0
+            if due_in <= 0:
+                self._load(key, "refresh")
+                due_in = ahead * ttl
+            next_check = min(next_check, due_in)
+        return max(next_check, MIN_CHECK)
+
+    def stats(self) -> Dict[str, Any]:
+        now = self._clock()
+        return {
+            "enabled": True,
+            "idle": self._idle(now),
+            "seconds_since_read": round(now - self.last_active, 3) if self.last_active is not None else None,
+            "hot_keys": len(self._hot),
+            "loading": len(self._loading),
+            "refreshes": self.refreshes,
+            "prefetches": self.prefetches,
+            "skipped_low_budget": self.skipped_budget,
+            "failures": self.failures,
+        }
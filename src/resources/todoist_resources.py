@@ -1,29 +1,89 @@
 """
 Resource handlers for Todoist MCP server
+
+Task lists are rendered through a generator pipeline, one line per task.
+Besides the full `todoist://tasks` and `todoist://project/{project_id}/tasks`
+resources, paged variants (`.../tasks/page/{page}`) render a fixed-size
+slice, so memory use and time to first byte stay flat however large the
+account is.
+
+`todoist://tasks/{format}`, `todoist://projects/{format}` and
+`todoist://project/{project_id}/tasks/{format}` serve the same lists in one
+of the compact formats in `formats.py` (`table`, `lines`, `grouped`) or as
+full JSON (`json`).
 """
 
-from typing import Dict, List, Any
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Any
+
+from .. import formats
+
+
+def _task_lines(tasks: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Render tasks one line at a time"""
+    for task in tasks:
+        task_info = f"- {task['content']} (ID: {task['id']}, Priority: {task['priority']})"
+        if task.get('due'):
+            task_info += f" - Due: {task['due']['string']}"
+        yield task_info
+
+
+def _render_page(title: str, tasks: Iterator[Dict[str, Any]], total: int,
+                 page: str, page_size: int, next_uri: str) -> str:
+    """Render one page of a task listing, streaming only that page's tasks"""
+    try:
+        page_number = int(page)
+    except ValueError:
+        return f"Invalid page {page!r}; pages are numbered from 1"
+    page_count = max((total + page_size - 1) // page_size, 1)
+    if page_number < 1 or page_number > page_count:
+        return f"Page {page_number} is out of range; there are {page_count} pages"
+
+    start = (page_number - 1) * page_size
+    lines = _task_lines(islice(tasks, start, start + page_size))
+    output = f"{title} (page {page_number} of {page_count}, {total} total):\n" + "\n".join(lines)
+    if page_number < page_count:
+        output += f"\n\nNext page: {next_uri.format(page=page_number + 1)}"
+    return output
 
 
-def register_todoist_resources(mcp, todoist_client):
+def register_todoist_resources(mcp, get_client):
     """Register Todoist resources with the MCP server"""
     
     @mcp.resource("todoist://tasks")
     async def get_tasks_resource() -> str:
         """Get all tasks as a resource"""
         try:
-            tasks = await todoist_client.get_tasks()
-            if not tasks:
+            todoist_client = get_client()
+            store = await todoist_client.get_task_store()
+            if not len(store):
                 return "No tasks found"
             
-            task_list = []
-            for task in tasks:
-                task_info = f"- {task['content']} (ID: {task['id']}, Priority: {task['priority']})"
-                if task.get('due'):
-                    task_info += f" - Due: {task['due']['string']}"
-                task_list.append(task_info)
+            return f"Todoist Tasks ({len(store)} total):\n" + "\n".join(_task_lines(store))
+        except Exception as e:
+            return f"Error fetching tasks: {str(e)}"
+    
+    @mcp.resource("todoist://tasks/page/{page}")
+    async def get_tasks_page_resource(page: str) -> str:
+        """Get one page of tasks as a resource"""
+        try:
+            todoist_client = get_client()
+            page_size = todoist_client.settings.resource_page_size
+            store = await todoist_client.get_task_store()
+            if not len(store):
+                return "No tasks found"
             
-            return f"Todoist Tasks ({len(tasks)} total):\n" + "\n".join(task_list)
+            return _render_page("Todoist Tasks", iter(store), len(store), page, page_size,
+                                "todoist://tasks/page/{page}")
+        except Exception as e:
+            return f"Error fetching tasks: {str(e)}"
+    
+    @mcp.resource("todoist://tasks/{format}")
+    async def get_tasks_formatted_resource(format: str) -> str:
+        """Get all tasks in a compact format (table, lines, grouped or json)"""
+        try:
+            todoist_client = get_client()
+            return formats.as_text(await todoist_client.get_tasks(format=format))
         except Exception as e:
             return f"Error fetching tasks: {str(e)}"
     
@@ -31,6 +91,7 @@ def register_todoist_resources(mcp, todoist_client):
     async def get_projects_resource() -> str:
         """Get all projects as a resource"""
         try:
+            todoist_client = get_client()
             projects = await todoist_client.get_projects()
             if not projects:
                 return "No projects found"
@@ -40,21 +101,56 @@ def register_todoist_resources(mcp, todoist_client):
         except Exception as e:
             return f"Error fetching projects: {str(e)}"
     
+    @mcp.resource("todoist://projects/{format}")
+    async def get_projects_formatted_resource(format: str) -> str:
+        """Get all projects in a compact format (table, lines or json)"""
+        try:
+            todoist_client = get_client()
+            format = formats.check_format(format, grouped=False)
+            projects = await todoist_client.get_projects()
+            if format == "json":
+                return formats.as_text(projects)
+            return formats.as_text(formats.render_projects(projects, format))
+        except Exception as e:
+            return f"Error fetching projects: {str(e)}"
+    
     @mcp.resource("todoist://project/{project_id}/tasks")
     async def get_project_tasks_resource(project_id: str) -> str:
         """Get tasks for a specific project"""
         try:
-            tasks = await todoist_client.get_tasks(project_id=project_id)
-            if not tasks:
+            todoist_client = get_client()
+            store = await todoist_client.get_task_store()
+            total = store.project_size(project_id)
+            if not total:
                 return f"No tasks found for project {project_id}"
             
-            task_list = []
-            for task in tasks:
-                task_info = f"- {task['content']} (ID: {task['id']}, Priority: {task['priority']})"
-                if task.get('due'):
-                    task_info += f" - Due: {task['due']['string']}"
-                task_list.append(task_info)
+            lines = _task_lines(store.iter_by_project(project_id))
+            return f"Tasks for Project {project_id} ({total} total):\n" + "\n".join(lines)
+        except Exception as e:
+            return f"Error fetching tasks for project {project_id}: {str(e)}"
+    
+    @mcp.resource("todoist://project/{project_id}/tasks/page/{page}")
+    async def get_project_tasks_page_resource(project_id: str, page: str) -> str:
+        """Get one page of tasks for a specific project"""
+        try:
+            todoist_client = get_client()
+            page_size = todoist_client.settings.resource_page_size
+            store = await todoist_client.get_task_store()
+            total = store.project_size(project_id)
+            if not total:
+                return f"No tasks found for project {project_id}"
             
-            return f"Tasks for Project {project_id} ({len(tasks)} total):\n" + "\n".join(task_list)
+            return _render_page(f"Tasks for Project {project_id}", store.iter_by_project(project_id),
+                                total, page, page_size,
+                                f"todoist://project/{project_id}/tasks/page/{{page}}")
+        except Exception as e:
+            return f"Error fetching tasks for project {project_id}: {str(e)}"
+    
+    @mcp.resource("todoist://project/{project_id}/tasks/{format}")
+    async def get_project_tasks_formatted_resource(project_id: str, format: str) -> str:
+        """Get tasks for a specific project in a compact format (table, lines or json)"""
+        try:
+            todoist_client = get_client()
+            return formats.as_text(await todoist_client.get_tasks(project_id=project_id, format=format))
         except Exception as e:
-            return f"Error fetching tasks for project {project_id}: {str(e)}"
\ No newline at end of file
+            return f"Error fetching tasks for project {project_id}: {str(e)}"
@@ -0,0 +1,291 @@
+"""
+Rate-limit-aware request scheduler
+
+Every request the client sends goes through a `RequestScheduler`, which:
+
+- spends from a token bucket sized to Todoist's per-user budget, so many
+  concurrent agents sharing one token slow down instead of failing;
+- serves waiting requests in priority order, so interactive tool calls go
+  ahead of background refreshes and prefetches;
+- retries 429 and transient 5xx/transport failures with `Retry-After`-aware
+  exponential backoff and jitter. A 429 pauses the whole bucket, not just
+  the request that hit it.
+
+Callers pick a lane with the `request_priority` context manager; anything
+not wrapped in one is treated as interactive.
+
+The bucket itself is pluggable: `TokenBucket` keeps it in process, and a
+shared backend (see `state_backend.py`) lets several worker processes spend
+from one per-user budget.
+"""
+
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from .config import RateLimitSettings
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class Priority(IntEnum):
+    """Scheduling lanes, highest priority first"""
+
+    INTERACTIVE = 0
+    PREFETCH = 1
+    BACKGROUND = 2
+
+
+_priority: ContextVar[Priority] = ContextVar("todoist_request_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """Send every request made inside this block in the given lane"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parse a `Retry-After` header given either in seconds or as an HTTP date"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class _LaneStats:
+    __slots__ = ("granted", "total_wait", "max_wait", "max_depth")
+
+    def __init__(self) -> None:
+        self.granted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.max_depth = 0
+
+
+class TokenBucket:
+    """In-process token bucket; `rate=None` means unlimited (pauses still apply)"""
+
+    def __init__(self, rate: Optional[float], capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_take(self) -> bool:
+        now = self._clock()
+        if now < self._paused_until:
+            return False
+        if self.rate is None:
+            return True
+        self._refill(now)
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def next_grant_delay(self) -> float:
+        """Seconds until `try_take` could next succeed"""
+        now = self._clock()
+        delay = self._paused_until - now
+        if self.rate is not None:
+            self._refill(now)
+            delay = max(delay, (1 - self._tokens) / self.rate)
+        return max(delay, 0.001)
+
+    def pause(self, seconds: float) -> None:
+        now = self._clock()
+        self._paused_until = max(self._paused_until, now + seconds)
+        if self.rate is not None:
+            self._refill(now)
+            self._tokens = 0.0
+
+    def state(self) -> Tuple[Optional[float], float]:
+        """Current `(tokens, seconds paused for)`"""
+        now = self._clock()
+        if self.rate is not None:
+            self._refill(now)
+        tokens = self._tokens if self.rate is not None else None
+        return tokens, max(self._paused_until - now, 0.0)
+
+
+class RequestScheduler:
+    """Token bucket with priority lanes and retry/backoff"""
+
+    def __init__(
+        self,
+        settings: RateLimitSettings,
+        clock: Callable[[], float] = time.monotonic,
+        bucket_factory: Optional[Callable[[Optional[float], float], Any]] = None
+    ):
+        self.settings = settings
+        self._clock = clock
+        self.rate: Optional[float] = (
+            settings.requests / settings.period
+            if settings.enabled and settings.requests > 0 and settings.period > 0
+            else None
+        )
+        self.capacity = max(settings.burst, 1)
+        self.bucket = (
+            bucket_factory(self.rate, self.capacity)
+            if bucket_factory is not None
+            else TokenBucket(self.rate, self.capacity, clock)
+        )
+
+        self._waiters: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self._lanes = {priority: _LaneStats() for priority in Priority}
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+
+    def pause(self, seconds: float) -> None:
+        """Stop granting requests for `seconds` (e.g. after a 429)"""
+        self.bucket.pause(seconds)
+
+    # Priority queue
+
+    def _record(self, priority: Priority, waited: float) -> None:
+        lane = self._lanes[priority]
+        lane.granted += 1
+        lane.total_wait += waited
+        lane.max_wait = max(lane.max_wait, waited)
+
+    def _dispatch(self) -> None:
+        while self._waiters:
+            priority, _, enqueued_at, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self.bucket.try_take():
+                break
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+            self._record(Priority(priority), self._clock() - enqueued_at)
+
+        if self._waiters and self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.bucket.next_grant_delay(), self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def queue_depth(self) -> Dict[str, int]:
+        depth = {priority.name.lower(): 0 for priority in Priority}
+        for priority, _, _, future in self._waiters:
+            if not future.done():
+                depth[Priority(priority).name.lower()] += 1
+        return depth
+
+    async def acquire(self, priority: Optional[Priority] = None) -> None:
+        """Wait until a request in `priority`'s lane may be sent"""
+        priority = current_priority() if priority is None else priority
+        if not self._waiters and self.bucket.try_take():
+            self._record(priority, 0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), self._clock(), future))
+        lane = self._lanes[priority]
+        lane.max_depth = max(lane.max_depth, self.queue_depth()[priority.name.lower()])
+        self._dispatch()
+        await future
+
+    # Retries
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        ceiling = min(self.settings.max_delay, self.settings.base_delay * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    async def send(
+        self,
+        send: Callable[[], Awaitable[httpx.Response]],
+        priority: Optional[Priority] = None
+    ) -> httpx.Response:
+        """Send a request through the bucket, retrying throttled and transient failures
+
+        The final response is returned as-is (even if it is an error); the
+        caller decides whether to raise.
+        """
+        attempt = 0
+        while True:
+            await self.acquire(priority)
+            try:
+                response = await send()
+            except httpx.TransportError:
+                if attempt >= self.settings.max_retries:
+                    self.failures += 1
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                if attempt >= self.settings.max_retries:
+                    self.failures += 1
+                    return response
+                retry_after = retry_after_seconds(response)
+                delay = retry_after if retry_after is not None else self._backoff(attempt)
+                if response.status_code == 429:
+                    # The budget is per user, so everyone waits, not just us
+                    self.throttled += 1
+                    self.pause(min(delay, self.settings.max_delay))
+                    delay = 0.0
+            attempt += 1
+            self.retries += 1
+            if delay:
+                await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        tokens, paused_for = self.bucket.state()
+        lanes = {}
+        for priority, lane in self._lanes.items():
+            lanes[priority.name.lower()] = {
+                "granted": lane.granted,
+                "mean_wait": round(lane.total_wait / lane.granted, 4) if lane.granted else 0.0,
+                "max_wait": round(lane.max_wait, 4),
+                "max_depth": lane.max_depth,
+            }
+        return {
+            "enabled": self.rate is not None,
+            "tokens": round(tokens, 2) if tokens is not None else None,
+            "paused_for": round(paused_for, 3),
+            "queue_depth": self.queue_depth(),
+            "lanes": lanes,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "failures": self.failures,
+        }
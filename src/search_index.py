@@ -0,0 +1,333 @@
+"""
+Full-text and fuzzy search over tasks
+
+`SearchIndex` keeps an inverted index from terms to the tasks that contain
+them, so `search_tasks` can answer a query without the agent pulling every
+task into its context:
+
+- task content, descriptions and labels are tokenized into lowercase word
+  terms, weighted by field (a hit in the content counts more than one in
+  the description)
+- each query term matches indexed terms exactly, by prefix ("groc" finds
+  "groceries") and, when neither finds anything, by trigram similarity
+  ("grocereis" finds "groceries"), with lower weight for looser matches
+- project names are indexed too, so "errands" also finds the tasks of an
+  "Errands" project, and `project()` / `find_projects()` look a project up
+  by name without scanning the project list
+
+The index follows a `TaskStore` (see `task_store.py`) and is updated for
+each task the store changes. Following a different store (a freshly built
+one when the sync engine is off) only reindexes the tasks that changed.
+Results are ranked by how many query terms they match, then by a
+tf-idf-style score.
+"""
+
+import bisect
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from .task_store import Task, TaskStore
+
+_TOKEN = re.compile(r"\w+")
+
+# Weight of a term by the task field it appears in
+FIELD_WEIGHTS = (("content", 3.0), ("labels", 2.0), ("description", 1.0))
+# Weight of a term in the name of a task's project
+PROJECT_WEIGHT = 1.5
+# Weight of a looser match relative to an exact one
+PREFIX_FACTOR = 0.7
+FUZZY_FACTOR = 0.5
+# Shortest query term matched by prefix or trigram similarity
+MIN_PREFIX = 2
+MIN_FUZZY = 3
+# Trigram (Dice) similarity a fuzzy match needs
+FUZZY_THRESHOLD = 0.5
+# Most indexed terms one query term expands to
+MAX_EXPANSIONS = 64
+MAX_RESULTS = 100
+SNIPPET_LENGTH = 100
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f" {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Terms:
+    """Postings per term, with a sorted vocabulary and trigram index for looser matches"""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self._sorted: List[str] = []
+        self._trigrams: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.postings)
+
+    def add(self, term: str, doc_id: str, weight: float) -> None:
+        docs = self.postings.get(term)
+        if docs is None:
+            docs = self.postings[term] = {}
+            bisect.insort(self._sorted, term)
+            for gram in trigrams(term):
+                self._trigrams.setdefault(gram, set()).add(term)
+        docs[doc_id] = weight
+
+    def remove(self, term: str, doc_id: str) -> None:
+        docs = self.postings.get(term)
+        if docs is None:
+            return
+        docs.pop(doc_id, None)
+        if docs:
+            return
+        del self.postings[term]
+        del self._sorted[bisect.bisect_left(self._sorted, term)]
+        for gram in trigrams(term):
+            terms = self._trigrams[gram]
+            terms.discard(term)
+            if not terms:
+                del self._trigrams[gram]
+
+    def expand(self, term: str) -> Dict[str, float]:
+        """Indexed terms matching `term`, each with the weight of that kind of match"""
+        matches: Dict[str, float] = {}
+        if term in self.postings:
+            matches[term] = 1.0
+        if len(term) >= MIN_PREFIX:
+            start = bisect.bisect_left(self._sorted, term)
+            for candidate in self._sorted[start:start + MAX_EXPANSIONS]:
+                if not candidate.startswith(term):
+                    break
+                matches.setdefault(candidate, PREFIX_FACTOR)
+        if matches or len(term) < MIN_FUZZY:
+            return matches
+
+        # A candidate similar enough shares at least `needed` trigrams, so it
+        # shares one of the rarest len(grams) - needed + 1: count those, then
+        # check the common ones only for the candidates found
+        grams = sorted(trigrams(term), key=lambda gram: len(self._trigrams.get(gram, ())))
+        needed = max(math.ceil(FUZZY_THRESHOLD * len(grams) / (2 - FUZZY_THRESHOLD)), 1)
+        rare, common = grams[:len(grams) - needed + 1], grams[len(grams) - needed + 1:]
+        shared: Counter = Counter()
+        for gram in rare:
+            shared.update(self._trigrams.get(gram, ()))
+        common_sets = [self._trigrams.get(gram, ()) for gram in common]
+        scored = []
+        for candidate, count in shared.items():
+            count += sum(1 for terms in common_sets if candidate in terms)
+            # A padded term has as many trigrams as characters (near enough)
+            similarity = 2 * count / (len(grams) + len(candidate))
+            if similarity >= FUZZY_THRESHOLD:
+                scored.append((similarity, candidate))
+        for similarity, candidate in heapq.nlargest(MAX_EXPANSIONS, scored):
+            matches[candidate] = FUZZY_FACTOR * similarity
+        return matches
+
+
+class SearchIndex:
+    """Inverted index over a task store's tasks and the workspace's project names"""
+
+    def __init__(self):
+        self.store: Optional[TaskStore] = None
+        self.terms = Terms()
+        self._tasks: Dict[str, Task] = {}
+        self._doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self.project_terms = Terms()
+        self._projects: Dict[str, Mapping[str, Any]] = {}
+        self._project_key: Optional[Tuple[Any, ...]] = None
+        self._by_name: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    # Tasks
+
+    def follow(self, store: TaskStore) -> None:
+        """Index `store`'s tasks and keep up with its changes"""
+        if store is self.store:
+            return
+        if self.store is not None:
+            self.store.unsubscribe(self._changed)
+        self.store = store
+        seen = set()
+        for task in store:
+            seen.add(task.id)
+            if self._tasks.get(task.id) is not task:
+                self._remove(task.id)
+                self._add(task)
+        for task_id in [task_id for task_id in self._tasks if task_id not in seen]:
+            self._remove(task_id)
+        store.subscribe(self._changed)
+
+    def close(self) -> None:
+        """Stop following the store"""
+        if self.store is not None:
+            self.store.unsubscribe(self._changed)
+            self.store = None
+
+    def _changed(self, previous: Optional[Task], current: Optional[Task]) -> None:
+        if previous is None and current is None:
+            for task_id in list(self._tasks):
+                self._remove(task_id)
+            return
+        if previous is not None:
+            self._remove(previous.id)
+        if current is not None:
+            self._add(current)
+
+    def _add(self, task: Task) -> None:
+        weights: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS:
+            value = task.get(field)
+            text = " ".join(value) if field == "labels" and value else value
+            for term in set(tokenize(text)):
+                weights[term] = weights.get(term, 0.0) + weight
+        task_id = task.id
+        for term, weight in weights.items():
+            self.terms.add(term, task_id, weight)
+        self._tasks[task_id] = task
+        self._doc_terms[task_id] = tuple(weights)
+
+    def _remove(self, task_id: str) -> None:
+        if self._tasks.pop(task_id, None) is None:
+            return
+        for term in self._doc_terms.pop(task_id):
+            self.terms.remove(term, task_id)
+
+    # Projects
+
+    def set_projects(self, projects: Iterable[Mapping[str, Any]]) -> None:
+        """Index project names (a no-op when the projects are unchanged)"""
+        projects = tuple(projects)
+        if projects == self._project_key:
+            return
+        self._project_key = projects
+        for project_id in list(self._projects):
+            for term in set(tokenize(self._projects.pop(project_id).get("name"))):
+                self.project_terms.remove(term, project_id)
+        self._by_name = {}
+        for project in projects:
+            name = project.get("name") or ""
+            self._projects[project["id"]] = project
+            # The first project with a name wins, as it would in a scan of the list
+            self._by_name.setdefault(name.lower(), project["id"])
+            for term in set(tokenize(name)):
+                self.project_terms.add(term, project["id"], 1.0)
+
+    def project(self, name: str) -> Optional[Mapping[str, Any]]:
+        """The project with this name (case-insensitive), if there is one"""
+        project_id = self._by_name.get(name.lower())
+        return self._projects[project_id] if project_id is not None else None
+
+    def find_projects(self, name: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Projects whose names best match `name`, an exact match first"""
+        exact = self._by_name.get(name.lower())
+        scores: Dict[str, float] = {exact: math.inf} if exact is not None else {}
+        for term in set(tokenize(name)):
+            for match, factor in self.project_terms.expand(term).items():
+                for project_id in self.project_terms.postings[match]:
+                    scores[project_id] = scores.get(project_id, 0.0) + factor
+        ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [
+            {"id": project_id, "name": self._projects[project_id].get("name"),
+             "score": round(score, 3) if score != math.inf else None}
+            for project_id, score in ranked
+        ]
+
+    # Queries
+
+    def search(self, query: str, limit: int = 10,
+               project_id: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """Rank tasks matching `query`, returning the top `limit` and how many matched"""
+        total = len(self._tasks) or 1
+        # Per query term: score by task, and by project for project-name matches
+        task_hits: List[Dict[str, float]] = []
+        project_hits: List[Dict[str, float]] = []
+        expanded: Set[str] = set()
+        for term in dict.fromkeys(tokenize(query)):
+            hits: Dict[str, float] = {}
+            for match, factor in self.terms.expand(term).items():
+                expanded.add(match)
+                docs = self.terms.postings[match]
+                idf = math.log(1 + total / len(docs))
+                for task_id, weight in docs.items():
+                    score = factor * weight * idf
+                    if score > hits.get(task_id, 0.0):
+                        hits[task_id] = score
+            projects: Dict[str, float] = {}
+            if self.store is not None:
+                for match, factor in self.project_terms.expand(term).items():
+                    for project in self.project_terms.postings[match]:
+                        size = self.store.project_size(project)
+                        if size:
+                            score = factor * PROJECT_WEIGHT * math.log(1 + total / size)
+                            projects[project] = max(projects.get(project, 0.0), score)
+            task_hits.append(hits)
+            project_hits.append(projects)
+
+        ranked: Dict[str, Tuple[int, float]] = {}
+        for hits in task_hits:
+            for task_id in hits:
+                if task_id in ranked:
+                    continue
+                task_project = self._tasks[task_id].project_id
+                if project_id is not None and task_project != project_id:
+                    continue
+                scores = [max(hits.get(task_id, 0.0), projects.get(task_project, 0.0))
+                          for hits, projects in zip(task_hits, project_hits)]
+                ranked[task_id] = (sum(1 for score in scores if score > 0), sum(scores))
+        count = len(ranked)
+
+        # Tasks matched only through their project's name score the same as
+        # each other, so only the first `limit` of each project can rank
+        matched_projects = set().union(*project_hits) if project_hits else set()
+        if project_id is not None:
+            matched_projects &= {project_id}
+        for project in matched_projects:
+            scores = [projects.get(project, 0.0) for projects in project_hits]
+            score = (sum(1 for value in scores if value > 0), sum(scores))
+            already = sum(1 for task_id in ranked if self._tasks[task_id].project_id == project)
+            count += self.store.project_size(project) - already
+            taken = 0
+            for task in self.store.iter_by_project(project):
+                if taken >= limit:
+                    break
+                if task.id not in ranked:
+                    ranked[task.id] = score
+                    taken += 1
+
+        top = heapq.nlargest(limit, ranked, key=ranked.__getitem__)
+        results = []
+        for task_id in top:
+            task = self._tasks[task_id]
+            results.append({
+                "id": task_id,
+                "project_id": task.project_id,
+                "score": round(ranked[task_id][1], 3),
+                "snippet": snippet(task, expanded),
+            })
+        return results, count
+
+
+def _shorten(text: str, start: int = 0) -> str:
+    end = start + SNIPPET_LENGTH
+    shortened = text[start:end].strip()
+    return ("…" if start > 0 else "") + shortened + ("…" if end < len(text) else "")
+
+
+def snippet(task: Task, terms: Set[str]) -> str:
+    """The task's content, or the part of its description a query term was found in"""
+    content = task.content or ""
+    if not any(term in terms for term in tokenize(content)):
+        for match in _TOKEN.finditer(task.description or ""):
+            if match.group().lower() in terms:
+                start = max(match.start() - SNIPPET_LENGTH // 4, 0)
+                return f"{_shorten(content)} — {_shorten(task.description, start)}"
+    return _shorten(content)
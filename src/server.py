@@ -3,60 +3,351 @@ Todoist MCP Server
 
 This server provides MCP integration with Todoist API following the patterns
 from GitHub's official MCP server implementation.
+
+Startup is kept cheap because editors spawn a server process per session:
+the Todoist client is only built when the server starts running (or on
+first use), and tool/resource/prompt schemas are built on the first request
+that lists or uses them rather than at import.
+
+Every tool, resource and prompt is timed twice (see `metrics.py`): once
+around the whole MCP request and once around our own function, so the gap
+shows the time spent inside FastMCP.
+
+With `TODOIST_MULTI_TENANT` enabled, the Todoist token is resolved for each
+request instead: from an `Authorization: Bearer` (or `X-Todoist-Token`)
+header, or from a token registered for the MCP session with `setup_todoist`.
+Each token is served by its own client from a `ClientPool`, and
+`get_client()` returns the client for the request being handled.
 """
 
 import os
+import weakref
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, AsyncIterator, Callable, List, Optional
+
 from dotenv import load_dotenv
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 
 # Load environment variables from .env file
 load_dotenv()
-from .todoist_client import TodoistClient
+from . import metrics
+from .client_pool import ClientPool
+from .config import MetricsSettings, TenantSettings
 from .tools.tasks import register_task_tools
 from .tools.projects import register_project_tools
+from .tools.analytics import register_analytics_tools
 from .resources.todoist_resources import register_todoist_resources
 from .prompts.task_prompts import register_task_prompts
 from .prompts.project_prompts import register_project_prompts
 
-# Initialize the MCP server
-mcp = FastMCP("todoist-mcp-server")
+if TYPE_CHECKING:
+    from .todoist_client import TodoistClient
+
+# Single-tenant Todoist client, opened by the lifespan or setup_todoist
+todoist_client: Optional["TodoistClient"] = None
+# Server lifespans currently running (see client_lifespan)
+_lifespans = 0
+
+metrics_settings = MetricsSettings.from_env()
+metrics.REGISTRY.enabled = metrics_settings.enabled
+
+tenant_settings = TenantSettings.from_env()
+
+# Multi-tenant mode only: per-token clients, the client serving the current
+# request, and tokens registered per MCP session with setup_todoist
+client_pool: Optional[ClientPool] = None
+_request_client: ContextVar[Optional["TodoistClient"]] = ContextVar("todoist_request_client", default=None)
+_session_tokens: "weakref.WeakKeyDictionary[object, str]" = weakref.WeakKeyDictionary()
+
+
+def _new_client(api_token: str) -> "TodoistClient":
+    from .todoist_client import TodoistClient
+    return TodoistClient(api_token)
+
+
+if tenant_settings.multi_tenant:
+    client_pool = ClientPool(_new_client, tenant_settings.max_clients, tenant_settings.idle_timeout)
+
+
+class TodoistMCP(FastMCP):
+    """FastMCP with deferred registration and instrumented handlers
+
+    Registration callbacks passed to `defer()` run the first time tools,
+    resources or prompts are listed or used, so building their schemas
+    doesn't delay the `initialize` handshake.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._registrations: List[Callable[[FastMCP], None]] = []
+        super().__init__(*args, **kwargs)
+
+    def defer(self, register: Callable[[FastMCP], None]) -> None:
+        self._registrations.append(register)
+
+    def ensure_registered(self) -> None:
+        while self._registrations:
+            self._registrations.pop(0)(self)
+
+    def add_tool(self, fn, name=None, **kwargs):
+        super().add_tool(metrics.instrument("tool", name or fn.__name__, fn), name=name, **kwargs)
+
+    def resource(self, uri, **kwargs):
+        register = super().resource(uri, **kwargs)
+
+        def decorator(fn):
+            register(metrics.instrument("resource", uri, fn))
+            return fn
+
+        return decorator
+
+    def prompt(self, name=None, **kwargs):
+        register = super().prompt(name, **kwargs)
+
+        def decorator(fn):
+            register(metrics.instrument("prompt", name or fn.__name__, fn))
+            return fn
+
+        return decorator
+
+    def _tool_label(self, name) -> str:
+        """A tool's name if it is registered; client-chosen names would each become a series"""
+        return name if self._tool_manager.get_tool(name) is not None else "unknown"
+
+    def _prompt_label(self, name) -> str:
+        return name if self._prompt_manager.get_prompt(name) is not None else "unknown"
+
+    def _resource_label(self, uri) -> str:
+        """The registered URI or template a concrete resource URI was served by"""
+        uri = str(uri)
+        for resource in self._resource_manager.list_resources():
+            if str(resource.uri) == uri:
+                return uri
+        for template in self._resource_manager.list_templates():
+            if template.matches(uri) is not None:
+                return template.uri_template
+        return "unknown"
+
+    async def run_stdio_async(self):
+        # No /metrics route in stdio mode, so log summaries instead
+        async with metrics.logging_metrics(metrics_settings.log_interval):
+            await super().run_stdio_async()
+
+    async def list_tools(self):
+        self.ensure_registered()
+        return await super().list_tools()
+
+    async def call_tool(self, name, arguments):
+        self.ensure_registered()
+        label = self._tool_label(name)
+        async with metrics.timed_request("tool", label), tenant_scope(self):
+            result = await super().call_tool(name, arguments)
+        metrics.record_response("tool", label, result)
+        return result
 
-# Initialize Todoist client
-todoist_client = None
+    async def list_resources(self):
+        self.ensure_registered()
+        return await super().list_resources()
 
-def initialize_client():
-    """Initialize the Todoist client with API token"""
+    async def list_resource_templates(self):
+        self.ensure_registered()
+        return await super().list_resource_templates()
+
+    async def read_resource(self, uri):
+        self.ensure_registered()
+        label = self._resource_label(uri)
+        async with metrics.timed_request("resource", label), tenant_scope(self):
+            result = await super().read_resource(uri)
+        metrics.record_response("resource", label, result)
+        return result
+
+    async def list_prompts(self):
+        self.ensure_registered()
+        return await super().list_prompts()
+
+    async def get_prompt(self, name, arguments=None):
+        self.ensure_registered()
+        label = self._prompt_label(name)
+        async with metrics.timed_request("prompt", label), tenant_scope(self):
+            result = await super().get_prompt(name, arguments)
+        metrics.record_response("prompt", label, result)
+        return result
+
+
+def request_token(server: FastMCP) -> Optional[str]:
+    """Todoist token for the MCP request being handled, if the caller sent one"""
+    try:
+        context = server.get_context().request_context
+    except ValueError:
+        return None
+    request = context.request
+    if request is not None:
+        authorization = request.headers.get("authorization", "")
+        if authorization.lower().startswith("bearer "):
+            return authorization[7:].strip()
+        if request.headers.get("x-todoist-token"):
+            return request.headers["x-todoist-token"]
+    return _session_tokens.get(context.session)
+
+
+@asynccontextmanager
+async def tenant_scope(server: FastMCP) -> AsyncIterator[None]:
+    """Make the requesting tenant's client current for one MCP request"""
+    api_token = request_token(server) if client_pool is not None else None
+    if api_token is None:
+        yield
+        return
+    async with client_pool.acquire(api_token) as client:
+        token = _request_client.set(client)
+        try:
+            yield
+        finally:
+            _request_client.reset(token)
+
+
+@asynccontextmanager
+async def client_lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Hold the Todoist client(s) open while the server is running
+
+    Streamable HTTP runs this once per session as well as for the app, so
+    clients are closed with the last lifespan to exit.
+    """
+    global _lifespans, todoist_client
+    _lifespans += 1
+    try:
+        if client_pool is None:
+            # Per-tenant clients are opened on demand by the pool instead
+            await initialize_client()
+        yield
+    finally:
+        _lifespans -= 1
+        if not _lifespans:
+            if client_pool is not None:
+                await client_pool.aclose()
+            elif todoist_client is not None:
+                client, todoist_client = todoist_client, None
+                await client.aclose()
+
+
+# Initialize the MCP server
+mcp = TodoistMCP("todoist-mcp-server", lifespan=client_lifespan)
+
+async def initialize_client() -> None:
+    """Create and open the Todoist client from TODOIST_API_TOKEN, if it is set and there isn't one"""
     global todoist_client
+    from .todoist_client import TodoistClient
+
     api_token = os.getenv("TODOIST_API_TOKEN")
-    if not api_token:
-        raise ValueError("TODOIST_API_TOKEN environment variable is required")
-    todoist_client = TodoistClient(api_token)
+    if api_token and todoist_client is None:
+        todoist_client = await TodoistClient(api_token).open()
+
+def get_client() -> "TodoistClient":
+    """Return the Todoist client for the current request"""
+    if client_pool is not None:
+        client = _request_client.get()
+        if client is None:
+            raise ValueError(
+                "No Todoist token for this request: send an 'Authorization: Bearer <token>' "
+                "header or call the setup_todoist tool"
+            )
+        return client
+    if todoist_client is None:
+        raise ValueError(
+            "TODOIST_API_TOKEN environment variable is required (or call the setup_todoist tool)"
+        )
+    return todoist_client
+
+def _current_client() -> Optional["TodoistClient"]:
+    try:
+        return get_client()
+    except ValueError:
+        return None
+
+def live_clients() -> List["TodoistClient"]:
+    """Clients currently serving requests, without creating one"""
+    if client_pool is not None:
+        return client_pool.clients()
+    return [todoist_client] if todoist_client is not None else []
 
 @mcp.tool()
-async def setup_todoist(api_token: str) -> str:
+async def setup_todoist(api_token: str, ctx: Context) -> str:
     """Set up Todoist API token"""
     global todoist_client
+    from .todoist_client import TodoistClient
+
+    if client_pool is not None:
+        # Multi-tenant: the token only applies to this session
+        try:
+            async with client_pool.acquire(api_token) as client:
+                await client.get_projects()
+        except Exception as e:
+            await client_pool.discard(api_token)
+            return f"Failed to set up Todoist: {str(e)}"
+        _session_tokens[ctx.session] = api_token
+        return "Todoist API token set for this session and connection verified"
+
+    client = await TodoistClient(api_token).open()
     try:
-        todoist_client = TodoistClient(api_token)
-        # Test the connection
-        await todoist_client.get_projects()
-        return "Todoist API token set successfully and connection verified"
+        # Test the connection before replacing the working client
+        await client.get_projects()
     except Exception as e:
+        await client.aclose()
         return f"Failed to set up Todoist: {str(e)}"
+    previous, todoist_client = todoist_client, client
+    if previous is not None:
+        await previous.aclose()
+    return "Todoist API token set successfully and connection verified"
+
+@mcp.tool()
+async def cache_stats() -> dict:
+    """Get read-through cache hit/miss counters"""
+    client = _current_client()
+    if not client:
+        return {"enabled": False}
+    return client.cache_stats()
+
+@mcp.tool()
+async def sync_status(refresh: bool = False) -> dict:
+    """Get the state of the local workspace replica, optionally forcing an incremental sync"""
+    client = _current_client()
+    if not client or not client.sync:
+        return {"enabled": False}
+    if refresh:
+        return await client.sync.sync()
+    return client.sync_stats()
+
+@mcp.tool()
+async def outbox_status(flush: bool = False, clear_failed: bool = False) -> dict:
+    """Get queued and failed writes, optionally sending the queue now or forgetting failures"""
+    client = _current_client()
+    if not client or not client.outbox:
+        return {"enabled": False}
+    if flush:
+        await client.outbox.flush()
+    stats = await client.outbox.stats()
+    if clear_failed:
+        stats["cleared"] = await client.outbox.clear_failed()
+    return stats
+
+@mcp.tool()
+async def rate_limit_status() -> dict:
+    """Get request scheduler queue depth, wait times, retries and coalesced reads"""
+    client = _current_client()
+    if not client:
+        return {"enabled": False}
+    stats = client.rate_limit_stats()
+    if client_pool is not None:
+        stats["tenants"] = client_pool.stats()
+    return stats
 
-# Initialize client if token is available
-try:
-    initialize_client()
-    if todoist_client:
-        # Register tools, resources, and prompts
-        register_task_tools(mcp, todoist_client)
-        register_project_tools(mcp, todoist_client)
-        register_todoist_resources(mcp, todoist_client)
-        register_task_prompts(mcp, todoist_client)
-        register_project_prompts(mcp, todoist_client)
-except ValueError:
-    # API token not set, will need to use setup_todoist tool first
-    pass
+# Tools, resources and prompts look the client up on each call, so they can be
+# registered before a token is configured
+mcp.defer(lambda server: register_task_tools(server, get_client))
+mcp.defer(lambda server: register_project_tools(server, get_client))
+mcp.defer(lambda server: register_analytics_tools(server, get_client))
+mcp.defer(lambda server: register_todoist_resources(server, get_client))
+mcp.defer(lambda server: register_task_prompts(server, get_client))
+mcp.defer(lambda server: register_project_prompts(server, get_client))
 
 if __name__ == "__main__":
     mcp.run()
\ No newline at end of file
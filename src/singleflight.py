@@ -0,0 +1,47 @@
+"""
+Single-flight request coalescing
+
+When several callers ask for the same thing at the same time, only the
+first (the leader) actually performs the call; the rest wait on it and get
+the same result. This cuts upstream traffic during bursts whether or not
+the cache is enabled.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls that share a key"""
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `call` unless a call with the same key is already in flight"""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+        # Shield so one caller being cancelled doesn't cancel the call for
+        # everyone else waiting on it
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter was cancelled
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._calls), "leaders": self.leaders, "coalesced": self.coalesced}
@@ -0,0 +1,115 @@
+"""
+Persistent on-disk snapshot of the workspace replica
+
+The sync engine's projects, tasks, labels, sections and last `sync_token`
+are stored in a small SQLite database so a freshly spawned server process
+can serve its first prompt from disk and catch up with an incremental
+sync instead of downloading the whole workspace again.
+
+Each save is a single SQLite transaction, so a crash mid-write leaves the
+previous snapshot intact. Saves are incremental: only objects that changed
+since the last save are written (a full sync rewrites everything).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .metrics import json_loads
+from .models import to_plain
+
+SCHEMA_VERSION = 1
+
+# Changes grouped by resource type; a value of None marks a deletion
+Changes = Dict[str, Dict[str, Optional[Dict[str, Any]]]]
+
+
+def snapshot_path(directory: str, api_token: str) -> str:
+    """One database per account, named by a hash of its token"""
+    digest = hashlib.sha256(api_token.encode()).hexdigest()[:16]
+    return os.path.join(os.path.expanduser(directory), f"workspace-{digest}.sqlite3")
+
+
+class SnapshotStore:
+    """SQLite-backed snapshot of a sync replica"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            " kind TEXT NOT NULL, id TEXT NOT NULL, data TEXT NOT NULL,"
+            " PRIMARY KEY (kind, id))"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        return conn
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Read the snapshot, or None if there isn't a usable one
+
+        Returns `{"sync_token", "saved_at", "objects": {kind: [obj, ...]}}`.
+        """
+        if not os.path.exists(self.path):
+            return None
+        with self._lock:
+            conn = self._connect()
+            try:
+                meta = dict(conn.execute("SELECT key, value FROM meta"))
+                if meta.get("schema_version") != str(SCHEMA_VERSION) or not meta.get("sync_token"):
+                    return None
+                # One JSON document per kind decodes much faster than a row at a time
+                objects = {
+                    kind: json_loads(f"[{data}]")
+                    for kind, data in conn.execute(
+                        "SELECT kind, group_concat(data, ',') FROM objects GROUP BY kind"
+                    )
+                }
+            except sqlite3.DatabaseError:
+                return None
+            finally:
+                conn.close()
+        return {
+            "sync_token": meta["sync_token"],
+            "saved_at": float(meta.get("saved_at", 0)),
+            "objects": objects,
+        }
+
+    def save(self, sync_token: str, changes: Changes, full: bool = False) -> None:
+        """Atomically apply `changes` and record the new sync token"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    if full:
+                        conn.execute("DELETE FROM objects")
+                    for kind, objects in changes.items():
+                        deleted = [(kind, object_id) for object_id, obj in objects.items() if obj is None]
+                        upserts = [
+                            (kind, object_id, json.dumps(obj, separators=(",", ":"), default=to_plain))
+                            for object_id, obj in objects.items() if obj is not None
+                        ]
+                        conn.executemany("DELETE FROM objects WHERE kind = ? AND id = ?", deleted)
+                        conn.executemany("INSERT OR REPLACE INTO objects (kind, id, data) VALUES (?, ?, ?)", upserts)
+                    conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+                        ("schema_version", str(SCHEMA_VERSION)),
+                        ("sync_token", sync_token),
+                        ("saved_at", repr(time.time())),
+                    ])
+            finally:
+                conn.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
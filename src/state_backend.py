@@ -0,0 +1,295 @@
+"""
+Pluggable backend for cache and rate-limit state
+
+By default every client keeps its read-through cache (`cache.TTLCache`) and
+rate-limit bucket (`scheduler.TokenBucket`) in process. When the HTTP
+server runs several worker processes, those copies diverge: each worker
+caches the same responses and spends its own full copy of the per-user
+request budget.
+
+The `sqlite` backend keeps both in one SQLite database shared by every
+worker on the host, namespaced per Todoist token. It is meant for testing
+and small deployments: operations are short synchronous transactions on the
+event loop thread, and expiry uses wall-clock time so it agrees across
+processes.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from .cache import MISSING, CacheKey, TTLCache
+from .config import StateSettings
+from .models import to_plain
+from .scheduler import TokenBucket
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Autocommit; writes that must be atomic open their own transaction
+    conn = sqlite3.connect(path, isolation_level=None, timeout=5.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS cache ("
+        " namespace TEXT NOT NULL, endpoint TEXT NOT NULL, scope TEXT NOT NULL,"
+        " expires_at REAL NOT NULL, used_at REAL NOT NULL, value TEXT NOT NULL,"
+        " PRIMARY KEY (namespace, endpoint, scope))"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS buckets ("
+        " namespace TEXT PRIMARY KEY, tokens REAL NOT NULL,"
+        " updated REAL NOT NULL, paused_until REAL NOT NULL)"
+    )
+    return conn
+
+
+class SQLiteCache:
+    """`TTLCache`-compatible cache stored in a shared SQLite database
+
+    Hit/miss counters are per process; entries and evictions are shared.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        namespace: str,
+        max_entries: int = 256,
+        clock: Callable[[], float] = time.time
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self._conn = conn
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        (count,) = self._conn.execute(
+            "SELECT COUNT(*) FROM cache WHERE namespace = ? AND expires_at > ?",
+            (self.namespace, self._clock()),
+        ).fetchone()
+        return count
+
+    def _lookup(self, key: CacheKey) -> Any:
+        row = self._conn.execute(
+            "SELECT value FROM cache WHERE namespace = ? AND endpoint = ? AND scope = ? AND expires_at > ?",
+            (self.namespace, key[0], json.dumps(key[1]), self._clock()),
+        ).fetchone()
+        return json.loads(row[0]) if row else MISSING
+
+    def get(self, key: CacheKey) -> Any:
+        """Return the cached value for `key`, or `MISSING`"""
+        value = self._lookup(key)
+        if value is MISSING:
+            self.misses += 1
+            return MISSING
+        self._conn.execute(
+            "UPDATE cache SET used_at = ? WHERE namespace = ? AND endpoint = ? AND scope = ?",
+            (self._clock(), self.namespace, key[0], json.dumps(key[1])),
+        )
+        self.hits += 1
+        return value
+
+    def peek(self, key: CacheKey) -> Any:
+        """Like `get` but without touching LRU order or counters"""
+        return self._lookup(key)
+
+    def set(self, key: CacheKey, value: Any, ttl: float) -> None:
+        """Store `value` under `key` for `ttl` seconds"""
+        if ttl <= 0:
+            return
+        now = self._clock()
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, key[0], json.dumps(key[1]), now + ttl, now,
+                 json.dumps(value, separators=(",", ":"), default=to_plain)),
+            )
+            self._conn.execute("DELETE FROM cache WHERE namespace = ? AND expires_at <= ?", (self.namespace, now))
+            evicted = self._conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND rowid IN ("
+                " SELECT rowid FROM cache WHERE namespace = ? ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.namespace, self.namespace, self.max_entries),
+            ).rowcount
+        self.evictions += max(evicted, 0)
+
+    def ttl_remaining(self, key: CacheKey) -> Optional[float]:
+        """Seconds until a live entry expires, or None if there isn't one"""
+        row = self._conn.execute(
+            "SELECT expires_at FROM cache WHERE namespace = ? AND endpoint = ? AND scope = ?",
+            (self.namespace, key[0], json.dumps(key[1])),
+        ).fetchone()
+        remaining = row[0] - self._clock() if row else 0
+        return remaining if remaining > 0 else None
+
+    def replace(self, key: CacheKey, value: Any) -> None:
+        """Update a live entry in place, keeping its expiry"""
+        self._conn.execute(
+            "UPDATE cache SET value = ? WHERE namespace = ? AND endpoint = ? AND scope = ? AND expires_at > ?",
+            (json.dumps(value, separators=(",", ":"), default=to_plain), self.namespace, key[0], json.dumps(key[1]), self._clock()),
+        )
+
+    def invalidate(self, key: CacheKey) -> None:
+        self._conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND endpoint = ? AND scope = ?",
+            (self.namespace, key[0], json.dumps(key[1])),
+        )
+
+    def invalidate_endpoint(self, endpoint: str) -> None:
+        """Drop every entry for an endpoint, whatever its scope"""
+        self._conn.execute("DELETE FROM cache WHERE namespace = ? AND endpoint = ?", (self.namespace, endpoint))
+
+    def clear(self) -> None:
+        self._conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+
+    def entries(self, endpoint: str) -> Iterator[Tuple[CacheKey, Any]]:
+        """Iterate over live entries for an endpoint"""
+        rows = self._conn.execute(
+            "SELECT scope, value FROM cache WHERE namespace = ? AND endpoint = ? AND expires_at > ?",
+            (self.namespace, endpoint, self._clock()),
+        ).fetchall()
+        for scope, value in rows:
+            yield (endpoint, json.loads(scope)), json.loads(value)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "sqlite",
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SQLiteTokenBucket:
+    """`TokenBucket`-compatible bucket shared through SQLite
+
+    Every read-modify-write runs in an immediate transaction, so workers
+    spending from the same namespace can't both take the last token.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        namespace: str,
+        rate: Optional[float],
+        capacity: float,
+        clock: Callable[[], float] = time.time
+    ):
+        self._conn = conn
+        self.namespace = namespace
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._conn.execute(
+            "INSERT OR IGNORE INTO buckets VALUES (?, ?, ?, 0)", (namespace, float(capacity), clock())
+        )
+
+    def _update(self, change: Callable[[float, float, float], Tuple[float, float, Any]]) -> Any:
+        """Apply `change(now, tokens, paused_until) -> (tokens, paused_until, result)` atomically"""
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            tokens, updated, paused_until = self._conn.execute(
+                "SELECT tokens, updated, paused_until FROM buckets WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+            now = self._clock()
+            if self.rate is not None:
+                tokens = min(self.capacity, tokens + max(now - updated, 0.0) * self.rate)
+            tokens, paused_until, result = change(now, tokens, paused_until)
+            self._conn.execute(
+                "UPDATE buckets SET tokens = ?, updated = ?, paused_until = ? WHERE namespace = ?",
+                (tokens, now, paused_until, self.namespace),
+            )
+        return result
+
+    def try_take(self) -> bool:
+        def take(now: float, tokens: float, paused_until: float) -> Tuple[float, float, bool]:
+            if now < paused_until:
+                return tokens, paused_until, False
+            if self.rate is None:
+                return tokens, paused_until, True
+            if tokens >= 1:
+                return tokens - 1, paused_until, True
+            return tokens, paused_until, False
+        return self._update(take)
+
+    def next_grant_delay(self) -> float:
+        """Seconds until `try_take` could next succeed"""
+        def delay(now: float, tokens: float, paused_until: float) -> Tuple[float, float, float]:
+            wait = paused_until - now
+            if self.rate is not None:
+                wait = max(wait, (1 - tokens) / self.rate)
+            return tokens, paused_until, max(wait, 0.001)
+        return self._update(delay)
+
+    def pause(self, seconds: float) -> None:
+        def pause(now: float, tokens: float, paused_until: float) -> Tuple[float, float, None]:
+            return (0.0 if self.rate is not None else tokens), max(paused_until, now + seconds), None
+        self._update(pause)
+
+    def state(self) -> Tuple[Optional[float], float]:
+        """Current `(tokens, seconds paused for)`"""
+        def read(now: float, tokens: float, paused_until: float) -> Tuple[float, float, Tuple[Optional[float], float]]:
+            return tokens, paused_until, (tokens if self.rate is not None else None, max(paused_until - now, 0.0))
+        return self._update(read)
+
+
+class StateBackend:
+    """Creates the cache and rate-limit bucket for one tenant"""
+
+    name = "memory"
+
+    def cache(self, namespace: str, max_entries: int) -> Any:
+        return TTLCache(max_entries)
+
+    def bucket_factory(self, namespace: str) -> Optional[Callable[[Optional[float], float], Any]]:
+        """Factory for `RequestScheduler`; None means its default in-process bucket"""
+        return None
+
+
+class SQLiteStateBackend(StateBackend):
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = _connect(self.path)
+        return self._conn
+
+    def cache(self, namespace: str, max_entries: int) -> SQLiteCache:
+        return SQLiteCache(self.conn, namespace, max_entries)
+
+    def bucket_factory(self, namespace: str) -> Callable[[Optional[float], float], SQLiteTokenBucket]:
+        return lambda rate, capacity: SQLiteTokenBucket(self.conn, namespace, rate, capacity)
+
+
+_backends: Dict[Tuple[str, str], StateBackend] = {}
+
+
+def get_state_backend(settings: StateSettings) -> StateBackend:
+    """Shared backend instance for these settings (one SQLite connection per process)"""
+    key = (settings.backend, settings.path)
+    backend = _backends.get(key)
+    if backend is None:
+        if settings.backend == "memory":
+            backend = StateBackend()
+        elif settings.backend == "sqlite":
+            backend = SQLiteStateBackend(settings.path)
+        else:
+            raise ValueError(f"Unknown TODOIST_STATE_BACKEND {settings.backend!r}; expected 'memory' or 'sqlite'")
+        _backends[key] = backend
+    return backend
@@ -0,0 +1,401 @@
+"""
+Incremental Sync API engine
+
+Keeps an in-memory replica of the user's projects, tasks, labels and
+sections and refreshes it with `sync_token` deltas from the Todoist Sync
+API, so reads cost a small diff instead of a full download of every task.
+
+Tasks and projects are stored as compact models (see `models.py`) that read
+like the dicts the REST API returns, so tools, resources and prompts can be
+served from the replica unchanged.
+
+With a `SnapshotStore` attached, the replica is restored from disk on first
+use and every sync is persisted, so a new process only needs a delta.
+
+Objects pushed by Todoist webhooks (see `webhooks.py`) are folded in with
+`push()`. Once pushes are arriving, polling drops to a slow safety-net
+interval. Pushes that arrive before the replica is first populated are
+held and merged in after the snapshot load or first sync, which would
+otherwise replace them.
+
+With a `stale_grace`, a replica that went stale only recently is served
+as-is while it syncs in the background (stale-while-revalidate), so reads
+don't wait for the delta.
+
+Writes queued in the outbox (see `outbox.py`) are shown with overlays:
+`overlay_set()` and `overlay_delete()` change the replica without
+persisting anything, and the `after_apply` callbacks put overlays back
+after a sync or a snapshot load replaces the objects.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .metrics import decode_json
+from .models import Project, Task
+from .scheduler import Priority, request_priority
+from .snapshot import Changes, SnapshotStore
+from .task_store import TaskStore
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_TYPES = ["projects", "items", "labels", "sections", "user"]
+# Pushes held before the replica is populated; older ones are dropped, as
+# the first sync returns their objects anyway
+MAX_EARLY_PUSHES = 1000
+
+
+class SyncEngine:
+    """In-memory workspace replica kept current with incremental syncs"""
+
+    def __init__(
+        self,
+        client,
+        refresh_interval: float = 10.0,
+        snapshot: Optional[SnapshotStore] = None,
+        snapshot_max_age: float = 3600.0,
+        push_refresh_interval: float = 300.0,
+        stale_grace: float = 0.0
+    ):
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self.push_refresh_interval = push_refresh_interval
+        self.stale_grace = stale_grace
+        self.sync_token = "*"
+        self.last_synced: Optional[float] = None
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+        self.last_pushed: Optional[float] = None
+        self.pushed_events = 0
+        self.stale_served = 0
+        self.background_syncs = 0
+
+        self.projects: Dict[str, Dict[str, Any]] = {}
+        self.tasks = TaskStore()
+        self.labels: Dict[str, Dict[str, Any]] = {}
+        self.sections: Dict[str, Dict[str, Any]] = {}
+        # The account's Todoist user ID, from the `user` resource
+        self.user_id: Optional[str] = None
+        self._early_pushes: Deque[Dict[str, Any]] = deque(maxlen=MAX_EARLY_PUSHES)
+
+        self.snapshot = snapshot
+        self.snapshot_max_age = snapshot_max_age
+        self.restored_from: Optional[float] = None
+        self._restored = snapshot is None
+        self._dirty: Changes = {}
+        self._full_rewrite = False
+        self._background: Optional[asyncio.Future] = None
+        self._saving: Optional[asyncio.Future] = None
+        self.after_apply: List[Callable[[], None]] = []
+
+        self._lock = asyncio.Lock()
+
+    @property
+    def interval(self) -> float:
+        """Seconds the replica is served before it needs a sync"""
+        # Webhooks have proven to be delivering, so poll only as a safety net
+        return self.refresh_interval if self.last_pushed is None else self.push_refresh_interval
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the last sync, or None before the first one"""
+        return time.monotonic() - self.last_synced if self.last_synced is not None else None
+
+    @property
+    def is_stale(self) -> bool:
+        if self.last_synced is None:
+            return True
+        return time.monotonic() - self.last_synced >= self.interval
+
+    async def ensure_fresh(self) -> None:
+        """Sync if the replica is older than `refresh_interval`
+
+        A replica stale by less than `stale_grace` is served as it is while
+        a sync runs in the background. An interval of 0 asks for a sync on
+        every read, so it never serves stale data.
+        """
+        if not self.is_stale:
+            return
+        if self.stale_grace > 0 and self.interval > 0 and self.age is not None \
+                and self.age < self.interval + self.stale_grace:
+            self.stale_served += 1
+            self.refresh_in_background(min_age=self.interval)
+            return
+        async with self._lock:
+            if not self._restored and await self._restore():
+                return
+            # Another caller may have synced while we waited for the lock
+            if self.is_stale:
+                await self._sync()
+
+    async def _restore(self) -> bool:
+        """Load the on-disk snapshot; True if it is recent enough to serve as-is
+
+        A recent snapshot is served immediately while an incremental sync
+        catches up in the background. An older one is still loaded so the
+        catch-up is a delta, but the caller waits for it.
+        """
+        self._restored = True
+        try:
+            data = await asyncio.to_thread(self.snapshot.load)
+        except Exception:
+            logger.exception("Failed to load workspace snapshot")
+            return False
+        if not data:
+            return False
+
+        objects = data["objects"]
+        self.projects = {p["id"]: Project.from_dict(p) for p in objects.get("projects", [])}
+        self.tasks = TaskStore(Task.from_dict(t) for t in objects.get("tasks", []))
+        self.labels = {l["id"]: l for l in objects.get("labels", [])}
+        self.sections = {s["id"]: s for s in objects.get("sections", [])}
+        self.sync_token = data["sync_token"]
+        self.restored_from = data["saved_at"]
+        self._after_apply()
+
+        if time.time() - data["saved_at"] > self.snapshot_max_age:
+            return False
+        self.last_synced = time.monotonic()
+        self._merge_early_pushes()
+        self._persist()
+        self._background = asyncio.ensure_future(self._background_sync())
+        return True
+
+    def refresh_in_background(self, min_age: float = 0.0) -> None:
+        """Start a background sync unless one is already running
+
+        The sync is skipped if, by the time it gets the lock, another one
+        has left the replica younger than `min_age` seconds.
+        """
+        if self._background is None or self._background.done():
+            self._background = asyncio.ensure_future(self._background_sync(min_age))
+
+    async def _background_sync(self, min_age: float = 0.0) -> None:
+        try:
+            with request_priority(Priority.BACKGROUND):
+                async with self._lock:
+                    if self.age is not None and self.age < min_age:
+                        return
+                    await self._sync()
+                    self.background_syncs += 1
+        except Exception:
+            logger.exception("Background sync failed")
+
+    async def aclose(self) -> None:
+        """Cancel a pending background sync and flush queued snapshot saves"""
+        if self._background is not None and not self._background.done():
+            self._background.cancel()
+            try:
+                await self._background
+            except asyncio.CancelledError:
+                pass
+        self._background = None
+        if self._saving is not None:
+            await self._saving
+            self._saving = None
+
+    async def sync(self) -> Dict[str, Any]:
+        """Force an incremental sync and return engine stats"""
+        async with self._lock:
+            await self._sync()
+        return self.stats()
+
+    async def _sync(self) -> None:
+        response = await self.client._request(
+            "POST",
+            f"{self.client.settings.sync_base_url}/sync",
+            json={"sync_token": self.sync_token, "resource_types": RESOURCE_TYPES},
+        )
+        self.apply(decode_json(response))
+        self.last_synced = time.monotonic()
+        self._merge_early_pushes()
+        self._persist()
+
+    def _persist(self) -> None:
+        """Queue a save of the changes since the last one
+
+        Saves run in a worker thread, chained so they land in order, and
+        never hold up the read that triggered them.
+        """
+        if self.snapshot is None or not (self._dirty or self._full_rewrite):
+            return
+        changes, self._dirty = self._dirty, {}
+        full, self._full_rewrite = self._full_rewrite, False
+        self._saving = asyncio.ensure_future(
+            self._save(self._saving, self.sync_token, changes, full)
+        )
+
+    async def _save(self, previous: Optional[asyncio.Future], sync_token: str, changes: Changes, full: bool) -> None:
+        if previous is not None:
+            await asyncio.shield(previous)
+        try:
+            await asyncio.to_thread(self.snapshot.save, sync_token, changes, full)
+        except Exception:
+            logger.exception("Failed to save workspace snapshot")
+
+    async def write(self, commands: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Send a batch of Sync API commands, folding the resulting delta into the replica
+
+        Once the replica has been populated the current `sync_token` is sent
+        along with the commands, so the same round trip returns the changes
+        they caused. Before that, commands are sent on their own rather than
+        triggering a full download.
+        """
+        async with self._lock:
+            payload: Dict[str, Any] = {"commands": commands}
+            if self.last_synced is not None:
+                payload["sync_token"] = self.sync_token
+                payload["resource_types"] = RESOURCE_TYPES
+            response = await self.client._request(
+                "POST", f"{self.client.settings.sync_base_url}/sync", json=payload
+            )
+            data = decode_json(response)
+            if self.last_synced is not None:
+                self.apply(data)
+                self.last_synced = time.monotonic()
+                self._persist()
+            return data
+
+    def _set(self, kind: str, obj: Dict[str, Any]) -> None:
+        if kind == "tasks":
+            self.tasks.upsert(obj)
+        else:
+            getattr(self, kind)[obj["id"]] = obj
+        self._dirty.setdefault(kind, {})[obj["id"]] = obj
+
+    def _delete(self, kind: str, object_id: str) -> None:
+        if kind == "tasks":
+            self.tasks.remove(object_id)
+        else:
+            getattr(self, kind).pop(object_id, None)
+        self._dirty.setdefault(kind, {})[object_id] = None
+
+    def apply(self, payload: Dict[str, Any]) -> None:
+        """Apply a Sync API response (full or incremental) to the replica"""
+        if payload.get("full_sync"):
+            self.projects.clear()
+            self.tasks.clear()
+            self.labels.clear()
+            self.sections.clear()
+            self._dirty.clear()
+            self._full_rewrite = True
+            self.full_syncs += 1
+        else:
+            self.incremental_syncs += 1
+
+        self._merge(payload)
+
+        if payload.get("sync_token"):
+            self.sync_token = payload["sync_token"]
+        user = payload.get("user")
+        if isinstance(user, dict) and user.get("id") is not None:
+            self.user_id = str(user["id"])
+
+    async def push(self, payload: Dict[str, Any]) -> None:
+        """Fold objects delivered by a webhook into the replica
+
+        Runs under the sync lock, so an event can't be overwritten by the
+        response of a sync that was already in flight when it arrived. The
+        `sync_token` doesn't move: the next delta returns the same objects
+        again, which is harmless. Before the replica is first populated the
+        payload is held, and merged in once it is.
+        """
+        async with self._lock:
+            if self.last_synced is None:
+                self._early_pushes.append(payload)
+            else:
+                self._merge(payload)
+                self._persist()
+            self.pushed_events += 1
+            self.last_pushed = time.monotonic()
+
+    def _merge_early_pushes(self) -> None:
+        while self._early_pushes:
+            self._merge(self._early_pushes.popleft())
+
+    def _merge(self, payload: Dict[str, Any]) -> None:
+        for project in payload.get("projects", []):
+            if project.get("is_deleted") or project.get("is_archived"):
+                self._delete("projects", project["id"])
+            else:
+                self._set("projects", Project.from_sync(project))
+
+        for item in payload.get("items", []):
+            if item.get("is_deleted") or item.get("checked"):
+                self._delete("tasks", item["id"])
+            else:
+                self._set("tasks", Task.from_item(item))
+
+        for label in payload.get("labels", []):
+            if label.get("is_deleted"):
+                self._delete("labels", label["id"])
+            else:
+                self._set("labels", label)
+
+        for section in payload.get("sections", []):
+            if section.get("is_deleted") or section.get("is_archived"):
+                self._delete("sections", section["id"])
+            else:
+                self._set("sections", section)
+
+        self._after_apply()
+
+    def _after_apply(self) -> None:
+        for callback in self.after_apply:
+            callback()
+
+    def overlay_set(self, kind: str, obj: Dict[str, Any]) -> None:
+        """Show a change Todoist hasn't confirmed yet, without persisting it"""
+        if kind == "tasks":
+            self.tasks.upsert(obj)
+        else:
+            getattr(self, kind)[obj["id"]] = obj
+
+    def overlay_delete(self, kind: str, object_id: str) -> Optional[Dict[str, Any]]:
+        """Hide an object until Todoist confirms a change; returns what was hidden"""
+        if kind == "tasks":
+            return self.tasks.remove(object_id)
+        return getattr(self, kind).pop(object_id, None)
+
+    def get_tasks(self, project_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        if project_id:
+            return self.tasks.by_project(project_id)
+        return self.tasks.values()
+
+    def get_projects(self) -> List[Dict[str, Any]]:
+        return list(self.projects.values())
+
+    def upsert_task(self, task: Dict[str, Any]) -> None:
+        """Apply one of our own REST writes to the replica"""
+        if task.get("is_completed"):
+            self._delete("tasks", task["id"])
+        else:
+            self._set("tasks", Task.from_dict(task))
+
+    def remove_task(self, task_id: str) -> None:
+        self._delete("tasks", task_id)
+
+    def upsert_project(self, project: Dict[str, Any]) -> None:
+        self._set("projects", Project.from_dict(project))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            "sync_token": self.sync_token,
+            "seconds_since_sync": (
+                round(time.monotonic() - self.last_synced, 3) if self.last_synced is not None else None
+            ),
+            "restored_from_snapshot": self.restored_from is not None,
+            "full_syncs": self.full_syncs,
+            "incremental_syncs": self.incremental_syncs,
+            "pushed_events": self.pushed_events,
+            "background_syncs": self.background_syncs,
+            "stale_served": self.stale_served,
+            "projects": len(self.projects),
+            "tasks": len(self.tasks),
+            "labels": len(self.labels),
+            "sections": len(self.sections),
+        }
@@ -0,0 +1,139 @@
+"""
+Filtering, field projection and cursor pagination for task lists
+
+Used by `TodoistClient.get_tasks` so large accounts can be narrowed down
+before results are serialized back through MCP.
+"""
+
+import base64
+import json
+from datetime import date, datetime, time as dt_time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .models import Task, to_plain
+from .due_dates import parse_due_string
+from .task_store import TaskStore
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def parse_fields(fields: Optional[Union[str, Sequence[str]]]) -> Optional[List[str]]:
+    """Accept `"id,content,due"` or `["id", "content", "due"]`"""
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    names = [name.strip() for name in fields if name.strip()]
+    return names or None
+
+
+def due_bound(value: Optional[str], end_of_day: bool) -> Optional[float]:
+    """Parse a due-range bound given as an ISO date or datetime, or a due phrase
+
+    Date-only bounds are inclusive: `due_after="2024-05-01"` starts at the
+    beginning of that day and `due_before="2024-05-01"` runs to its end.
+    Phrases such as "today" or "next friday" are read the same way (see
+    `due_dates.parse_due_string`); one with a time is an exact bound.
+    """
+    if not value:
+        return None
+    try:
+        if "T" in value or " " in value:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        day = datetime.fromisoformat(value).date()
+    except ValueError:
+        parsed = parse_due_string(value, date.today())
+        if parsed is None:
+            raise ValueError(f"Invalid due date bound {value!r}; use YYYY-MM-DD, an ISO datetime "
+                             f"or a phrase like \"next friday\"")
+        day, at = parsed
+        if at is not None:
+            return datetime.combine(day, at).timestamp()
+    bound = datetime.combine(day, dt_time.max if end_of_day else dt_time.min).astimezone()
+    return bound.timestamp()
+
+
+def select_tasks(
+    store: TaskStore,
+    project_id: Optional[str] = None,
+    label: Optional[str] = None,
+    priority: Optional[int] = None,
+    due_after: Optional[str] = None,
+    due_before: Optional[str] = None
+) -> List[Task]:
+    """Pick tasks matching every given filter, starting from the narrowest index"""
+    start = due_bound(due_after, end_of_day=False)
+    end = due_bound(due_before, end_of_day=True)
+
+    if project_id:
+        candidates: Iterable[Task] = store.by_project(project_id)
+    elif label:
+        candidates = store.by_label(label)
+    elif priority is not None:
+        candidates = store.by_priority(priority)
+    elif start is not None or end is not None:
+        candidates = store.due_between(start, None if end is None else end + 1e-6)
+    else:
+        return store.values()
+
+    selected = []
+    for task in candidates:
+        if project_id and task.project_id != project_id:
+            continue
+        if label and label not in (task.labels or ()):
+            continue
+        if priority is not None and task.priority != priority:
+            continue
+        if start is not None or end is not None:
+            deadline = store.deadline(task.id)
+            if deadline is None:
+                continue
+            if start is not None and deadline < start:
+                continue
+            if end is not None and deadline > end:
+                continue
+        selected.append(task)
+    return selected
+
+
+def project(tasks: Iterable[Task], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Keep only the requested fields of each task, as plain dicts"""
+    if not fields:
+        return [to_plain(task) for task in tasks]
+    return [{name: to_plain(task.get(name)) for name in fields} for task in tasks]
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor.encode()))["offset"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
+
+
+def check_limit(limit: Optional[int]) -> int:
+    """Validate a page `limit`, returning it (or the default when none is given)"""
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+def paginate(tasks: List[Dict[str, Any]], limit: int,
+             cursor: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Slice one page of `tasks`, returning it with the cursor for the next page"""
+    limit = check_limit(limit)
+    offset = decode_cursor(cursor)
+    page = tasks[offset:offset + limit]
+    next_offset = offset + len(page)
+    return page, (encode_cursor(next_offset) if next_offset < len(tasks) else None)
@@ -0,0 +1,244 @@
+"""
+Indexed in-memory task store
+
+Holds tasks (as `Task` models, see `models.py`) with secondary indexes by
+project, label, priority and parent task, plus a sorted index over each
+task's normalized due time (see `due_dates.py`). Indexes are updated
+incrementally as tasks are upserted or removed, so per-project summaries
+and overdue checks don't have to scan every task. Deadlines read from a
+relative phrase ("tomorrow") are re-indexed when the day changes, before
+the next due-date query.
+
+Listeners registered with `subscribe()` are told about every change, so
+derived views (see `prompt_context.py`) can be maintained incrementally too.
+"""
+
+import bisect
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from .due_dates import due_deadline, is_relative
+from .models import Task
+
+# Called as listener(previous, current): an upsert passes the old task (or
+# None) and the new one, a removal passes (task, None) and clear() (None, None)
+Listener = Callable[[Optional[Task], Optional[Task]], None]
+
+
+class TaskStore:
+    """Tasks keyed by ID with incrementally maintained secondary indexes"""
+
+    def __init__(self, tasks: Iterable[Mapping[str, Any]] = ()):
+        self._tasks: Dict[str, Task] = {}
+        # Each index maps a key to an insertion-ordered set of task IDs
+        self._by_project: Dict[Hashable, Dict[str, None]] = {}
+        self._by_label: Dict[Hashable, Dict[str, None]] = {}
+        self._by_priority: Dict[Hashable, Dict[str, None]] = {}
+        self._by_parent: Dict[Hashable, Dict[str, None]] = {}
+        self._due: List[Tuple[float, str]] = []
+        self._deadlines: Dict[str, float] = {}
+        # Tasks whose deadline comes from a relative phrase, and the day it was read on
+        self._relative: Dict[str, None] = {}
+        self._relative_day: Optional[date] = None
+        self._listeners: List[Listener] = []
+        self.version = 0
+        for task in tasks:
+            self.upsert(task)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._tasks
+
+    def __iter__(self) -> Iterator[Task]:
+        return iter(self._tasks.values())
+
+    def get(self, task_id: str) -> Optional[Task]:
+        return self._tasks.get(task_id)
+
+    def values(self) -> List[Task]:
+        return list(self._tasks.values())
+
+    def subscribe(self, listener: Listener) -> None:
+        """Call `listener` after every upsert, removal and clear"""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Listener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    # Index maintenance
+
+    @staticmethod
+    def _add(index: Dict[Hashable, Dict[str, None]], key: Hashable, task_id: str) -> None:
+        index.setdefault(key, {})[task_id] = None
+
+    @staticmethod
+    def _discard(index: Dict[Hashable, Dict[str, None]], key: Hashable, task_id: str) -> None:
+        ids = index.get(key)
+        if ids is not None:
+            ids.pop(task_id, None)
+            if not ids:
+                del index[key]
+
+    def _index(self, task: Task) -> None:
+        task_id = task.id
+        self._add(self._by_project, task.project_id, task_id)
+        self._add(self._by_priority, task.priority or 1, task_id)
+        if task.parent_id:
+            self._add(self._by_parent, task.parent_id, task_id)
+        for label in task.labels or ():
+            self._add(self._by_label, label, task_id)
+        self._index_due(task_id, task.due)
+
+    def _unindex(self, task: Task) -> None:
+        task_id = task.id
+        self._discard(self._by_project, task.project_id, task_id)
+        self._discard(self._by_priority, task.priority or 1, task_id)
+        if task.parent_id:
+            self._discard(self._by_parent, task.parent_id, task_id)
+        for label in task.labels or ():
+            self._discard(self._by_label, label, task_id)
+        self._unindex_due(task_id)
+
+    def _index_due(self, task_id: str, due: Any) -> None:
+        if is_relative(due):
+            # Bring the others up to today first, so they all share one day
+            self.refresh_relative_dues()
+            self._relative[task_id] = None
+            self._relative_day = date.today()
+        deadline = due_deadline(due)
+        if deadline is not None:
+            self._deadlines[task_id] = deadline
+            bisect.insort(self._due, (deadline, task_id))
+
+    def _unindex_due(self, task_id: str) -> None:
+        self._relative.pop(task_id, None)
+        deadline = self._deadlines.pop(task_id, None)
+        if deadline is not None:
+            position = bisect.bisect_left(self._due, (deadline, task_id))
+            if position < len(self._due) and self._due[position] == (deadline, task_id):
+                del self._due[position]
+
+    def refresh_relative_dues(self) -> None:
+        """Re-index deadlines read from relative phrases if the day has changed
+
+        Called before every due-date query; bumps `version` when anything
+        was re-indexed, so views derived from deadlines are rebuilt.
+        """
+        if not self._relative:
+            return
+        today = date.today()
+        if today == self._relative_day:
+            return
+        self._relative_day = today
+        for task_id in list(self._relative):
+            self._unindex_due(task_id)
+            self._index_due(task_id, self._tasks[task_id].due)
+        self.version += 1
+
+    def upsert(self, task: Mapping[str, Any]) -> None:
+        """Insert or replace a task, updating every index it appears in
+
+        Plain task dicts are converted to `Task` models.
+        """
+        task = Task.from_dict(task)
+        previous = self._tasks.get(task.id)
+        if previous is not None:
+            self._unindex(previous)
+        self._tasks[task.id] = task
+        self._index(task)
+        self.version += 1
+        for listener in self._listeners:
+            listener(previous, task)
+
+    def remove(self, task_id: str) -> Optional[Task]:
+        task = self._tasks.pop(task_id, None)
+        if task is not None:
+            self._unindex(task)
+            self.version += 1
+            for listener in self._listeners:
+                listener(task, None)
+        return task
+
+    def clear(self) -> None:
+        self._tasks.clear()
+        self._by_project.clear()
+        self._by_label.clear()
+        self._by_priority.clear()
+        self._by_parent.clear()
+        self._due.clear()
+        self._deadlines.clear()
+        self._relative.clear()
+        self.version += 1
+        for listener in self._listeners:
+            listener(None, None)
+
+    # Queries
+
+    def _lookup(self, ids: Optional[Dict[str, None]]) -> List[Task]:
+        return [self._tasks[task_id] for task_id in ids] if ids else []
+
+    def by_project(self, project_id: Optional[str]) -> List[Task]:
+        return self._lookup(self._by_project.get(project_id))
+
+    def iter_by_project(self, project_id: Optional[str]) -> Iterator[Task]:
+        """Lazily iterate a project's tasks without building a list"""
+        for task_id in self._by_project.get(project_id, ()):
+            yield self._tasks[task_id]
+
+    def project_size(self, project_id: Optional[str]) -> int:
+        return len(self._by_project.get(project_id, ()))
+
+    def by_label(self, label: str) -> List[Task]:
+        return self._lookup(self._by_label.get(label))
+
+    def by_priority(self, priority: int) -> List[Task]:
+        return self._lookup(self._by_priority.get(priority))
+
+    def iter_by_priority(self, priority: int) -> Iterator[Task]:
+        """Lazily iterate tasks of one priority, in insertion order"""
+        for task_id in self._by_priority.get(priority, ()):
+            yield self._tasks[task_id]
+
+    def priority_size(self, priority: int) -> int:
+        return len(self._by_priority.get(priority, ()))
+
+    def children(self, parent_id: str) -> List[Task]:
+        return self._lookup(self._by_parent.get(parent_id))
+
+    def project_ids(self) -> List[Optional[str]]:
+        """Project IDs that have at least one task, in first-seen order"""
+        return list(self._by_project)
+
+    def count_by_project(self) -> Dict[Optional[str], int]:
+        return {project_id: len(ids) for project_id, ids in self._by_project.items()}
+
+    def count_by_priority(self) -> Dict[int, int]:
+        return {priority: len(ids) for priority, ids in self._by_priority.items()}
+
+    def deadline(self, task_id: str) -> Optional[float]:
+        """Normalized due timestamp of a task, if it has a due date"""
+        self.refresh_relative_dues()
+        return self._deadlines.get(task_id)
+
+    def due_between(self, start: Optional[float] = None, end: Optional[float] = None) -> List[Task]:
+        """Tasks whose deadline falls in `[start, end)`, soonest first"""
+        self.refresh_relative_dues()
+        lo = 0 if start is None else bisect.bisect_left(self._due, (start, ""))
+        hi = len(self._due) if end is None else bisect.bisect_left(self._due, (end, ""))
+        return [self._tasks[task_id] for _, task_id in self._due[lo:hi]]
+
+    def overdue_count(self, now: Optional[float] = None) -> int:
+        """Number of overdue tasks, without building the list"""
+        if now is None:
+            now = datetime.now(timezone.utc).timestamp()
+        self.refresh_relative_dues()
+        return bisect.bisect_left(self._due, (now, ""))
+
+    def overdue(self, now: Optional[float] = None) -> List[Task]:
+        """Tasks whose deadline has passed, most overdue first"""
+        if now is None:
+            now = datetime.now(timezone.utc).timestamp()
+        return self.due_between(end=now)
@@ -2,23 +2,176 @@
 Todoist API Client
 
 This module handles all interactions with the Todoist API.
+
+A single pooled `httpx.AsyncClient` is shared by every request the client
+makes, so connections (and their TLS sessions) are reused across tool calls
+instead of being re-established each time.
+
+Reads of tasks and projects go through an optional read-through cache
+(see `cache.py`); the client's own writes update the cached entries so
+subsequent reads stay consistent. Data that reads keep asking for is
+refreshed in the background before it expires (see `refresher.py`).
+
+When the sync engine is enabled (the default) task and project reads are
+served from an in-memory replica kept current with incremental Sync API
+deltas instead (see `sync_engine.py`). The replica is persisted to disk
+(see `snapshot.py`) so a restarted server only needs a delta.
+
+Bulk writes are sent as batched Sync API command lists, so creating or
+updating many tasks costs one round trip per 100 commands. With the outbox
+enabled, single writes are queued on disk, applied locally and sent in the
+background instead (see `outbox.py`).
+
+Every request is paced and retried by a `RequestScheduler` (see
+`scheduler.py`) so bursts degrade into queueing rather than 429 failures.
+The cache and rate-limit bucket can be shared between worker processes
+(see `state_backend.py`). Identical concurrent reads are coalesced into
+one upstream request (see `singleflight.py`), and task and project lists
+are held as compact models (see `models.py`). Changes pushed by Todoist
+webhooks are applied with `apply_pushed()` (see `webhooks.py`) instead of
+being refetched. Each request's attempts, retries, response size and JSON
+decoding time are recorded in `metrics.py`.
 """
 
+import gzip
+import json
 import os
-from typing import Dict, List, Optional, Any
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Dict, List, Optional, Any, Sequence, Tuple, Type, Union
 import httpx
 
+from . import analytics, formats, metrics, task_query
+from .cache import MISSING, CacheKey, TTLCache
+from .client_pool import tenant_key
+from .config import Settings, TransportSettings
+from .fanout import Outcome, gather_bounded
+from .models import Model, Project, Task, to_plain
+from .outbox import Outbox, OutboxStore, outbox_path, pending_project, pending_task
+from .prompt_context import PromptContext
+from .refresher import Refresher
+from .scheduler import RequestScheduler
+from .search_index import MAX_RESULTS as MAX_SEARCH_RESULTS, SearchIndex
+from .singleflight import SingleFlight
+from .snapshot import SnapshotStore, snapshot_path
+from .state_backend import get_state_backend
+from .sync_engine import SyncEngine
+from .task_store import TaskStore
+
+# Todoist accepts at most 100 commands per Sync API request
+MAX_COMMANDS_PER_REQUEST = 100
+# Largest page the completed-task history endpoint returns
+COMPLETED_PAGE_SIZE = 200
+
+# Command arguments that may refer to an object created earlier in the batch
+_ID_ARGS = ("id", "project_id", "section_id", "parent_id")
+
+
+def _command(command_type: str, args: Dict[str, Any], temp_id: Optional[str] = None) -> Dict[str, Any]:
+    """Build a Sync API command"""
+    command = {"type": command_type, "uuid": str(uuid.uuid4()), "args": args}
+    if temp_id:
+        command["temp_id"] = temp_id
+    return command
+
+
+def _http2_available() -> bool:
+    """HTTP/2 support in httpx needs the optional `h2` package"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_http_client(transport: TransportSettings, **kwargs: Any) -> httpx.AsyncClient:
+    """Create a pooled AsyncClient configured from transport settings"""
+    return httpx.AsyncClient(
+        http2=transport.http2 and _http2_available(),
+        limits=httpx.Limits(
+            max_connections=transport.max_connections,
+            max_keepalive_connections=transport.max_keepalive_connections,
+            keepalive_expiry=transport.keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(
+            connect=transport.connect_timeout,
+            read=transport.read_timeout,
+            write=transport.write_timeout,
+            pool=transport.pool_timeout,
+        ),
+        **kwargs
+    )
+
 
 class TodoistClient:
     """Client for interacting with the Todoist API"""
-    
-    def __init__(self, api_token: Optional[str] = None):
+
+    def __init__(self, api_token: Optional[str] = None, settings: Optional[Settings] = None):
         self.api_token = api_token or os.getenv("TODOIST_API_TOKEN")
-        self.base_url = "https://api.todoist.com/rest/v2"
-        
+        self.settings = settings or Settings.from_env()
+        self.base_url = self.settings.rest_base_url
+
         if not self.api_token:
             raise ValueError("Todoist API token is required. Set TODOIST_API_TOKEN environment variable.")
-    
+
+        self._http: Optional[httpx.AsyncClient] = None
+        self._users = 0
+        state = get_state_backend(self.settings.state)
+        namespace = tenant_key(self.api_token)
+        self.scheduler = RequestScheduler(
+            self.settings.rate_limit, bucket_factory=state.bucket_factory(namespace)
+        )
+        self._reads = SingleFlight()
+
+        cache_settings = self.settings.cache
+        self.cache: Optional[TTLCache] = (
+            state.cache(namespace, cache_settings.max_entries) if cache_settings.enabled else None
+        )
+        self._ttls = {
+            "tasks": cache_settings.tasks_ttl,
+            "tasks_filter": cache_settings.tasks_ttl,
+            "projects": cache_settings.projects_ttl,
+            "completed": cache_settings.tasks_ttl,
+        }
+
+        # Without the sync engine: the cached full task list and the store built over it
+        self._rest_store: Optional[Tuple[Any, TaskStore]] = None
+        self._prompt_context: Optional[PromptContext] = None
+        self._task_columns: Optional[analytics.TaskColumns] = None
+        self._user_id: Optional[str] = None
+        self.search_index = SearchIndex()
+
+        self.sync: Optional[SyncEngine] = None
+        if self.settings.sync.enabled:
+            snapshot_settings = self.settings.snapshot
+            snapshot = (
+                SnapshotStore(snapshot_path(snapshot_settings.directory, self.api_token))
+                if snapshot_settings.enabled else None
+            )
+            self.sync = SyncEngine(
+                self,
+                self.settings.sync.refresh_interval,
+                snapshot=snapshot,
+                snapshot_max_age=snapshot_settings.max_age,
+                push_refresh_interval=self.settings.sync.push_refresh_interval,
+                stale_grace=self.settings.refresh.stale_grace if self.settings.refresh.enabled else 0.0,
+            )
+
+        self.refresher: Optional[Refresher] = (
+            Refresher(self, self.settings.refresh) if self.settings.refresh.enabled else None
+        )
+
+        self.outbox: Optional[Outbox] = None
+        if self.settings.outbox.enabled:
+            self.outbox = Outbox(
+                self,
+                OutboxStore(outbox_path(self.settings.outbox.directory, self.api_token)),
+                self.settings.outbox,
+            )
+            if self.sync is not None:
+                self.sync.after_apply.append(self.outbox.reapply)
+
     @property
     def headers(self) -> Dict[str, str]:
         """Get headers for API requests"""
@@ -26,83 +179,798 @@ class TodoistClient:
             "Authorization": f"Bearer {self.api_token}",
             "Content-Type": "application/json"
         }
-    
-    async def get_tasks(self, project_id: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get tasks from Todoist"""
-        params = {}
-        if project_id:
-            params["project_id"] = project_id
-            
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/tasks",
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the pooled transport is currently open"""
+        return self._http is not None and not self._http.is_closed
+
+    async def open(self) -> "TodoistClient":
+        """Open the pooled transport (reference counted)
+
+        Every `open()` must be paired with an `aclose()`. The transport is
+        only torn down when the last user releases it, so the server
+        lifespan and individual sessions can share one pool.
+        """
+        self._users += 1
+        self._transport()
+        if self.outbox is not None:
+            await self.outbox.start()
+        return self
+
+    async def aclose(self) -> None:
+        """Release the pooled transport, closing it when no users remain"""
+        self._users = max(self._users - 1, 0)
+        if self._users == 0 and self._http is not None:
+            if self.outbox is not None:
+                await self.outbox.aclose()
+            if self.refresher is not None:
+                await self.refresher.aclose()
+            if self.sync is not None:
+                await self.sync.aclose()
+            http, self._http = self._http, None
+            await http.aclose()
+
+    async def __aenter__(self) -> "TodoistClient":
+        return await self.open()
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    def _transport(self) -> httpx.AsyncClient:
+        """Return the shared AsyncClient, creating it on first use"""
+        if self._http is None or self._http.is_closed:
+            self._http = build_http_client(
+                self.settings.transport,
+                base_url=self.base_url,
                 headers=self.headers,
-                params=params
             )
+        return self._http
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        """Send a request over the pooled transport and raise on HTTP errors
+
+        Requests are paced and retried by the scheduler. Writes carry a
+        stable `X-Request-Id` so a retried POST can't be applied twice.
+        """
+        if method != "GET":
+            kwargs["headers"] = {"X-Request-Id": str(uuid.uuid4()), **kwargs.get("headers", {})}
+        if "json" in kwargs and self.settings.transport.compress_requests:
+            self._compress_body(kwargs)
+        url = httpx.URL(path)
+        if not url.is_absolute_url:
+            url = httpx.URL(self.base_url.rstrip("/") + path)
+        endpoint = metrics.endpoint_label(url.path)
+        attempts = 0
+
+        async def send() -> httpx.Response:
+            nonlocal attempts
+            attempts += 1
+            start = time.perf_counter()
+            status = "error"
+            try:
+                response = await self._transport().request(method, path, **kwargs)
+                status = str(response.status_code)
+                metrics.UPSTREAM_BYTES.observe((method, endpoint), len(response.content))
+                return response
+            finally:
+                metrics.UPSTREAM_SECONDS.observe((method, endpoint, status), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        try:
+            response = await self.scheduler.send(send)
             response.raise_for_status()
-            return response.json()
-    
+        except httpx.HTTPError:
+            metrics.UPSTREAM_ERRORS.inc((method, endpoint))
+            raise
+        finally:
+            metrics.UPSTREAM_RETRIES.inc((method, endpoint), max(attempts - 1, 0))
+            metrics.UPSTREAM_CALL_SECONDS.observe((method, endpoint), time.perf_counter() - start)
+        return response
+
+    def _compress_body(self, kwargs: Dict[str, Any]) -> None:
+        """Send a large JSON body gzipped instead (responses are negotiated by httpx)"""
+        body = json.dumps(kwargs["json"], separators=(",", ":")).encode()
+        if len(body) < self.settings.transport.compress_min_size:
+            return
+        del kwargs["json"]
+        kwargs["content"] = gzip.compress(body, compresslevel=6)
+        kwargs["headers"] = {**kwargs.get("headers", {}), "Content-Encoding": "gzip",
+                             "Content-Type": "application/json"}
+
+    async def _get_json(self, path: str, params: Optional[Dict[str, Any]] = None,
+                        model: Optional[Type[Model]] = None) -> Any:
+        """GET and decode JSON, sharing one in-flight request between identical callers
+
+        With `model`, the response is a list decoded into instances of it.
+        """
+        params = params or {}
+        key = (path, tuple(sorted(params.items())))
+
+        async def fetch() -> Any:
+            response = await self._request("GET", path, params=params)
+            data = metrics.decode_json(response)
+            return [model.from_dict(obj) for obj in data] if model is not None else data
+
+        return await self._reads.do(key, fetch)
+
+    async def gather(self, *calls: Awaitable[Any]) -> List[Outcome]:
+        """Run independent client calls concurrently (see `fanout.gather_bounded`)"""
+        return await gather_bounded(*calls, limit=self.settings.fanout_limit)
+
+    def _cache_get(self, key: Any) -> Any:
+        if self.cache is None:
+            return MISSING
+        value = self.cache.get(key)
+        # Hand out a copy so callers can't mutate the cached list
+        return list(value) if value is not MISSING else MISSING
+
+    def _cache_set(self, key: Any, value: List[Dict[str, Any]]) -> None:
+        if self.cache is not None:
+            self.cache.set(key, list(value), self._ttls[key[0]])
+
+    def ttl(self, key: CacheKey) -> float:
+        return self._ttls[key[0]]
+
+    def is_cached(self, key: CacheKey) -> bool:
+        """Whether a read of `key` would be served from the cache"""
+        if self.cache is None:
+            return False
+        if self.cache.peek(key) is not MISSING:
+            return True
+        return key[0] == "tasks" and self.cache.peek(("tasks", None)) is not MISSING
+
+    async def _fetch(self, key: CacheKey) -> List[Dict[str, Any]]:
+        """Load a cacheable list from the REST API and cache it"""
+        endpoint, scope = key
+        if endpoint == "projects":
+            value = await self._get_json("/projects", model=Project)
+        elif endpoint == "tasks_filter":
+            value = await self._get_json("/tasks", {"filter": scope}, model=Task)
+        else:
+            value = await self._get_json("/tasks", {"project_id": scope} if scope else {}, model=Task)
+        self._cache_set(key, value)
+        return value
+
+    def _note(self, key: Optional[CacheKey] = None) -> None:
+        if self.refresher is not None:
+            self.refresher.note(key)
+
+    def _cache_add_task(self, task: Dict[str, Any]) -> None:
+        """Write a newly created task through to the cached task lists"""
+        if self.cache is None:
+            return
+        for key, tasks in self.cache.entries("tasks"):
+            if key[1] is None or key[1] == task.get("project_id"):
+                self.cache.replace(key, tasks + [task])
+        # We can't tell locally whether the new task matches a filter query
+        self.cache.invalidate_endpoint("tasks_filter")
+
+    def _cache_remove_task(self, task_id: str) -> None:
+        """Drop a completed task from every cached task list"""
+        if self.cache is None:
+            return
+        for key, tasks in [*self.cache.entries("tasks"), *self.cache.entries("tasks_filter")]:
+            remaining = [t for t in tasks if t.get("id") != task_id]
+            if len(remaining) != len(tasks):
+                self.cache.replace(key, remaining)
+        self.cache.invalidate_endpoint("completed")
+
+    def _cache_upsert_task(self, task: Dict[str, Any]) -> None:
+        """Write a changed task through to the cached task lists
+
+        Idempotent, so a shared cache stays correct when several workers
+        apply the same change.
+        """
+        if self.cache is None:
+            return
+        for key, tasks in self.cache.entries("tasks"):
+            updated = [t for t in tasks if t.get("id") != task["id"]]
+            if key[1] is None or key[1] == task.get("project_id"):
+                updated.append(task)
+            if updated != tasks:
+                self.cache.replace(key, updated)
+        self.cache.invalidate_endpoint("tasks_filter")
+
+    def _cache_upsert_project(self, project: Optional[Dict[str, Any]], project_id: str) -> None:
+        """Replace (or with `project=None`, drop) a project in the cached project list"""
+        if self.cache is None:
+            return
+        key = ("projects", None)
+        projects = self.cache.peek(key)
+        if projects is MISSING:
+            return
+        updated = [p for p in projects if p.get("id") != project_id]
+        if project is not None:
+            updated.append(project)
+        self.cache.replace(key, updated)
+
+    def knows_project(self, project_id: Optional[str]) -> bool:
+        """Whether this client has seen the project in its replica or cache"""
+        if not project_id:
+            return False
+        if self.sync is not None and project_id in self.sync.projects:
+            return True
+        if self.cache is not None:
+            projects = self.cache.peek(("projects", None))
+            if projects is not MISSING:
+                return any(p.get("id") == project_id for p in projects)
+        return False
+
+    def _owns(self, payload: Dict[str, Any]) -> bool:
+        project_ids = [item.get("project_id") for item in payload.get("items", [])]
+        project_ids += [project.get(field) for project in payload.get("projects", [])
+                        for field in ("id", "parent_id")]
+        project_ids += [section.get("project_id") for section in payload.get("sections", [])]
+        return any(self.knows_project(project_id) for project_id in project_ids)
+
+    async def user_id(self) -> str:
+        """ID of the Todoist user this client's token belongs to
+
+        Taken from the replica's `user` resource when it has synced, and
+        otherwise fetched once from the Sync API.
+        """
+        if self._user_id is None and self.sync is not None:
+            self._user_id = self.sync.user_id
+        if self._user_id is None:
+            response = await self._request(
+                "POST",
+                f"{self.settings.sync_base_url}/sync",
+                json={"sync_token": "*", "resource_types": ["user"]},
+            )
+            self._user_id = str(metrics.decode_json(response)["user"]["id"])
+        return self._user_id
+
+    async def apply_pushed(self, payload: Dict[str, Any], user_id: Optional[str],
+                           known_only: bool = False) -> bool:
+        """Apply objects pushed by a webhook to the replica and cache
+
+        `payload` has the shape of a Sync API delta (`items`, `projects`,
+        `sections`, `labels`) and `user_id` is the user the event is for.
+        The webhook secret belongs to the Todoist app, not to a user, so
+        events for any other user of the app are ignored. With
+        `known_only`, objects that don't belong to a project this client
+        already knows are ignored too, which matches a webhook to its
+        tenant without a lookup. Returns whether it was applied.
+        """
+        if known_only and not self._owns(payload):
+            return False
+        if user_id is None or str(user_id) != await self.user_id():
+            return False
+        if self.sync is not None:
+            await self.sync.push(payload)
+        for item in payload.get("items", []):
+            if item.get("is_deleted") or item.get("checked"):
+                self._cache_remove_task(item["id"])
+            else:
+                self._cache_upsert_task(Task.from_item(item))
+        for project in payload.get("projects", []):
+            removed = project.get("is_deleted") or project.get("is_archived")
+            self._cache_upsert_project(None if removed else Project.from_sync(project), project["id"])
+        return True
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Cache hit/miss counters, or `{"enabled": False}` when caching is off"""
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.stats()}
+
+    def sync_stats(self) -> Dict[str, Any]:
+        """Replica size and sync counters, or `{"enabled": False}` when sync is off"""
+        if self.sync is None:
+            return {"enabled": False}
+        return self.sync.stats()
+
+    def rate_limit_stats(self) -> Dict[str, Any]:
+        """Scheduler queue depth, wait times, retry, read-coalescing and background refresh counters"""
+        return {
+            **self.scheduler.stats(),
+            "coalescing": self._reads.stats(),
+            "background_refresh": self.refresher.stats() if self.refresher is not None else {"enabled": False},
+        }
+
+    async def get_tasks(
+        self,
+        project_id: Optional[str] = None,
+        filter: Optional[str] = None,
+        label: Optional[str] = None,
+        priority: Optional[int] = None,
+        due_after: Optional[str] = None,
+        due_before: Optional[str] = None,
+        fields: Optional[Union[str, Sequence[str]]] = None,
+        format: str = "json"
+    ) -> Any:
+        """Get tasks from Todoist
+
+        `filter` is passed through to Todoist's filter query language
+        (e.g. `"today | overdue"`). The other filters are applied locally
+        against the task indexes, and `fields` keeps only the named fields
+        of each task. A `format` other than `"json"` renders the list in one
+        of the compact formats in `formats.py` instead.
+        """
+        format = formats.check_format(format)
+        tasks = await self._select_tasks(project_id, filter, label, priority, due_after, due_before)
+        return await self._render_tasks(tasks, fields, format)
+
+    async def get_tasks_page(
+        self,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        format: str = "json",
+        **filters: Any
+    ) -> Dict[str, Any]:
+        """Get one page of tasks plus the cursor for the next page
+
+        Accepts the same filters as `get_tasks`. `limit` defaults to 50 and
+        must be between 1 and 500. Cursors are positional, so tasks added or
+        completed between pages can shift page boundaries.
+        """
+        format = formats.check_format(format)
+        limit = task_query.check_limit(limit)
+        fields = filters.pop("fields", None)
+        tasks = await self._select_tasks(**filters)
+        page, next_cursor = task_query.paginate(tasks, limit, cursor)
+        return {"tasks": await self._render_tasks(page, fields, format),
+                "next_cursor": next_cursor, "total": len(tasks)}
+
+    async def _select_tasks(
+        self,
+        project_id: Optional[str] = None,
+        filter: Optional[str] = None,
+        label: Optional[str] = None,
+        priority: Optional[int] = None,
+        due_after: Optional[str] = None,
+        due_before: Optional[str] = None
+    ) -> List[Task]:
+        narrowed = filter or label or priority is not None or due_after or due_before
+        if not narrowed:
+            return await self._get_all_tasks(project_id)
+        if filter:
+            return task_query.select_tasks(
+                TaskStore(await self._get_filtered_tasks(filter)),
+                project_id, label, priority, due_after, due_before
+            )
+        return task_query.select_tasks(
+            await self.get_task_store(), project_id, label, priority, due_after, due_before
+        )
+
+    async def _render_tasks(self, tasks: List[Task], fields: Optional[Union[str, Sequence[str]]],
+                            format: str) -> Any:
+        fields = task_query.parse_fields(fields)
+        if format == "json":
+            return task_query.project(tasks, fields)
+        projects = await self.get_projects() if format == "grouped" else ()
+        return formats.render_tasks(tasks, format, fields, projects)
+
+    async def _get_all_tasks(self, project_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        if self.sync is not None:
+            self._note()
+            await self.sync.ensure_fresh()
+            return self.sync.get_tasks(project_id)
+
+        key = ("tasks", project_id or None)
+        cached = self._cache_get(key)
+        if cached is not MISSING:
+            self._note(key)
+            return cached
+        if project_id and self.cache is not None:
+            # A project's tasks are a slice of the full list, when that is cached
+            everything = self.cache.peek(("tasks", None))
+            if everything is not MISSING:
+                self._note(("tasks", None))
+                return [task for task in everything if task.get("project_id") == project_id]
+
+        self._note(key)
+        return await self._fetch(key)
+
+    async def _get_filtered_tasks(self, filter: str) -> List[Dict[str, Any]]:
+        """Evaluate a Todoist filter query server-side"""
+        key = ("tasks_filter", filter)
+        self._note(key)
+        cached = self._cache_get(key)
+        if cached is not MISSING:
+            return cached
+
+        return await self._fetch(key)
+
+    async def get_task_store(self) -> TaskStore:
+        """Get all tasks as an indexed `TaskStore`
+
+        With the sync engine enabled this is the live replica; otherwise an
+        index is built over the current task list, and reused for as long as
+        that list stays cached.
+        """
+        if self.sync is not None:
+            self._note()
+            await self.sync.ensure_fresh()
+            return self.sync.tasks
+        tasks = await self._get_all_tasks()
+        # Writes replace cached lists rather than changing them, so the same
+        # entry means the same tasks
+        cached = self.cache.peek(("tasks", None)) if self.cache is not None else MISSING
+        if cached is not MISSING and self._rest_store is not None and self._rest_store[0] is cached:
+            return self._rest_store[1]
+        store = TaskStore(tasks)
+        self._rest_store = (cached, store) if cached is not MISSING else None
+        return store
+
+    async def get_prompt_context(self) -> PromptContext:
+        """Get the prompt context for the current task store
+
+        With the sync engine enabled the context follows the live replica
+        across calls; otherwise it is rebuilt once per cached task list.
+        """
+        store = await self.get_task_store()
+        context = self._prompt_context
+        if context is None or context.store is not store:
+            if context is not None:
+                context.close()
+            context = self._prompt_context = PromptContext(store)
+        return context
+
+    async def get_task_columns(self) -> analytics.TaskColumns:
+        """Get active tasks as columnar arrays for analytics (see `analytics.py`)
+
+        Built once per version of the live replica with the sync engine
+        enabled; otherwise once per cached task list.
+        """
+        store = await self.get_task_store()
+        columns = self._task_columns
+        if columns is None or not columns.current(store):
+            columns = self._task_columns = analytics.TaskColumns(store)
+        return columns
+
+    async def get_completed_tasks(self, since: datetime) -> List[Dict[str, Any]]:
+        """Tasks completed since `since`, newest first
+
+        Pages through the Sync API's completed-task history. Results are
+        cached per day of `since` for the tasks TTL.
+        """
+        since = since.astimezone(timezone.utc)
+        key = ("completed", since.strftime("%Y-%m-%d"))
+        cached = self._cache_get(key)
+        if cached is not MISSING:
+            return cached
+
+        params = {"since": since.strftime("%Y-%m-%dT%H:%M"), "limit": COMPLETED_PAGE_SIZE}
+        items: List[Dict[str, Any]] = []
+        while True:
+            page = await self._get_json(f"{self.settings.sync_base_url}/completed/get_all",
+                                        {**params, "offset": len(items)})
+            batch = page.get("items", [])
+            items.extend(batch)
+            if len(batch) < COMPLETED_PAGE_SIZE:
+                break
+        self._cache_set(key, items)
+        return items
+
+    async def _analytics_inputs(self) -> Tuple[analytics.TaskColumns, Dict[str, Optional[str]]]:
+        columns_result, projects_result = await self.gather(self.get_task_columns(), self.get_projects())
+        names = {project["id"]: project.get("name") for project in projects_result.unwrap()}
+        return columns_result.unwrap(), names
+
+    async def get_workload(self, days: int = 7, group_by: str = "project",
+                           offset_days: int = 0) -> Dict[str, Any]:
+        """Active, high-priority, overdue and due-soon task counts per project or label
+
+        The window is the `days` days starting `offset_days` days from today
+        (from now, for the default of today).
+        """
+        if days < 1 or days > analytics.MAX_DAYS:
+            raise ValueError(f"days must be between 1 and {analytics.MAX_DAYS}")
+        if group_by not in ("project", "label"):
+            raise ValueError("group_by must be 'project' or 'label'")
+        columns, names = await self._analytics_inputs()
+        now = time.time()
+        today = datetime.now().date()
+        start = now if offset_days == 0 else analytics.day_start(today + timedelta(days=offset_days))
+        end = analytics.day_start(today + timedelta(days=offset_days + days))
+        return columns.memo(
+            ("workload", days, group_by, offset_days, int(now // 60)),
+            lambda: analytics.workload(columns, now, start, end, group_by, names),
+        )
+
+    async def get_due_forecast(self, days: int = 14) -> Dict[str, Any]:
+        """Overdue tasks by age and tasks due on each of the next `days` days"""
+        if days < 1 or days > analytics.MAX_DAYS:
+            raise ValueError(f"days must be between 1 and {analytics.MAX_DAYS}")
+        columns = await self.get_task_columns()
+        now = time.time()
+        return columns.memo(
+            ("forecast", days, int(now // 60)),
+            lambda: analytics.due_forecast(columns, now, datetime.now().date(), days),
+        )
+
+    async def get_completion_velocity(self, weeks: int = 4) -> Dict[str, Any]:
+        """Tasks completed per week over the last `weeks` weeks, against what's due"""
+        if weeks < 1 or weeks > analytics.MAX_WEEKS:
+            raise ValueError(f"weeks must be between 1 and {analytics.MAX_WEEKS}")
+        since = datetime.fromtimestamp(analytics.day_start(datetime.now().date() - timedelta(days=weeks * 7)))
+        completed_result, inputs_result = await self.gather(self.get_completed_tasks(since),
+                                                            self._analytics_inputs())
+        columns, names = inputs_result.unwrap()
+        return analytics.velocity(completed_result.unwrap(), columns, time.time(), weeks, names)
+
+    async def search_tasks(self, query: str, limit: int = 10,
+                           project_id: Optional[str] = None) -> Dict[str, Any]:
+        """Rank tasks by how well they match `query` (see `search_index.py`)
+
+        The index follows the live replica with the sync engine enabled, and
+        is brought up to date with each fresh task list otherwise.
+        """
+        if limit < 1 or limit > MAX_SEARCH_RESULTS:
+            raise ValueError(f"limit must be between 1 and {MAX_SEARCH_RESULTS}")
+        store_result, projects_result = await self.gather(self.get_task_store(), self.get_projects())
+        self.search_index.follow(store_result.unwrap())
+        self.search_index.set_projects(projects_result.unwrap())
+        results, total = self.search_index.search(query, limit, project_id)
+        return {"results": results, "total": total}
+
+    async def find_project(self, name: str) -> Optional[Dict[str, Any]]:
+        """The project with this name (case-insensitive), if there is one"""
+        self.search_index.set_projects(await self.get_projects())
+        return self.search_index.project(name)
+
+    async def find_projects(self, name: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Projects whose names best match `name`, ranked, an exact match first"""
+        self.search_index.set_projects(await self.get_projects())
+        return self.search_index.find_projects(name, limit)
+
     async def create_task(
-        self, 
-        content: str, 
+        self,
+        content: str,
         project_id: Optional[str] = None,
         labels: Optional[List[str]] = None,
         priority: int = 1,
         due_string: Optional[str] = None
     ) -> Dict[str, Any]:
         """Create a new task"""
+        if self.outbox is not None:
+            args: Dict[str, Any] = {"content": content, "priority": priority}
+            if project_id:
+                args["project_id"] = self.outbox.resolve(project_id)
+            if labels:
+                args["labels"] = labels
+            if due_string:
+                args["due"] = {"string": due_string}
+            task = await self.outbox.enqueue(_command("item_add", args, temp_id=str(uuid.uuid4())))
+            return {**to_plain(task), "pending": True}
+
         task_data = {
             "content": content,
             "priority": priority
         }
-        
+
         if project_id:
             task_data["project_id"] = project_id
         if labels:
             task_data["labels"] = labels
         if due_string:
             task_data["due_string"] = due_string
-            
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/tasks",
-                headers=self.headers,
-                json=task_data
-            )
-            response.raise_for_status()
-            return response.json()
-    
+
+        response = await self._request("POST", "/tasks", json=task_data)
+        task = metrics.decode_json(response)
+        model = Task.from_dict(task)
+        self._cache_add_task(model)
+        if self.sync is not None:
+            self.sync.upsert_task(model)
+        return task
+
     async def complete_task(self, task_id: str) -> bool:
         """Mark a task as completed"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/tasks/{task_id}/close",
-                headers=self.headers
-            )
-            response.raise_for_status()
+        if self.outbox is not None:
+            await self.outbox.enqueue(_command("item_close", {"id": self.outbox.resolve(task_id)}))
             return True
-    
+
+        await self._request("POST", f"/tasks/{task_id}/close")
+        self._cache_remove_task(task_id)
+        if self.sync is not None:
+            self.sync.remove_task(task_id)
+        return True
+
+    def _inbox_id(self) -> Optional[str]:
+        if self.sync is not None:
+            for project in self.sync.projects.values():
+                if project.get("is_inbox_project"):
+                    return project["id"]
+        return None
+
+    def _show_pending(self, command: Dict[str, Any]) -> Optional[Model]:
+        """Apply a queued command to the replica and cache before Todoist has run it
+
+        Returns the new task or project, or the task a close hid.
+        """
+        kind = command["type"]
+        if kind == "item_add":
+            task = pending_task(command, self._inbox_id())
+            if self.sync is not None:
+                self.sync.overlay_set("tasks", task)
+            self._cache_add_task(task)
+            return task
+        if kind == "item_close":
+            task_id = command["args"]["id"]
+            self._cache_remove_task(task_id)
+            return self.sync.overlay_delete("tasks", task_id) if self.sync is not None else None
+        if kind == "project_add":
+            project = pending_project(command)
+            if self.sync is not None:
+                self.sync.overlay_set("projects", project)
+            self._cache_upsert_project(project, project["id"])
+            return project
+        return None
+
+    def _settle_pending(self, command: Dict[str, Any], error: Optional[str], replaced: Optional[Model]) -> None:
+        """Drop a queued command's local stand-in once Todoist has answered
+
+        On success the replica already holds the real object (from the
+        write's delta) and cached lists are refetched; on failure the local
+        change is undone.
+        """
+        kind = command["type"]
+        if kind == "item_add" and self.sync is not None:
+            self.sync.overlay_delete("tasks", command["temp_id"])
+        elif kind == "project_add":
+            if self.sync is not None:
+                self.sync.overlay_delete("projects", command["temp_id"])
+            if self.cache is not None:
+                self.cache.invalidate_endpoint("projects")
+        elif kind == "item_close" and error is not None and replaced is not None and self.sync is not None:
+            self.sync.overlay_set("tasks", replaced)
+        if self.cache is not None:
+            self.cache.invalidate_endpoint("tasks")
+            self.cache.invalidate_endpoint("tasks_filter")
+            self.cache.invalidate_endpoint("completed")
+
+    async def execute_commands(self, commands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run Sync API commands in batches and report the outcome of each one
+
+        Commands may refer to `temp_id`s assigned earlier in the list (for
+        example a subtask whose `parent_id` is the temp id of a new parent),
+        including across batch boundaries. Writes queued in the outbox are
+        sent first, so commands run in the order they were made and can
+        refer to objects the outbox created.
+        """
+        if self.outbox is not None:
+            await self.outbox.flush()
+            commands = [self.outbox.resolved(command) for command in commands]
+        return await self._execute(commands)
+
+    async def _execute(self, commands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        temp_id_mapping: Dict[str, str] = {}
+        results: List[Dict[str, Any]] = []
+
+        for start in range(0, len(commands), MAX_COMMANDS_PER_REQUEST):
+            batch = []
+            for command in commands[start:start + MAX_COMMANDS_PER_REQUEST]:
+                args = dict(command["args"])
+                for name in _ID_ARGS:
+                    if args.get(name) in temp_id_mapping:
+                        args[name] = temp_id_mapping[args[name]]
+                batch.append({**command, "args": args})
+
+            if self.sync is not None:
+                data = await self.sync.write(batch)
+            else:
+                response = await self._request(
+                    "POST", f"{self.settings.sync_base_url}/sync", json={"commands": batch}
+                )
+                data = metrics.decode_json(response)
+            temp_id_mapping.update(data.get("temp_id_mapping", {}))
+
+            sync_status = data.get("sync_status", {})
+            for offset, command in enumerate(batch):
+                status = sync_status.get(command["uuid"])
+                result: Dict[str, Any] = {"index": start + offset, "type": command["type"]}
+                if status == "ok":
+                    result["status"] = "ok"
+                    result["id"] = temp_id_mapping.get(command.get("temp_id"), command["args"].get("id"))
+                    if command.get("temp_id"):
+                        result["temp_id"] = command["temp_id"]
+                else:
+                    result["status"] = "error"
+                    result["error"] = (status or {}).get("error", "No status returned for command")
+                results.append(result)
+
+        # Batched writes touch arbitrary projects, so drop cached task lists
+        if self.cache is not None:
+            self.cache.invalidate_endpoint("tasks")
+            self.cache.invalidate_endpoint("tasks_filter")
+            self.cache.invalidate_endpoint("completed")
+        return results
+
+    async def create_tasks(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create many tasks in as few requests as possible
+
+        Each task accepts `content`, `description`, `project_id`,
+        `section_id`, `parent_id`, `labels`, `priority` and `due_string`,
+        plus an optional `temp_id` that later tasks can use as their
+        `parent_id`.
+        """
+        commands = []
+        for task in tasks:
+            if not task.get("content"):
+                raise ValueError("Every task needs content")
+            args = {
+                name: task[name]
+                for name in ("content", "description", "project_id", "section_id", "parent_id", "labels", "priority")
+                if task.get(name) is not None
+            }
+            if task.get("due_string"):
+                args["due"] = {"string": task["due_string"]}
+            commands.append(_command("item_add", args, temp_id=task.get("temp_id") or str(uuid.uuid4())))
+        results = await self.execute_commands(commands)
+        # Only echo temp ids the caller chose
+        for task, result in zip(tasks, results):
+            if not task.get("temp_id"):
+                result.pop("temp_id", None)
+        return results
+
+    async def complete_tasks(self, task_ids: List[str]) -> List[Dict[str, Any]]:
+        """Complete many tasks in as few requests as possible"""
+        return await self.execute_commands([_command("item_close", {"id": task_id}) for task_id in task_ids])
+
+    async def update_tasks(self, updates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Update many tasks; each update is an `id` plus the fields to change"""
+        commands = []
+        for update in updates:
+            if not update.get("id"):
+                raise ValueError("Every update needs a task id")
+            args = {name: value for name, value in update.items() if name != "due_string"}
+            if "due_string" in update:
+                args["due"] = {"string": update["due_string"]} if update["due_string"] else None
+            commands.append(_command("item_update", args))
+        return await self.execute_commands(commands)
+
+    async def move_tasks(
+        self,
+        task_ids: List[str],
+        project_id: Optional[str] = None,
+        section_id: Optional[str] = None,
+        parent_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Move many tasks to a project, section or parent task"""
+        destinations = {"project_id": project_id, "section_id": section_id, "parent_id": parent_id}
+        destination = {name: value for name, value in destinations.items() if value}
+        if len(destination) != 1:
+            raise ValueError("Exactly one of project_id, section_id or parent_id is required")
+        return await self.execute_commands(
+            [_command("item_move", {"id": task_id, **destination}) for task_id in task_ids]
+        )
+
     async def get_projects(self) -> List[Dict[str, Any]]:
         """Get all projects"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/projects",
-                headers=self.headers
-            )
-            response.raise_for_status()
-            return response.json()
-    
+        key = ("projects", None)
+        self._note(key)
+        if self.sync is not None:
+            await self.sync.ensure_fresh()
+            return self.sync.get_projects()
+
+        cached = self._cache_get(key)
+        if cached is not MISSING:
+            return cached
+
+        return await self._fetch(key)
+
     async def create_project(self, name: str, color: Optional[str] = None) -> Dict[str, Any]:
         """Create a new project"""
+        if self.outbox is not None:
+            args = {"name": name}
+            if color:
+                args["color"] = color
+            project = await self.outbox.enqueue(_command("project_add", args, temp_id=str(uuid.uuid4())))
+            return {**to_plain(project), "pending": True}
+
         project_data = {"name": name}
         if color:
             project_data["color"] = color
-            
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/projects",
-                headers=self.headers,
-                json=project_data
-            )
-            response.raise_for_status()
-            return response.json()
\ No newline at end of file
+
+        response = await self._request("POST", "/projects", json=project_data)
+        project = metrics.decode_json(response)
+        if self.cache is not None:
+            key = ("projects", None)
+            projects = self.cache.peek(key)
+            if projects is not MISSING:
+                self.cache.replace(key, projects + [Project.from_dict(project)])
+        if self.sync is not None:
+            self.sync.upsert_project(project)
+        return project
@@ -0,0 +1,54 @@
+"""
+Analytics tools for Todoist MCP server
+"""
+
+from typing import Dict, Any
+
+
+def register_analytics_tools(mcp, get_client):
+    """Register workload, due-date and velocity tools with the MCP server"""
+    
+    @mcp.tool()
+    async def get_workload(
+        days: int = 7,
+        group_by: str = "project",
+        offset_days: int = 0
+    ) -> Dict[str, Any]:
+        """Summarize workload per project or label, without listing tasks.
+
+        - `days`: length of the window counted as "due_in_window" (1-366)
+        - `group_by`: "project" or "label"
+        - `offset_days`: start the window this many days from today (0 = now)
+
+        Returns `{"totals", "groups"}`; each group has its `active`,
+        `high_priority` (p3/p4), `overdue` and `due_in_window` task counts and
+        `estimated_minutes_in_window` (from task durations), busiest first.
+        """
+        try:
+            todoist_client = get_client()
+            return await todoist_client.get_workload(days=days, group_by=group_by, offset_days=offset_days)
+        except Exception as e:
+            raise Exception(f"Failed to get workload: {str(e)}")
+    
+    @mcp.tool()
+    async def get_due_forecast(days: int = 14) -> Dict[str, Any]:
+        """Count overdue tasks by how long they have been overdue, and tasks due on each of the next `days` days (1-366)"""
+        try:
+            todoist_client = get_client()
+            return await todoist_client.get_due_forecast(days=days)
+        except Exception as e:
+            raise Exception(f"Failed to get due forecast: {str(e)}")
+    
+    @mcp.tool()
+    async def get_completion_velocity(weeks: int = 4) -> Dict[str, Any]:
+        """Report tasks completed per week over the last `weeks` weeks (1-52).
+
+        Includes completions per project, the latest week against the earlier
+        ones (`trend`), and how many days the overdue tasks and those due in
+        the next 7 days would take at the current pace.
+        """
+        try:
+            todoist_client = get_client()
+            return await todoist_client.get_completion_velocity(weeks=weeks)
+        except Exception as e:
+            raise Exception(f"Failed to get completion velocity: {str(e)}")
@@ -2,21 +2,49 @@
 Project management tools for Todoist MCP server
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Union
 
+from .. import formats
+from ..models import to_plain
+from ..task_query import parse_fields
 
-def register_project_tools(mcp, todoist_client):
+
+def register_project_tools(mcp, get_client):
     """Register project-related tools with the MCP server"""
     
     @mcp.tool()
-    async def get_projects() -> List[Dict[str, Any]]:
-        """Get all projects from Todoist"""
+    async def get_projects(
+        fields: Optional[str] = None,
+        format: str = "json"
+    ) -> Union[List[Dict[str, Any]], Dict[str, Any], str]:
+        """Get all projects from Todoist
+
+        - `fields`: comma-separated fields to return, e.g. "id,name"
+        - `format`: "json" (full project objects), "table" (`{"columns", "rows"}`)
+          or "lines" (one tab-separated line per project)
+        """
         try:
+            todoist_client = get_client()
+            format = formats.check_format(format, grouped=False)
+            names = parse_fields(fields)
             projects = await todoist_client.get_projects()
-            return projects
+            if format != "json":
+                return formats.as_text(formats.render_projects(projects, format, names))
+            if names:
+                return [{name: to_plain(project.get(name)) for name in names} for project in projects]
+            return to_plain(projects)
         except Exception as e:
             raise Exception(f"Failed to get projects: {str(e)}")
     
+    @mcp.tool()
+    async def find_projects(name: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Look up projects by name: an exact (case-insensitive) match first, then close matches"""
+        try:
+            todoist_client = get_client()
+            return await todoist_client.find_projects(name, limit=limit)
+        except Exception as e:
+            raise Exception(f"Failed to find projects: {str(e)}")
+    
     @mcp.tool()
     async def create_project(
         name: str,
@@ -24,6 +52,7 @@ def register_project_tools(mcp, todoist_client):
     ) -> Dict[str, Any]:
         """Create a new project in Todoist"""
         try:
+            todoist_client = get_client()
             project = await todoist_client.create_project(name=name, color=color)
             return project
         except Exception as e:
@@ -2,21 +2,83 @@
 Task management tools for Todoist MCP server
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Union
 
+from .. import formats
 
-def register_task_tools(mcp, todoist_client):
+
+def register_task_tools(mcp, get_client):
     """Register task-related tools with the MCP server"""
     
     @mcp.tool()
-    async def get_tasks(project_id: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get tasks from Todoist, optionally filtered by project"""
+    async def get_tasks(
+        project_id: Optional[str] = None,
+        filter: Optional[str] = None,
+        label: Optional[str] = None,
+        priority: Optional[int] = None,
+        due_after: Optional[str] = None,
+        due_before: Optional[str] = None,
+        fields: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        format: str = "json"
+    ) -> Union[List[Dict[str, Any]], Dict[str, Any], str]:
+        """Get tasks from Todoist, optionally filtered.
+
+        - `filter`: a Todoist filter query, e.g. "today | overdue" or "#Work & p1"
+        - `label`, `priority` (1-4), `due_after` / `due_before` (YYYY-MM-DD or a phrase like
+          "today" or "next friday", inclusive)
+        - `fields`: comma-separated fields to return, e.g. "id,content,due"
+        - `limit` / `cursor`: page through results; returns `{"tasks", "next_cursor", "total"}`
+          instead of a plain list. Pass `next_cursor` back to get the next page.
+          `limit` is 1-500 and defaults to 50 when only `cursor` is given.
+        - `format`: "json" (full task objects), or a compact form of the same
+          list: "table" (`{"columns", "rows"}`), "lines" (one tab-separated
+          line per task) or "grouped" (table rows grouped by project).
+          Compact formats are returned as text.
+        """
         try:
-            tasks = await todoist_client.get_tasks(project_id)
-            return tasks
+            todoist_client = get_client()
+            format = formats.check_format(format)
+            filters = {
+                "project_id": project_id,
+                "filter": filter,
+                "label": label,
+                "priority": priority,
+                "due_after": due_after,
+                "due_before": due_before,
+                "fields": fields,
+            }
+            if limit is not None or cursor:
+                result = await todoist_client.get_tasks_page(
+                    limit=limit, cursor=cursor, format=format, **filters
+                )
+            else:
+                result = await todoist_client.get_tasks(format=format, **filters)
+            # FastMCP pretty-prints dicts, one value per line; send compact formats as compact text
+            return result if format == "json" else formats.as_text(result)
         except Exception as e:
             raise Exception(f"Failed to get tasks: {str(e)}")
     
+    @mcp.tool()
+    async def search_tasks(
+        query: str,
+        limit: int = 10,
+        project_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Search tasks by words in their content, description, labels or project name.
+
+        Matches whole words, prefixes ("groc" finds "groceries") and close
+        misspellings. Returns the best `limit` matches, best first, as
+        `{"results": [{"id", "project_id", "score", "snippet"}], "total"}`;
+        use `get_tasks` with `fields` for more of a task.
+        """
+        try:
+            todoist_client = get_client()
+            return await todoist_client.search_tasks(query, limit=limit, project_id=project_id)
+        except Exception as e:
+            raise Exception(f"Failed to search tasks: {str(e)}")
+    
     @mcp.tool()
     async def create_task(
         content: str,
@@ -27,6 +89,7 @@ def register_task_tools(mcp, todoist_client):
     ) -> Dict[str, Any]:
         """Create a new task in Todoist"""
         try:
+            todoist_client = get_client()
             task = await todoist_client.create_task(
                 content=content,
                 project_id=project_id,
@@ -42,7 +105,74 @@ def register_task_tools(mcp, todoist_client):
     async def complete_task(task_id: str) -> Dict[str, str]:
         """Mark a task as completed"""
         try:
+            todoist_client = get_client()
             success = await todoist_client.complete_task(task_id)
             return {"status": "completed", "task_id": task_id} if success else {"status": "failed", "task_id": task_id}
         except Exception as e:
-            raise Exception(f"Failed to complete task: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Failed to complete task: {str(e)}")
+    
+    @mcp.tool()
+    async def create_tasks(tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create many tasks in one call.
+
+        Each task takes `content` plus optional `description`, `project_id`,
+        `section_id`, `parent_id`, `labels`, `priority` and `due_string`.
+        Give a task a `temp_id` and later tasks in the same call can use it
+        as their `parent_id`.
+        """
+        try:
+            todoist_client = get_client()
+            results = await todoist_client.create_tasks(tasks)
+            return _summarize(results)
+        except Exception as e:
+            raise Exception(f"Failed to create tasks: {str(e)}")
+    
+    @mcp.tool()
+    async def complete_tasks(task_ids: List[str]) -> Dict[str, Any]:
+        """Mark many tasks as completed in one call"""
+        try:
+            todoist_client = get_client()
+            results = await todoist_client.complete_tasks(task_ids)
+            return _summarize(results)
+        except Exception as e:
+            raise Exception(f"Failed to complete tasks: {str(e)}")
+    
+    @mcp.tool()
+    async def update_tasks(updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Update many tasks in one call.
+
+        Each update is a task `id` plus the fields to change, e.g.
+        `content`, `description`, `labels`, `priority` or `due_string`.
+        """
+        try:
+            todoist_client = get_client()
+            results = await todoist_client.update_tasks(updates)
+            return _summarize(results)
+        except Exception as e:
+            raise Exception(f"Failed to update tasks: {str(e)}")
+    
+    @mcp.tool()
+    async def move_tasks(
+        task_ids: List[str],
+        project_id: Optional[str] = None,
+        section_id: Optional[str] = None,
+        parent_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Move many tasks to a project, section or parent task (give exactly one)"""
+        try:
+            todoist_client = get_client()
+            results = await todoist_client.move_tasks(
+                task_ids,
+                project_id=project_id,
+                section_id=section_id,
+                parent_id=parent_id
+            )
+            return _summarize(results)
+        except Exception as e:
+            raise Exception(f"Failed to move tasks: {str(e)}")
+
+
+def _summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Wrap per-item bulk results with success/failure counts"""
+    failed = sum(1 for r in results if r["status"] != "ok")
+    return {"succeeded": len(results) - failed, "failed": failed, "results": results}
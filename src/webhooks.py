@@ -0,0 +1,130 @@
+"""
+Todoist webhook receiver
+
+Todoist can POST an event (`item:added`, `item:completed`,
+`project:updated`, ...) to a registered URL whenever something in a user's
+workspace changes. Each delivery is signed: `X-Todoist-Hmac-SHA256` is the
+base64 HMAC-SHA256 of the raw body keyed by the Todoist app's client secret.
+
+Verified events are converted into a Sync API-shaped delta and applied to
+the local replica and cache (`TodoistClient.apply_pushed`), so reads stay
+fresh without an upstream request. The secret is the app's, so every user
+who installed the app is signed alike: an event is only applied by a
+client whose account matches its `user_id`. The replica's periodic sync
+then only runs as a safety net for missed deliveries.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-Todoist-Hmac-SHA256"
+DELIVERY_HEADER = "X-Todoist-Delivery-ID"
+
+# Event name prefix -> Sync API resource type
+RESOURCES = {"item": "items", "project": "projects", "section": "sections", "label": "labels"}
+
+# Flags the Sync API would set for an action, in case the event data omits them
+ACTION_FLAGS = {
+    "completed": {"checked": True},
+    "uncompleted": {"checked": False},
+    "deleted": {"is_deleted": True},
+    "archived": {"is_archived": True},
+    "unarchived": {"is_archived": False},
+}
+
+# Delivery IDs remembered to drop Todoist's redeliveries
+MAX_DELIVERIES = 4096
+
+
+def sign(secret: str, body: bytes) -> str:
+    """Signature Todoist sends for `body`"""
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode()
+
+
+def verify(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check a delivery's signature in constant time"""
+    return bool(signature) and hmac.compare_digest(sign(secret, body), signature)
+
+
+def event_payload(event: Dict[str, Any]) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """Convert a webhook event into a Sync API delta, or None if it isn't one we track"""
+    resource, _, action = str(event.get("event_name", "")).partition(":")
+    kind = RESOURCES.get(resource)
+    data = event.get("event_data")
+    if kind is None or not isinstance(data, dict) or "id" not in data:
+        return None
+    return {kind: [{**data, **ACTION_FLAGS.get(action, {})}]}
+
+
+class WebhookReceiver:
+    """Starlette endpoint that verifies deliveries and applies them to clients
+
+    `clients` returns the clients currently serving (one, or every pooled
+    tenant). Each applies only events for its own user. With `known_only`,
+    a client also skips events for projects it doesn't know, before
+    looking its user up.
+    """
+
+    def __init__(self, secret: str, clients: Callable[[], Iterable[Any]], known_only: bool = False):
+        self.secret = secret
+        self.clients = clients
+        self.known_only = known_only
+        self._deliveries: "OrderedDict[str, None]" = OrderedDict()
+
+    def _seen(self, delivery_id: Optional[str]) -> bool:
+        return delivery_id is not None and delivery_id in self._deliveries
+
+    def _remember(self, delivery_id: Optional[str]) -> None:
+        if delivery_id is None:
+            return
+        self._deliveries[delivery_id] = None
+        while len(self._deliveries) > MAX_DELIVERIES:
+            self._deliveries.popitem(last=False)
+
+    async def endpoint(self, request: Request) -> Response:
+        body = await request.body()
+        if not verify(self.secret, body, request.headers.get(SIGNATURE_HEADER)):
+            metrics.WEBHOOK_EVENTS.inc(("unknown", "rejected"))
+            return JSONResponse({"error": "Invalid signature"}, status_code=401)
+        try:
+            event = json.loads(body)
+        except ValueError:
+            metrics.WEBHOOK_EVENTS.inc(("unknown", "rejected"))
+            return JSONResponse({"error": "Invalid JSON"}, status_code=400)
+
+        name = str(event.get("event_name", "unknown")) if isinstance(event, dict) else "unknown"
+        delivery_id = request.headers.get(DELIVERY_HEADER)
+        if self._seen(delivery_id):
+            metrics.WEBHOOK_EVENTS.inc((name, "duplicate"))
+            return JSONResponse({"status": "duplicate"})
+
+        payload = event_payload(event) if isinstance(event, dict) else None
+        applied = False
+        if payload is not None:
+            try:
+                for client in list(self.clients()):
+                    applied |= await client.apply_pushed(payload, event.get("user_id"),
+                                                         known_only=self.known_only)
+            except Exception:
+                # A non-2xx answer makes Todoist redeliver later
+                logger.exception("Failed to apply webhook event %s", name)
+                metrics.WEBHOOK_EVENTS.inc((name, "error"))
+                return JSONResponse({"error": "Failed to apply event"}, status_code=500)
+
+        self._remember(delivery_id)
+        status = "applied" if applied else "ignored"
+        metrics.WEBHOOK_EVENTS.inc((name, status))
+        return JSONResponse({"status": status})
@@ -0,0 +1,352 @@
+"""
+Multi-worker HTTP deployment with MCP session affinity
+
+Streamable HTTP sessions live in the memory of the process that created
+them, so the requests of one session must keep reaching the same worker.
+Plain `uvicorn --workers N` can't guarantee that: the kernel hands each
+connection to whichever worker accepts it.
+
+Instead, `run_workers` starts N worker processes, each serving the MCP app
+on its own Unix socket, and runs a small router on the public address that
+forwards each request to a worker:
+
+- a request carrying a known `Mcp-Session-Id` goes to the worker that
+  created the session;
+- otherwise a request carrying a Todoist token (multi-tenant mode) goes to
+  the worker chosen by hashing the token, so each tenant's client, cache
+  and sync replica live in one worker instead of being copied into all;
+- anything else (e.g. a new single-tenant session) is spread round robin.
+
+Workers that exit are restarted, and requests for one are held until it
+listens again. Responses, including SSE streams, are relayed as they
+arrive. `/metrics` merges every worker's metrics, labelled with `worker`,
+and webhook deliveries are broadcast to every worker, since each keeps its
+own replica.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import logging
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from .config import ServerSettings
+
+logger = logging.getLogger(__name__)
+
+SESSION_HEADER = "mcp-session-id"
+# Headers that describe a single hop and must not be forwarded
+HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade", "host", "content-length",
+}
+MAX_SESSIONS = 100_000
+# Seconds a worker has to start, and to exit after SIGTERM
+READY_TIMEOUT = 30.0
+STOP_TIMEOUT = 10.0
+METHODS = ["GET", "POST", "DELETE", "PUT", "PATCH", "OPTIONS", "HEAD"]
+
+
+def _stable_index(value: str, count: int) -> int:
+    return int.from_bytes(hashlib.sha256(value.encode()).digest()[:8], "big") % count
+
+
+def request_tenant(headers) -> Optional[str]:
+    """The Todoist token a request carries, if any"""
+    authorization = headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        return authorization[7:].strip()
+    return headers.get("x-todoist-token")
+
+
+class Worker:
+    """One MCP app process listening on a Unix socket"""
+
+    def __init__(self, index: int, socket_path: str, app: str, log_level: str):
+        self.index = index
+        self.socket_path = socket_path
+        self.app = app
+        self.log_level = log_level
+        self.process: Optional[subprocess.Popen] = None
+        # Set once the process is listening; cleared while it (re)starts
+        self.ready = asyncio.Event()
+        self.client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(uds=socket_path),
+            base_url="http://worker",
+            timeout=httpx.Timeout(30.0, read=None),
+        )
+
+    def start(self) -> None:
+        self.ready.clear()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        env = dict(os.environ)
+        # Make the package importable from wherever the router was started
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+        self.process = subprocess.Popen([
+            sys.executable, "-m", "uvicorn", self.app,
+            "--uds", self.socket_path, "--log-level", self.log_level,
+        ], env=env)
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    async def wait_ready(self, timeout: float = READY_TIMEOUT) -> None:
+        deadline = asyncio.get_running_loop().time() + timeout
+        while not os.path.exists(self.socket_path):
+            if not self.alive:
+                raise RuntimeError(f"Worker {self.index} exited during startup")
+            if asyncio.get_running_loop().time() > deadline:
+                raise RuntimeError(f"Worker {self.index} did not start within {timeout}s")
+            await asyncio.sleep(0.05)
+        self.ready.set()
+
+    async def until_ready(self, timeout: float = READY_TIMEOUT) -> bool:
+        """Wait for a restarting worker to listen again; False if it doesn't in time"""
+        if self.ready.is_set():
+            return True
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def terminate(self) -> None:
+        """Ask the process to shut down (see `wait_stopped`)"""
+        self.ready.clear()
+        if self.alive:
+            self.process.send_signal(signal.SIGTERM)
+
+    async def wait_stopped(self, timeout: float = STOP_TIMEOUT) -> None:
+        """Wait for the process to exit without blocking the event loop, killing it after `timeout`"""
+        if self.process is None:
+            return
+        try:
+            await asyncio.to_thread(self.process.wait, timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning("Worker %d did not exit within %.0fs, killing it", self.index, timeout)
+            self.process.kill()
+            await asyncio.to_thread(self.process.wait)
+
+
+class WorkerRouter:
+    """Session- and tenant-affine reverse proxy in front of the workers"""
+
+    def __init__(self, workers: List[Worker], broadcast: Sequence[str] = ()):
+        self.workers = workers
+        self.broadcast = set(broadcast)
+        self._sessions: "OrderedDict[str, int]" = OrderedDict()
+        self._round_robin = itertools.cycle(range(len(workers)))
+
+    def pick(self, headers) -> int:
+        session = headers.get(SESSION_HEADER)
+        if session and session in self._sessions:
+            self._sessions.move_to_end(session)
+            return self._sessions[session]
+        tenant = request_tenant(headers)
+        if tenant:
+            return _stable_index(tenant, len(self.workers))
+        if session:
+            # Unknown session (e.g. the router restarted): stay deterministic
+            return _stable_index(session, len(self.workers))
+        return next(self._round_robin)
+
+    def remember(self, session: str, index: int) -> None:
+        self._sessions[session] = index
+        self._sessions.move_to_end(session)
+        while len(self._sessions) > MAX_SESSIONS:
+            self._sessions.popitem(last=False)
+
+    async def _build(self, worker: Worker, request: Request) -> httpx.Request:
+        return worker.client.build_request(
+            request.method,
+            request.url.path + (f"?{request.url.query}" if request.url.query else ""),
+            headers=[(k, v) for k, v in request.headers.items() if k.lower() not in HOP_HEADERS],
+            content=await request.body(),
+        )
+
+    async def fan_out(self, request: Request) -> Response:
+        """Send a request to every worker; answer with the first worker's response"""
+        # Read the body once up front; concurrent reads would race on the stream
+        await request.body()
+
+        async def send(worker: Worker) -> Optional[httpx.Response]:
+            if not await worker.until_ready():
+                return None
+            try:
+                return await worker.client.send(await self._build(worker, request))
+            except httpx.TransportError:
+                return None
+
+        responses = await asyncio.gather(*(send(worker) for worker in self.workers))
+        failed = [index for index, response in enumerate(responses) if response is None or response.is_server_error]
+        if failed:
+            # Let the sender retry; workers that already applied it will skip the duplicate
+            return PlainTextResponse(f"Workers {failed} failed", status_code=502)
+        first = responses[0]
+        # `content` is already decoded, so drop the worker's Content-Encoding
+        return Response(
+            first.content,
+            status_code=first.status_code,
+            headers={k: v for k, v in first.headers.items()
+                     if k.lower() not in HOP_HEADERS and k.lower() != "content-encoding"},
+        )
+
+    async def forward(self, request: Request) -> Response:
+        if request.url.path in self.broadcast:
+            return await self.fan_out(request)
+        index = self.pick(request.headers)
+        worker = self.workers[index]
+        for attempt in range(2):
+            # Hold requests for a restarting worker rather than failing them at once
+            if not await worker.until_ready():
+                return PlainTextResponse(f"Worker {index} unavailable: restarting", status_code=503)
+            try:
+                response = await worker.client.send(await self._build(worker, request), stream=True)
+                break
+            except httpx.ConnectError as e:
+                if attempt or worker.alive:
+                    return PlainTextResponse(f"Worker {index} unavailable: {e}", status_code=502)
+                # Died before the supervisor noticed; nothing was sent, so wait for the restart
+                worker.ready.clear()
+            except httpx.TransportError as e:
+                return PlainTextResponse(f"Worker {index} unavailable: {e}", status_code=502)
+
+        session = response.headers.get(SESSION_HEADER)
+        if session:
+            if request.method == "DELETE" and response.is_success:
+                self._sessions.pop(session, None)
+            else:
+                self.remember(session, index)
+
+        return StreamingResponse(
+            response.aiter_raw(),
+            status_code=response.status_code,
+            headers={k: v for k, v in response.headers.items() if k.lower() not in HOP_HEADERS},
+            background=BackgroundTask(response.aclose),
+        )
+
+    async def metrics(self, request: Request) -> Response:
+        """Every worker's `/metrics`, each series labelled with its worker"""
+        async def scrape(worker: Worker) -> str:
+            if not worker.ready.is_set():
+                return ""
+            try:
+                response = await worker.client.get("/metrics")
+                return response.text if response.is_success else ""
+            except httpx.TransportError:
+                return ""
+
+        texts = await asyncio.gather(*(scrape(worker) for worker in self.workers))
+        return PlainTextResponse(merge_metrics(texts), media_type="text/plain; version=0.0.4")
+
+
+def merge_metrics(texts: List[str]) -> str:
+    """Merge Prometheus text outputs, adding a `worker` label to every sample"""
+    headers: Dict[str, List[str]] = OrderedDict()
+    samples: Dict[str, List[str]] = {}
+    for index, text in enumerate(texts):
+        family = ""
+        for line in text.splitlines():
+            if line.startswith("# HELP "):
+                family = line.split()[2]
+                headers.setdefault(family, [])
+                if len(headers[family]) < 2:
+                    headers[family].append(line)
+                continue
+            if line.startswith("# TYPE "):
+                if len(headers.get(family, [])) < 2:
+                    headers.setdefault(family, []).append(line)
+                continue
+            if not line:
+                continue
+            name, _, rest = line.partition("{")
+            if rest:
+                labelled = f'{name}{{worker="{index}",{rest}'
+            else:
+                name, _, value = line.partition(" ")
+                labelled = f'{name}{{worker="{index}"}} {value}'
+            samples.setdefault(family, []).append(labelled)
+    lines = []
+    for family, header in headers.items():
+        lines.extend(header)
+        lines.extend(samples.get(family, []))
+    return "\n".join(lines) + "\n"
+
+
+def build_router_app(router: WorkerRouter) -> Starlette:
+    @asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        async def supervise() -> None:
+            # Restart workers that die; their sessions are lost but new ones work
+            while True:
+                await asyncio.sleep(1.0)
+                restarted = [worker for worker in router.workers if not worker.alive]
+                for worker in restarted:
+                    logger.warning("Worker %d exited, restarting", worker.index)
+                    worker.start()
+                results = await asyncio.gather(*(worker.wait_ready() for worker in restarted),
+                                               return_exceptions=True)
+                for worker, result in zip(restarted, results):
+                    if isinstance(result, Exception):
+                        logger.error("Worker %d did not become ready: %s", worker.index, result)
+
+        for worker in router.workers:
+            worker.start()
+        await asyncio.gather(*(worker.wait_ready() for worker in router.workers))
+        supervisor = asyncio.ensure_future(supervise())
+        try:
+            yield
+        finally:
+            supervisor.cancel()
+            # Stop every worker at once rather than one after another
+            for worker in router.workers:
+                worker.terminate()
+            await asyncio.gather(*(worker.wait_stopped() for worker in router.workers))
+            for worker in router.workers:
+                await worker.client.aclose()
+
+    return Starlette(
+        routes=[
+            Route("/metrics", router.metrics, methods=["GET"]),
+            Route("/{path:path}", router.forward, methods=METHODS),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def run_workers(settings: ServerSettings, app: str, broadcast: Sequence[str] = ()) -> None:
+    """Serve `app` from `settings.workers` processes behind the affinity router
+
+    Requests to the `broadcast` paths are sent to every worker.
+    """
+    # One log line per proxied request would drown out the workers' own logs
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory(prefix="todoist-mcp-") as directory:
+        workers = [
+            Worker(index, os.path.join(directory, f"worker-{index}.sock"), app, settings.log_level)
+            for index in range(settings.workers)
+        ]
+        uvicorn.run(
+            build_router_app(WorkerRouter(workers, broadcast)),
+            host=settings.host,
+            port=settings.port,
+            log_level=settings.log_level,
+        )
@@ -0,0 +1,95 @@
+"""Due phrase parsing and deadlines that move with the day"""
+
+from datetime import date, datetime, time as dt_time
+
+import pytest
+
+from src import due_dates, task_store
+from src.due_dates import due_deadline, is_relative, parse_due_string
+from src.task_store import TaskStore
+
+TODAY = date(2026, 10, 14)  # a Wednesday
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("today", (date(2026, 10, 14), None)),
+    ("tomorrow", (date(2026, 10, 15), None)),
+    ("tomorrow at 5pm", (date(2026, 10, 15), dt_time(17, 0))),
+    ("tomorrow 9", (date(2026, 10, 15), dt_time(9, 0))),
+    ("next fri 17", (date(2026, 10, 16), dt_time(17, 0))),
+    ("at 9:30am", (date(2026, 10, 14), dt_time(9, 30))),
+    ("next fri", (date(2026, 10, 16), None)),
+    ("next wednesday", (date(2026, 10, 21), None)),
+    ("in 3 days", (date(2026, 10, 17), None)),
+    ("in 2 months", (date(2026, 12, 14), None)),
+    ("every monday", (date(2026, 10, 19), None)),
+    ("every 2 weeks", (date(2026, 10, 14), None)),
+    ("every other month", (date(2026, 10, 14), None)),
+    ("Oct 27", (date(2026, 10, 27), None)),
+    ("27 oct 2027", (date(2027, 10, 27), None)),
+    ("may 5", (date(2027, 5, 5), None)),
+    ("2024-05-01", (date(2024, 5, 1), None)),
+])
+def test_parse_due_string(text, expected):
+    assert parse_due_string(text, TODAY) == expected
+
+
+@pytest.mark.parametrize("text", ["tomorrow 25", "at 13pm", "every 3rd friday", "in 2 hours", "someday"])
+def test_unsupported_phrases(text):
+    assert parse_due_string(text, TODAY) is None
+
+
+def test_is_relative():
+    assert is_relative({"string": "tomorrow"})
+    assert not is_relative({"string": "tomorrow", "date": "2026-10-15"})
+    assert not is_relative(None)
+
+
+class Clock:
+    """Stands in for `date` in the modules that ask for today"""
+
+    def __init__(self, monkeypatch, today: date):
+        self.value = today
+        clock = self
+
+        class Today(date):
+            @classmethod
+            def today(cls):
+                return clock.value
+
+        for module in (due_dates, task_store):
+            monkeypatch.setattr(module, "date", Today)
+
+
+def end_of(day: date) -> float:
+    return datetime.combine(day, dt_time.max).timestamp()
+
+
+def test_relative_dues_move_at_midnight(monkeypatch):
+    clock = Clock(monkeypatch, TODAY)
+    store = TaskStore([
+        {"id": "1", "content": "phrase", "project_id": "p", "due": {"string": "tomorrow"}},
+        {"id": "2", "content": "dated", "project_id": "p", "due": {"string": "Oct 15", "date": "2026-10-15"}},
+    ])
+    assert store.deadline("1") == end_of(date(2026, 10, 15))
+    version = store.version
+
+    clock.value = date(2026, 10, 16)
+    assert store.deadline("1") == end_of(date(2026, 10, 17))
+    assert store.version > version
+    # "2" is now overdue and "1" is not
+    now = datetime(2026, 10, 16, 12).timestamp()
+    assert [task.id for task in store.overdue(now)] == ["2"]
+    assert [task.id for task in store.due_between(now)] == ["1"]
+    assert store.overdue_count(now) == 1
+
+
+def test_relative_due_added_after_midnight(monkeypatch):
+    clock = Clock(monkeypatch, TODAY)
+    store = TaskStore([{"id": "1", "content": "a", "project_id": "p", "due": {"string": "today"}}])
+    clock.value = date(2026, 10, 15)
+    store.upsert({"id": "2", "content": "b", "project_id": "p", "due": {"string": "today"}})
+    assert store.deadline("1") == store.deadline("2") == end_of(date(2026, 10, 15))
+    store.remove("1")
+    store.remove("2")
+    assert store.due_between() == []
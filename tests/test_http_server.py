@@ -0,0 +1,20 @@
+"""Command-line checks of the HTTP server"""
+
+import pytest
+
+from src import http_server
+
+
+def test_refuses_single_tenant_workers_that_would_each_sync(monkeypatch):
+    monkeypatch.delenv("TODOIST_SYNC_ENABLED", raising=False)
+    with pytest.raises(SystemExit) as exit_info:
+        http_server.run_http_server(["--workers", "2"])
+    assert exit_info.value.code == 2
+
+
+def test_starts_single_tenant_workers_without_sync(monkeypatch):
+    started = []
+    monkeypatch.setenv("TODOIST_SYNC_ENABLED", "false")
+    monkeypatch.setattr("src.worker_router.run_workers", lambda *args: started.append(args))
+    http_server.run_http_server(["--workers", "2"])
+    assert started and started[0][0].workers == 2
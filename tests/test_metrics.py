@@ -0,0 +1,40 @@
+"""MCP request metrics: response sizes and label values"""
+
+import asyncio
+
+import pytest
+from mcp.server.fastmcp.exceptions import ToolError
+from mcp.types import TextContent
+
+from src import metrics, server
+from src.metrics import MCP_REQUEST_SECONDS, MCP_RESPONSE_BYTES, content_size
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setattr(server, "todoist_client", None)
+    metrics.REGISTRY.clear()
+    yield metrics.REGISTRY
+    metrics.REGISTRY.clear()
+
+
+def test_content_size_adds_up_serialized_text():
+    blocks = [TextContent(type="text", text="héllo"), TextContent(type="text", text="abc")]
+    assert content_size(blocks) == 9
+    assert content_size((blocks, {"result": "ignored"})) == 9
+    assert content_size(None) == 0
+
+
+def test_tool_response_size_is_taken_from_its_content():
+    result = asyncio.run(server.mcp.call_tool("cache_stats", {}))
+    size = sum(len(block.text.encode()) for block in result)
+    series = MCP_RESPONSE_BYTES.series[("tool", "cache_stats")]
+    assert (series.count, series.sum) == (1, size)
+
+
+def test_unknown_tool_names_share_one_label():
+    for name in ("no_such_tool", "another_made_up_tool"):
+        with pytest.raises(ToolError):
+            asyncio.run(server.mcp.call_tool(name, {}))
+    assert MCP_REQUEST_SECONDS.series[("tool", "unknown")].count == 2
+    assert not any(name in ("no_such_tool", "another_made_up_tool") for _, name in MCP_REQUEST_SECONDS.series)
@@ -0,0 +1,54 @@
+"""Compact models: round trips and string interning"""
+
+from src.models import MAX_INTERNED, Project, Task, to_plain
+
+TASK = {
+    "id": "1001",
+    "content": "Write the quarterly report",
+    "description": "",
+    "project_id": "2001",
+    "section_id": None,
+    "labels": ["work", "deep"],
+    "priority": 4,
+    "due": {"date": "2026-10-20", "string": "Oct 20", "lang": "en", "is_recurring": False},
+    "is_completed": False,
+    "url": "https://todoist.com/showTask?id=1001",
+    "custom_field": {"nested": [1, 2]},
+}
+
+
+def test_task_round_trip():
+    task = Task.from_dict(TASK)
+    assert to_plain(task) == TASK
+    assert task.priority == 4 and task["priority"] == 4
+    assert task.get("assignee_id") is None
+    assert "assignee_id" not in task
+
+
+def test_project_round_trip():
+    project = {"id": "2001", "name": "Work", "color": "blue", "is_inbox_project": False}
+    assert to_plain(Project.from_dict(project)) == project
+
+
+def test_short_repeated_strings_are_shared():
+    # Built at run time, so the two copies start out as distinct objects
+    first = Task.from_dict({**TASK, "project_id": "".join(["20", "01"]), "labels": ["".join(["wo", "rk"])]})
+    second = Task.from_dict({**TASK, "project_id": "".join(["200", "1"]), "labels": ["".join(["w", "ork"])]})
+    assert first.project_id is second.project_id
+    assert first.labels[0] is second.labels[0]
+
+
+def test_content_and_long_strings_are_not_interned():
+    content = "".join(["Write the ", "report"])
+    text = "x" * (MAX_INTERNED + 1)
+    long_due = "".join([text[:10], text[10:]])
+    task = Task.from_dict({**TASK, "content": content, "due": {"string": long_due}})
+    assert task.content is content
+    assert task.due.string is long_due
+
+
+def test_unhashable_values_are_kept_as_they_are():
+    # A malformed payload must not make conversion fail
+    task = Task.from_dict({**TASK, "project_id": ["2001"], "labels": [{"name": "work"}]})
+    assert task.project_id == ["2001"]
+    assert to_plain(task)["labels"] == [{"name": "work"}]
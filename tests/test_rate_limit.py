@@ -0,0 +1,105 @@
+"""Request scheduler retries, priority lanes and 429 pauses against the fake Todoist server"""
+
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.fake_todoist import FakeTodoist, serve
+from src.config import CacheSettings, RateLimitSettings, Settings, SyncSettings
+from src.scheduler import Priority, request_priority
+from src.todoist_client import TodoistClient
+
+
+@pytest.fixture(scope="module")
+def fake():
+    fake = FakeTodoist(projects=5, tasks=10)
+    with serve(fake.app) as base_url:
+        fake.base_url = base_url
+        yield fake
+
+
+def make_client(fake: FakeTodoist, rate_limit: RateLimitSettings) -> TodoistClient:
+    return TodoistClient("test-token", Settings(
+        api_base_url=fake.base_url,
+        cache=CacheSettings(enabled=False),
+        sync=SyncSettings(enabled=False),
+        rate_limit=rate_limit,
+    ))
+
+
+def test_retries_429_and_503(fake):
+    async def run():
+        async with make_client(fake, RateLimitSettings(requests=0, base_delay=0.05)) as client:
+            fake.fail_next(2, status=429, retry_after=0.1)
+            fake.fail_next(2, status=503)
+            start = time.perf_counter()
+            projects = await client.get_projects()
+            return projects, time.perf_counter() - start, client.rate_limit_stats()
+
+    projects, elapsed, stats = asyncio.run(run())
+    assert len(projects) == len(fake.projects)
+    assert stats["throttled"] == 2
+    assert stats["retries"] == 4
+    assert stats["failures"] == 0
+    # Both 429s were waited out for their Retry-After
+    assert elapsed >= 0.2
+
+
+def test_gives_up_after_max_retries(fake):
+    async def run():
+        async with make_client(fake, RateLimitSettings(requests=0, base_delay=0.01, max_retries=1)) as client:
+            fake.fail_next(2, status=503)
+            with pytest.raises(Exception):
+                await client.get_projects()
+            return client.rate_limit_stats()
+
+    stats = asyncio.run(run())
+    assert stats["retries"] == 1
+    assert stats["failures"] == 1
+
+
+def test_interactive_lane_goes_first(fake):
+    finished = {Priority.INTERACTIVE: [], Priority.BACKGROUND: []}
+
+    async def call(client: TodoistClient, index: int, priority: Priority) -> None:
+        with request_priority(priority):
+            # Distinct parameters, so identical reads aren't coalesced into one request
+            await client.get_tasks(project_id=str(index))
+        finished[priority].append(time.perf_counter())
+
+    async def run():
+        # One request every 50 ms, far longer than the fake server takes to answer
+        settings = RateLimitSettings(requests=20, period=1.0, burst=1)
+        async with make_client(fake, settings) as client:
+            # Background reads are queued first; interactive ones arrive just after
+            lanes = [Priority.BACKGROUND] * 6 + [Priority.INTERACTIVE] * 3
+            await asyncio.gather(*(call(client, index, priority) for index, priority in enumerate(lanes)))
+            return client.rate_limit_stats()
+
+    stats = asyncio.run(run())
+    # Only the first background read, granted before anything queued, beats the interactive ones
+    background = sorted(finished[Priority.BACKGROUND])
+    assert max(finished[Priority.INTERACTIVE]) < background[1]
+    assert stats["lanes"]["interactive"]["max_wait"] < stats["lanes"]["background"]["max_wait"]
+
+
+def test_429_pauses_the_whole_bucket(fake):
+    async def run():
+        settings = RateLimitSettings(requests=1000, period=1.0, burst=100, max_delay=5.0)
+        async with make_client(fake, settings) as client:
+            fake.fail_next(1, status=429, retry_after=0.3)
+            first = asyncio.ensure_future(client.get_projects())
+            while client.scheduler.throttled == 0:
+                await asyncio.sleep(0.005)
+            paused_for = client.rate_limit_stats()["paused_for"]
+            # A request that never saw the 429 waits out the pause too
+            start = time.perf_counter()
+            await client.get_tasks(project_id="other")
+            waited = time.perf_counter() - start
+            await first
+            return paused_for, waited
+
+    paused_for, waited = asyncio.run(run())
+    assert 0 < paused_for <= 0.3
+    assert waited >= 0.2
@@ -0,0 +1,65 @@
+"""Single-tenant client lifecycle: the lifespan and setup_todoist"""
+
+import asyncio
+
+import pytest
+
+from benchmarks.fake_todoist import FakeTodoist, serve
+from src import server
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakeTodoist(projects=2, tasks=5)
+    with serve(fake.app) as base_url:
+        monkeypatch.setenv("TODOIST_API_BASE_URL", base_url)
+        monkeypatch.setenv("TODOIST_SNAPSHOT_ENABLED", "false")
+        monkeypatch.delenv("TODOIST_API_TOKEN", raising=False)
+        monkeypatch.setattr(server, "todoist_client", None)
+        yield fake
+
+
+def is_open(client) -> bool:
+    return client._users > 0 and client._http is not None
+
+
+def test_lifespan_opens_and_closes_the_env_client(fake, monkeypatch):
+    monkeypatch.setenv("TODOIST_API_TOKEN", "env-token")
+
+    async def run():
+        async with server.client_lifespan(server.mcp):
+            client = server.get_client()
+            assert is_open(client)
+            # A nested (per-session) lifespan shares the client
+            async with server.client_lifespan(server.mcp):
+                assert server.get_client() is client
+            assert is_open(client)
+            await client.get_projects()
+        return client
+
+    client = asyncio.run(run())
+    assert not is_open(client)
+    assert server.todoist_client is None
+
+
+def test_setup_todoist_replaces_the_client_once_verified(fake):
+    async def run():
+        async with server.client_lifespan(server.mcp):
+            assert server.todoist_client is None
+            assert "successfully" in await server.setup_todoist("first-token", None)
+            first = server.get_client()
+            assert is_open(first)
+
+            # A token that fails verification leaves the working client in place
+            fake.fail_next(1, status=401)
+            assert (await server.setup_todoist("bad-token", None)).startswith("Failed to set up Todoist")
+            assert server.get_client() is first and is_open(first)
+
+            assert "successfully" in await server.setup_todoist("second-token", None)
+            second = server.get_client()
+            assert second is not first and is_open(second)
+            assert not is_open(first)
+        return second
+
+    second = asyncio.run(run())
+    assert not is_open(second)
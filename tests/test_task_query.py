@@ -0,0 +1,28 @@
+"""Page limits and cursors for task lists"""
+
+import pytest
+
+from src.task_query import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, check_limit, paginate
+
+TASKS = [{"id": str(index)} for index in range(5)]
+
+
+@pytest.mark.parametrize("limit", [0, -1, MAX_PAGE_SIZE + 1])
+def test_out_of_range_limits_are_rejected(limit):
+    with pytest.raises(ValueError, match="limit must be between 1 and"):
+        check_limit(limit)
+    with pytest.raises(ValueError):
+        paginate(TASKS, limit, None)
+
+
+def test_missing_limit_uses_the_default():
+    assert check_limit(None) == DEFAULT_PAGE_SIZE
+    assert check_limit(MAX_PAGE_SIZE) == MAX_PAGE_SIZE
+
+
+def test_pages_follow_the_cursor():
+    page, cursor = paginate(TASKS, 2, None)
+    assert [task["id"] for task in page] == ["0", "1"]
+    page, cursor = paginate(TASKS, 3, cursor)
+    assert [task["id"] for task in page] == ["2", "3", "4"]
+    assert cursor is None
@@ -0,0 +1,98 @@
+"""Task store, analytics columns and prompt context reused across reads"""
+
+import asyncio
+
+import pytest
+
+from benchmarks.fake_todoist import FakeTodoist, serve
+from src.config import CacheSettings, Settings, SnapshotSettings, SyncSettings
+from src.todoist_client import TodoistClient
+
+
+@pytest.fixture
+def fake():
+    fake = FakeTodoist(projects=3, tasks=30)
+    with serve(fake.app) as base_url:
+        fake.base_url = base_url
+        yield fake
+
+
+def rest_client(fake: FakeTodoist, cache: bool = True) -> TodoistClient:
+    return TodoistClient("test-token", Settings(
+        api_base_url=fake.base_url,
+        cache=CacheSettings(enabled=cache),
+        sync=SyncSettings(enabled=False),
+        snapshot=SnapshotSettings(enabled=False),
+    ))
+
+
+def test_columns_are_reused_while_the_task_list_is_cached(fake):
+    async def run():
+        async with rest_client(fake) as client:
+            store = await client.get_task_store()
+            columns = await client.get_task_columns()
+            assert await client.get_task_store() is store
+            assert await client.get_task_columns() is columns
+
+            await client.create_task("New task", project_id=next(iter(fake.projects)))
+            assert await client.get_task_store() is not store
+            assert await client.get_task_columns() is not columns
+
+    asyncio.run(run())
+
+
+def test_store_is_rebuilt_without_a_cache(fake):
+    async def run():
+        async with rest_client(fake, cache=False) as client:
+            first = await client.get_task_store()
+            fake.tasks.clear()
+            assert len(await client.get_task_store()) == 0
+            assert len(first) == 30
+
+    asyncio.run(run())
+
+
+def test_prompt_context_is_reused_within_the_cache_ttl(fake):
+    async def run():
+        async with rest_client(fake) as client:
+            context = await client.get_prompt_context()
+            assert await client.get_prompt_context() is context
+            return context
+
+    asyncio.run(run())
+
+
+def test_project_planning_fetches_only_that_project_in_rest_mode(fake, monkeypatch):
+    from src import server
+    from src.cache import MISSING
+
+    async def run():
+        async with rest_client(fake) as client:
+            monkeypatch.setattr(server, "todoist_client", client)
+            project = next(project for project in fake.projects.values() if not project.get("is_inbox_project"))
+            prompt = await server.mcp.get_prompt("project_planning", {"project_name": project["name"]})
+            text = prompt.messages[0].content.text
+            assert f"**Project ID**: {project['id']}" in text
+            assert client.cache.peek(("tasks", project["id"])) is not MISSING
+            assert client.cache.peek(("tasks", None)) is MISSING
+
+    asyncio.run(run())
+
+
+def test_project_planning_reads_the_project_once(fake, monkeypatch):
+    from src import server
+
+    async def run():
+        async with rest_client(fake) as client:
+            monkeypatch.setattr(server, "todoist_client", client)
+            project = next(project for project in fake.projects.values() if not project.get("is_inbox_project"))
+            before = fake.request_count
+            await server.mcp.get_prompt("project_planning", {"project_name": project["name"]})
+            # Give any background load a chance to run
+            await asyncio.sleep(0.1)
+            # The project list and that project's tasks, with no prefetch of the same tasks
+            assert fake.request_count - before == 2
+            await client.get_tasks(project_id=project["id"])
+            assert fake.request_count - before == 2
+
+    asyncio.run(run())
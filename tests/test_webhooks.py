@@ -0,0 +1,111 @@
+"""Webhook deliveries applied to a client's replica"""
+
+import asyncio
+import json
+from typing import Any, Dict, Optional
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+from benchmarks.fake_todoist import FakeTodoist, serve
+from src.config import CacheSettings, Settings, SnapshotSettings, SyncSettings
+from src.todoist_client import TodoistClient
+from src.webhooks import DELIVERY_HEADER, SIGNATURE_HEADER, WebhookReceiver, sign
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def fake():
+    fake = FakeTodoist(projects=2, tasks=5)
+    with serve(fake.app) as base_url:
+        fake.base_url = base_url
+        yield fake
+
+
+def make_client(fake: FakeTodoist) -> TodoistClient:
+    return TodoistClient("test-token", Settings(
+        api_base_url=fake.base_url,
+        cache=CacheSettings(enabled=False),
+        sync=SyncSettings(refresh_interval=3600),
+        snapshot=SnapshotSettings(enabled=False),
+    ))
+
+
+def added(fake: FakeTodoist, task_id: str, user_id: str) -> Dict[str, Any]:
+    return {
+        "event_name": "item:added",
+        "user_id": user_id,
+        "event_data": {"id": task_id, "content": task_id, "project_id": next(iter(fake.projects)),
+                       "checked": False},
+    }
+
+
+class Deliveries:
+    """Posts signed events to a receiver serving one client, in process"""
+
+    def __init__(self, client: TodoistClient):
+        receiver = WebhookReceiver(SECRET, lambda: [client])
+        app = Starlette(routes=[Route("/webhooks/todoist", receiver.endpoint, methods=["POST"])])
+        self.http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    async def send(self, event: Dict[str, Any], secret: str = SECRET,
+                   delivery_id: Optional[str] = None) -> httpx.Response:
+        body = json.dumps(event).encode()
+        headers = {SIGNATURE_HEADER: sign(secret, body)}
+        if delivery_id is not None:
+            headers[DELIVERY_HEADER] = delivery_id
+        return await self.http.post("/webhooks/todoist", content=body, headers=headers)
+
+
+async def task_ids(client: TodoistClient):
+    return {task["id"] for task in await client.get_tasks()}
+
+
+def test_rejects_bad_signature(fake):
+    async def run():
+        async with make_client(fake) as client:
+            return await Deliveries(client).send(added(fake, "pushed", fake.user_id), secret="wrong")
+
+    assert asyncio.run(run()).status_code == 401
+
+
+def test_applies_events_for_the_accounts_user_only(fake):
+    async def run():
+        async with make_client(fake) as client:
+            await client.get_tasks()
+            deliveries = Deliveries(client)
+            ours = await deliveries.send(added(fake, "ours", fake.user_id))
+            theirs = await deliveries.send(added(fake, "theirs", "another-user"))
+            return ours.json(), theirs.json(), await task_ids(client)
+
+    ours, theirs, ids = asyncio.run(run())
+    assert ours == {"status": "applied"}
+    assert theirs == {"status": "ignored"}
+    assert "ours" in ids and "theirs" not in ids
+
+
+def test_keeps_pushes_from_before_the_first_sync(fake):
+    async def run():
+        async with make_client(fake) as client:
+            assert client.sync.last_synced is None
+            response = await Deliveries(client).send(added(fake, "early", fake.user_id))
+            return response.json(), await task_ids(client)
+
+    response, ids = asyncio.run(run())
+    assert response == {"status": "applied"}
+    assert "early" in ids
+    assert set(fake.tasks) <= ids
+
+
+def test_skips_redeliveries(fake):
+    async def run():
+        async with make_client(fake) as client:
+            deliveries = Deliveries(client)
+            first = await deliveries.send(added(fake, "once", fake.user_id), delivery_id="d1")
+            again = await deliveries.send(added(fake, "once", fake.user_id), delivery_id="d1")
+            return first.json(), again.json()
+
+    assert asyncio.run(run()) == ({"status": "applied"}, {"status": "duplicate"})
@@ -0,0 +1,70 @@
+"""Worker processes behind the router: restarts and shutdown"""
+
+import asyncio
+import os
+import time
+
+import httpx
+
+from benchmarks.fake_todoist import serve
+from src.worker_router import Worker, WorkerRouter, _stable_index, build_router_app
+
+APP = "tests.worker_app:app"
+
+
+def workers(directory, count: int):
+    return [Worker(index, os.path.join(directory, f"worker-{index}.sock"), APP, "warning")
+            for index in range(count)]
+
+
+def token_for(index: int, count: int) -> str:
+    """A tenant token the router pins to worker `index`"""
+    return next(token for token in (f"token-{n}" for n in range(1000))
+                if _stable_index(token, count) == index)
+
+
+def test_workers_stop_together(tmp_path):
+    group = workers(str(tmp_path), 3)
+
+    async def run():
+        for worker in group:
+            worker.start()
+        await asyncio.gather(*(worker.wait_ready() for worker in group))
+        start = time.perf_counter()
+        for worker in group:
+            worker.terminate()
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        await asyncio.gather(*(worker.wait_stopped() for worker in group))
+        ticker.cancel()
+        for worker in group:
+            await worker.client.aclose()
+        return time.perf_counter() - start, ticks
+
+    elapsed, ticks = asyncio.run(run())
+    assert not any(worker.alive for worker in group)
+    assert elapsed < 5
+    # The event loop kept running while the workers exited
+    assert ticks > 0
+
+
+def test_requests_wait_for_a_restarted_worker(tmp_path):
+    group = workers(str(tmp_path), 2)
+    app = build_router_app(WorkerRouter(group))
+    headers = {"Authorization": f"Bearer {token_for(0, 2)}"}
+    with serve(app, lifespan="on") as base_url:
+        first = httpx.get(base_url + "/pid", headers=headers)
+        assert first.status_code == 200
+        group[0].process.kill()
+        group[0].process.wait()
+        # Sent before the supervisor has noticed; held until the new process listens
+        second = httpx.get(base_url + "/pid", headers=headers, timeout=30)
+        assert second.status_code == 200
+        assert second.text != first.text
@@ -0,0 +1,14 @@
+"""A minimal app for worker processes in the router tests"""
+
+import os
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+
+async def pid(request):
+    return PlainTextResponse(str(os.getpid()))
+
+
+app = Starlette(routes=[Route("/pid", pid)])